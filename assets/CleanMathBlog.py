@@ -4,45 +4,136 @@
 Created on Sun Jun  1 19:06:39 2025
 
 @author: junga1
+
+Protect LaTeX math in Jekyll posts from Liquid ({{ / }} inside math gets
+wrapped in {% raw %}...{% endraw %}), using the same token-level fixer as
+MakeBlogPost (mdpipeline.fix_latex_in_text).
+
+    python CleanMathBlog.py                      # all posts in ../_posts
+    python CleanMathBlog.py post1.md post2.md    # just these files
+    python CleanMathBlog.py --force              # ignore the saved state
+
+The hash of every file's content after cleaning is saved in a state file;
+files whose content still has that hash are skipped without being parsed.
 """
 
-import re
+import os
+import json
+import hashlib
+import argparse
+import tempfile
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
-def fix_latex_in_file(md_path):
-    with open(md_path, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    new_lines = []
-    in_raw_block = False
-
-    for line in lines:
-        modified = line
-        if not in_raw_block:
-            # Detect LaTeX expressions with {{ or }}
-            if re.search(r"\$\$?.*{{.*}}.*\$\$?", line):
-                new_lines.append("{% raw %}\n")
-                new_lines.append(modified)
-                new_lines.append("{% endraw %}\n")
-                in_raw_block = False  # Stay out; single-line wrap
-            elif "{{" in line or "}}" in line:
-                new_lines.append("{% raw %}\n")
-                new_lines.append(modified)
-                new_lines.append("{% endraw %}\n")
-            else:
-                new_lines.append(modified)
-        else:
-            new_lines.append(modified)
-
-    with open(md_path, "w", encoding="utf-8") as f:
-        f.writelines(new_lines)
+from mdpipeline import fix_latex_in_text
+
+# --- Config ---
+POSTS_DIR = "../_posts"
+STATE_NAME = ".cleanmath_state.json"
+STATE_VERSION = 1
+MAX_WORKERS = None      # None -> one worker per CPU
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
 
+
+def write_atomic(path, text):
+    """Write text to path via a temporary file in the same directory and os.replace."""
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=".md", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def fix_latex_in_file(md_path):
+    """
+    Fix one post in place. Returns the content hash of the cleaned file;
+    the file is only rewritten if the fixer changed something.
+    """
+    path = Path(md_path)
+    data = path.read_bytes()
+    content = data.decode("utf-8")
+    fixed = fix_latex_in_text(content)
+    if fixed == content:
+        return content_hash(data)
+    write_atomic(path, fixed)
     print(f"✔ Fixed: {md_path}")
+    return content_hash(fixed.encode("utf-8"))
 
-# --- Run the script on a specific file ---
-if __name__ == "__main__":
-    md_file = Path("../_posts/2025-06-01-Generalization.md")  # Modify as needed
-    if md_file.exists():
-        fix_latex_in_file(md_file)
+
+def load_state(state_path):
+    try:
+        data = json.loads(state_path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+    return data.get("files", {}) if data.get("version") == STATE_VERSION else {}
+
+
+def save_state(state_path, files):
+    write_atomic(state_path, json.dumps({"version": STATE_VERSION, "files": files}, indent=1))
+
+
+def clean_posts(paths, state_path=None, max_workers=MAX_WORKERS, force=False):
+    """
+    Clean many posts concurrently, skipping files whose content hash equals
+    the one recorded after their last cleaning. Returns (n_cleaned, n_skipped, failed).
+    """
+    state = {} if (force or state_path is None) else load_state(state_path)
+    new_state = dict(state)
+
+    stale = []
+    for path in paths:
+        key = str(path.resolve())
+        if state.get(key) == content_hash(path.read_bytes()):
+            continue
+        stale.append(path)
+
+    failed = {}
+    if stale:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {path: pool.submit(fix_latex_in_file, path) for path in stale}
+            for path, fut in futures.items():
+                try:
+                    new_state[str(path.resolve())] = fut.result()
+                except (OSError, UnicodeDecodeError) as e:
+                    failed[path] = str(e)
+                    print(f"❌ {path}: {e}")
+
+    if state_path is not None and new_state != state:
+        save_state(state_path, new_state)
+    return len(stale) - len(failed), len(paths) - len(stale), failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wrap Liquid-breaking LaTeX math in Jekyll posts in {% raw %}.")
+    parser.add_argument("files", nargs="*", help="posts to clean (default: all *.md in --posts)")
+    parser.add_argument("--posts", default=POSTS_DIR, help="posts directory (default: %(default)s)")
+    parser.add_argument("--state", default=STATE_NAME, help="state file with content hashes (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="worker processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="clean every file, ignoring the saved state")
+    args = parser.parse_args(argv)
+
+    if args.files:
+        paths = [Path(f) for f in args.files]
     else:
-        print(f"❌ File not found: {md_file}")
\ No newline at end of file
+        posts_dir = Path(args.posts)
+        if not posts_dir.is_dir():
+            parser.error(f"posts directory not found: {posts_dir}")
+        paths = sorted(posts_dir.glob("*.md"))
+
+    missing = [p for p in paths if not p.is_file()]
+    if missing:
+        parser.error(f"file(s) not found: {', '.join(map(str, missing))}")
+
+    cleaned, skipped, failed = clean_posts(paths, Path(args.state), args.workers, args.force)
+    print(f"✅ {cleaned} post(s) processed, {skipped} unchanged since the last run, {len(failed)} failed.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
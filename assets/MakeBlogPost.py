@@ -6,132 +6,277 @@ import os
 import subprocess
 from pathlib import Path
 from datetime import date
-from typing import Union, Dict, Tuple, Iterator
-
-# Optional imports (keep if you use them elsewhere)
-import networkx as nx
-import matplotlib.pyplot as plt
-from networkx.algorithms.community import greedy_modularity_communities
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Union, Dict, Tuple, Iterable, List, NamedTuple
 import tempfile
-from pdf2image import convert_from_path
+
+from blogcore import (
+    NEW_ENTRY_RE, iter_newglossaryentry_blocks, parse_glossary, load_expanded_glossary_sources,
+    extract_tikz_from_entry, replace_tikz_with_includegraphics, term_slug, convert_pandoc_figures_to_html
+)
+from buildcache import BuildCache, DEFAULT_MAX_BYTES
+from rasterize import rasterize_pdf
+from texformat import pdflatex_command
+from glossarystream import parse_glossary_sources
+from glossaryindex import GlossaryIndex
+from texscan import cited_keys
+from bibcache import BibliographyCache
+from pandocbatch import convert_tex_batch, pandoc_cache_key, DEFAULT_BATCH_SIZE
+from mdpipeline import (
+    fix_latex_in_text, remove_reference_blocks_and_headers, add_footer, remove_math_and_raw, write_posts,
+    run_stages, JEKYLL_STAGES, SUBSTACK_STAGES
+)
+from builddag import BuildGraph, BuildNode, BuildReport
+import buildtrace
 
 PathLike = Union[str, Path]
 
-# --- LaTeX + Markdown safety wrappers ---
-RAW_OPEN  = "{% raw %}"
-RAW_CLOSE = "{% endraw %}"
+BASE_IMAGE_URL = "https://AaltoDictionaryofML.github.io/images/"
+IMAGE_URL_PREFIX = "../images/"   # how the generated .tex files refer to the figures
 
-# Match fenced code blocks ```...``` (any language) and existing raw blocks.
-FENCE_OR_RAW_RE = re.compile(r"(```.*?```|{% raw %}.*?{% endraw %})", flags=re.DOTALL)
 
-# Display math: $$...$$ (can be multiline)
-DISPLAY_MATH_RE = re.compile(r"\$\$(.+?)\$\$", flags=re.DOTALL)
+TIKZ_PREAMBLE = r"""
+\documentclass[tikz]{standalone}
+\usepackage{tikz}
+\usetikzlibrary{fit}
+\usepackage[dvipsnames]{xcolor}
+\usetikzlibrary{positioning, arrows.meta, calc, decorations.pathreplacing}
+\definecolor{lightblue}{RGB}{173, 216, 230}
+""".strip() + "\n"
 
-# Inline math: $...$ (but not $$...$$)
-INLINE_MATH_RE = re.compile(r"(?<!\$)\$(?!\$)(.+?)(?<!\$)\$(?!\$)", flags=re.DOTALL)
 
-BASE_IMAGE_URL = "https://AaltoDictionaryofML.github.io/images/"
+class RasterOptions(NamedTuple):
+    """
+    How compiled figures are rasterized (see rasterize.rasterize_pdf).
+    backend=None picks the first installed backend.
+    """
+    dpi: int = 300
+    image_format: str = "png"   # "png" or "webp"
+    crop: bool = False
+    quality: int = 90
+    backend: str | None = None
+
+    def cache_tag(self) -> str:
+        return f"dpi={self.dpi} format={self.image_format} crop={self.crop} quality={self.quality}"
 
 
-def _wrap_math_segment(segment: str) -> str:
+class TikzResult(NamedTuple):
     """
-    Wrap only math tokens ($...$ or $$...$$) that contain {{ or }} using {% raw %}...{% endraw %}.
-    No extra whitespace/newlines are inserted; we wrap ONLY the math token itself.
+    Outcome of compiling one TikZ figure.
     """
+    name: str
+    image_path: Path | None
+    ok: bool
+    error: str | None = None
+    cached: bool = False
 
-    def wrap_if_liquid(match: re.Match) -> str:
-        full  = match.group(0)  # full $...$ or $$...$$ token
-        inner = match.group(1)  # inside delimiters
-        if "{{" in inner or "}}" in inner:
-            return f"{RAW_OPEN}{full}{RAW_CLOSE}"
-        return full
 
-    segment = DISPLAY_MATH_RE.sub(wrap_if_liquid, segment)
-    segment = INLINE_MATH_RE.sub(wrap_if_liquid, segment)
-    return segment
+def tikz_standalone_document(tikz_code: str) -> str:
+    return f"{TIKZ_PREAMBLE}\\begin{{document}}\n{tikz_code}\n\\end{{document}}\n"
 
 
-def fix_latex_in_text(md_text: str) -> str:
+def _tool_error(e: subprocess.CalledProcessError, log_path: Path | None = None, tail: int = 20) -> str:
     """
-    Process a Markdown string so that ONLY LaTeX math tokens containing '{{' or '}}'
-    are wrapped with {% raw %}...{% endraw %}.
-    - Idempotent for code fences and existing raw blocks.
-    - No extra line breaks introduced.
+    Short error text for a failed external tool: the tail of its log file
+    (pdflatex reports errors there) or of its captured output.
     """
-    parts = FENCE_OR_RAW_RE.split(md_text)  # keep delimiters as separate parts
-    fixed_parts = []
-    for part in parts:
-        if FENCE_OR_RAW_RE.fullmatch(part or ""):
-            fixed_parts.append(part)  # leave fences/raw unchanged
-        else:
-            fixed_parts.append(_wrap_math_segment(part))
-    return "".join(fixed_parts)
-
-
-def extract_tikz_from_entry(entry_text: str) -> str | None:
+    text = ""
+    if log_path is not None and log_path.exists():
+        text = log_path.read_text(encoding="utf-8", errors="replace")
+    if not text.strip():
+        text = (e.stderr or b"").decode("utf-8", "replace") + (e.stdout or b"").decode("utf-8", "replace")
+    lines = text.strip().splitlines()[-tail:]
+    return f"{Path(e.cmd[0]).name} exited with status {e.returncode}:\n" + "\n".join(lines)
+
+
+def compile_tikz_to_png(
+    tikz_code: str,
+    filename: str = "tikz_figure",
+    output_dir: str = "../images",
+    cache: BuildCache | None = None,
+    raster: RasterOptions = RasterOptions(),
+    format_dir: str | None = None
+) -> TikzResult:
     """
-    Try to extract a TikZ picture from the entry text.
-    Returns TikZ code if found, otherwise None.
+    Compile TikZ -> PDF via pdflatex, then rasterize the PDF (PNG by default, see RasterOptions).
+    Each compile runs in its own temporary directory, so figures can be built concurrently.
+    With a cache, an unchanged figure is copied from the cache instead of recompiled.
+    With format_dir, pdflatex starts from a pre-compiled format of TIKZ_PREAMBLE.
+    Errors are returned in the result instead of raised.
     """
-    match = re.search(r'\\begin\{tikzpicture\}.*?\\end\{tikzpicture\}', entry_text, re.DOTALL)
-    if match:
-        return match.group(0)
+    os.makedirs(output_dir, exist_ok=True)
+    output_image_path = Path(output_dir) / f"{filename}.{raster.image_format}"
 
-    # Fallback for custom {tikzpicture} ... {tikzpicture} style
-    match = re.search(r'\{tikzpicture\}.*?\{tikzpicture\}', entry_text, re.DOTALL)
-    if match:
-        tikz_inner = match.group(0)[13:-13].strip()
-        return f"\\begin{{tikzpicture}}\n{tikz_inner}\n\\end{{tikzpicture}}"
+    latex_code = tikz_standalone_document(tikz_code)
 
-    return None
+    cache_key = BuildCache.key("tikz-image", latex_code, raster.cache_tag()) if cache else None
+    if cache and cache.get(cache_key, output_image_path):
+        print(f"♻️ Reused cached image: {output_image_path}")
+        return TikzResult(filename, output_image_path, True, cached=True)
 
+    with tempfile.TemporaryDirectory(prefix="tikz-") as work_dir:
+        work = Path(work_dir)
+        (work / "figure.tex").write_text(latex_code, encoding="utf-8")
+        command, env = pdflatex_command("figure.tex", TIKZ_PREAMBLE, format_dir)
 
-def replace_tikz_with_includegraphics(description: str, image_path: str) -> str:
+        try:
+            with buildtrace.span("pdflatex", tool=True, figure=filename):
+                subprocess.run(command, cwd=work, env=env, check=True, capture_output=True)
+        except subprocess.CalledProcessError as e:
+            print(f"❌ pdflatex failed for: {filename}")
+            return TikzResult(filename, None, False, _tool_error(e, work / "figure.log"))
+
+        try:
+            with buildtrace.span("rasterize", tool=True, figure=filename):
+                rasterize_pdf(
+                    work / "figure.pdf", [output_image_path],
+                    dpi=raster.dpi, crop=raster.crop, quality=raster.quality, backend=raster.backend
+                )
+                buildtrace.count("bytes_written", output_image_path.stat().st_size)
+        except subprocess.CalledProcessError as e:
+            print(f"❌ Rasterization failed for: {filename}")
+            return TikzResult(filename, None, False, _tool_error(e))
+        except ValueError as e:
+            print(f"❌ Rasterization failed for: {filename}")
+            return TikzResult(filename, None, False, str(e))
+
+    if cache:
+        cache.put(cache_key, output_image_path)
+
+    print(f"✅ Saved image to: {output_image_path}")
+    return TikzResult(filename, output_image_path, True)
+
+
+def compile_tikz_figures(
+    figures: Dict[str, str],
+    output_dir: str = "../images",
+    max_workers: int | None = None,
+    cache: BuildCache | None = None,
+    raster: RasterOptions = RasterOptions(),
+    format_dir: str | None = None
+) -> Dict[str, TikzResult]:
     """
-    Replace the TikZ block in the description with a single \includegraphics command.
+    Compile many figures (filename -> TikZ code) concurrently.
+    max_workers=None uses one worker per CPU. Returns filename -> TikzResult.
     """
-    include_cmd = fr"\\includegraphics[width=0.8\\linewidth]{{{image_path}}}"
-    return re.sub(
-        r'\\begin\{tikzpicture\}.*?\\end\{tikzpicture\}',
-        include_cmd,
-        description,
-        count=1,
-        flags=re.DOTALL
-    )
-
-
-def compile_tikz_to_png(tikz_code: str, filename: str = "tikz_figure", output_dir: str = "../images") -> None:
+    max_workers = max_workers or os.cpu_count() or 1
+    results: Dict[str, TikzResult] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(compile_tikz_to_png, code, name, output_dir, cache, raster, format_dir): name
+            for name, code in figures.items()
+        }
+        for fut in as_completed(futures):
+            name = futures[fut]
+            try:
+                results[name] = fut.result()
+            except Exception as e:  # e.g. pdflatex not installed
+                results[name] = TikzResult(name, None, False, str(e))
+
+    failed = [r for r in results.values() if not r.ok]
+    print(f"✅ Compiled {len(results) - len(failed)} / {len(results)} TikZ figure(s).")
+    return results
+
+
+PAGES_WRITTEN_RE = re.compile(r"Output written on .*?\((\d+) pages?", re.DOTALL)
+
+
+def compile_tikz_bulk(
+    figures: Dict[str, str],
+    output_dir: str = "../images",
+    cache: BuildCache | None = None,
+    max_workers: int | None = None,
+    raster: RasterOptions = RasterOptions(),
+    format_dir: str | None = None
+) -> Dict[str, TikzResult]:
     """
-    Compile TikZ -> PDF via pdflatex, then convert PDF -> PNG via ImageMagick 'convert'.
+    Compile many figures (filename -> TikZ code) with a single pdflatex run:
+    all figures go into one standalone document (one page per tikzpicture),
+    which is rasterized in one call into <filename>.png (or .webp).
+    Cached figures are skipped. If the combined document fails to compile,
+    the remaining figures fall back to compile_tikz_figures so that one broken
+    figure does not block the others and gets its own error message.
     """
     os.makedirs(output_dir, exist_ok=True)
-    output_png_path = os.path.join(output_dir, f"{filename}.png")
-
-    latex_code = f"""
-\\documentclass[tikz]{{standalone}}
-\\usepackage{{tikz}}
-\\usetikzlibrary{{fit}}
-\\usepackage[dvipsnames]{{xcolor}}
-\\usetikzlibrary{{positioning, arrows.meta, calc, decorations.pathreplacing}}
-\\definecolor{{lightblue}}{{RGB}}{{173, 216, 230}}
-\\begin{{document}}
-{tikz_code}
-\\end{{document}}
-""".strip() + "\n"
-
-    tex_path = "figure.tex"
-    pdf_path = "figure.pdf"
+    results: Dict[str, TikzResult] = {}
+    keys: Dict[str, str] = {}
+    pending: Dict[str, str] = {}
+
+    for name, code in figures.items():
+        image_path = Path(output_dir) / f"{name}.{raster.image_format}"
+        if cache:
+            keys[name] = BuildCache.key("tikz-image", tikz_standalone_document(code), raster.cache_tag())
+            if cache.get(keys[name], image_path):
+                results[name] = TikzResult(name, image_path, True, cached=True)
+                continue
+        pending[name] = code
 
-    Path(tex_path).write_text(latex_code, encoding="utf-8")
+    if cache:
+        print(f"♻️ Reused {len(results)} cached image(s); {len(pending)} figure(s) to compile.")
+    if not pending:
+        return results
 
-    subprocess.run(["pdflatex", "-interaction=nonstopmode", tex_path], check=False)
+    names = list(pending)
+    body = "\n".join(pending[name] for name in names)
 
-    subprocess.run(
-        ["convert", "-density", "300", pdf_path, "-quality", "90", output_png_path],
-        check=False
-    )
+    with tempfile.TemporaryDirectory(prefix="tikz-bulk-") as work_dir:
+        work = Path(work_dir)
+        (work / "figures.tex").write_text(tikz_standalone_document(body), encoding="utf-8")
+        command, env = pdflatex_command("figures.tex", TIKZ_PREAMBLE, format_dir)
 
-    print(f"✅ Saved PNG to: {output_png_path}")
+        try:
+            with buildtrace.span("pdflatex", tool=True, figures=len(names)):
+                subprocess.run(command, cwd=work, env=env, check=True, capture_output=True)
+            log = (work / "figures.log").read_text(encoding="utf-8", errors="replace")
+            m = PAGES_WRITTEN_RE.search(log)
+            n_pages = int(m.group(1)) if m else -1
+            if n_pages != len(names):
+                raise ValueError(f"expected {len(names)} pages, got {n_pages}")
+            image_paths = [Path(output_dir) / f"{name}.{raster.image_format}" for name in names]
+            with buildtrace.span("rasterize", tool=True, figures=len(names)):
+                rasterize_pdf(
+                    work / "figures.pdf", image_paths,
+                    dpi=raster.dpi, crop=raster.crop, quality=raster.quality, backend=raster.backend
+                )
+                buildtrace.count("bytes_written", sum(p.stat().st_size for p in image_paths))
+            for name, image_path in zip(names, image_paths):
+                if cache:
+                    cache.put(keys[name], image_path)
+                results[name] = TikzResult(name, image_path, True)
+        except (subprocess.CalledProcessError, ValueError, OSError) as e:
+            print(f"⚠️ Single-pass compile failed ({e}); compiling the figures one by one.")
+            results.update(
+                compile_tikz_figures(
+                    pending, output_dir, max_workers=max_workers, cache=cache, raster=raster, format_dir=format_dir
+                )
+            )
+            return results
+
+    print(f"✅ Compiled {len(names)} TikZ figure(s) in one pdflatex run into: {output_dir}")
+    return results
+
+
+def glossary_figures(glossary: Dict[str, str], keys: Iterable[str] | None = None) -> Dict[str, str]:
+    """
+    Collect the TikZ figures of a parsed glossary as <term>_tikz -> TikZ code.
+    """
+    keys = glossary if keys is None else keys
+    figures = {}
+    for term in keys:
+        tikz_code = extract_tikz_from_entry(glossary[term])
+        if tikz_code:
+            figures[f"{term}_tikz"] = tikz_code
+    return figures
+
+
+def texfile_image_path(
+    term: str, tikz_code: str | None, image_format: str, image_url_prefix: str = IMAGE_URL_PREFIX
+) -> str | None:
+    """
+    Path of the term's figure as written into its .tex (None without a TikZ figure).
+    """
+    return f"{image_url_prefix}{term}_tikz.{image_format}" if tikz_code else None
 
 
 def generate_texfile_with_image(term: str, description: str, image_path: str | None = None, output_dir: str = "../") -> None:
@@ -160,39 +305,76 @@ def generate_texfile_with_image(term: str, description: str, image_path: str | N
 """
 
     tex_output_path.write_text(tex_code, encoding="utf-8")
+    buildtrace.count("bytes_written", len(tex_code.encode("utf-8")))
     print(f"✅ LaTeX file written to: {tex_output_path}")
 
 
-def convert_pandoc_figures_to_html(md_text: str) -> str:
+def blog_post_markdown(
+    tex_file: PathLike,
+    bib_file: PathLike,
+    title: str,
+    seo_title: str,
+    seo_description: str,
+    post_date: str,
+    cache: BuildCache | None = None,
+    pandoc_output: PathLike | None = None
+) -> str | None:
     """
-    Converts Pandoc-style image+caption blocks to HTML <figure> with <figcaption>,
-    preserving inline LaTeX and width attributes.
+    Converts a LaTeX file to Markdown using Pandoc and adds Jekyll front matter.
+    Returns the *raw* post text (before the mdpipeline stages), or None if Pandoc fails.
+    With a cache, the Pandoc output is reused while the TeX file and bib file are unchanged.
+    pandoc_output is Pandoc's output for tex_file produced beforehand (see pandocbatch);
+    Pandoc is then not run at all.
     """
-    figure_pattern = re.compile(r'!\[([^\]]+)\]\(([^)]+)\)\{([^}]*)\}', flags=re.DOTALL)
-
-    def repl(match: re.Match) -> str:
-        caption = match.group(1).strip()
-        img_path = match.group(2).strip()
-        attr_string = match.group(3).strip()
-
-        width_match = re.search(r'width\s*=\s*["\']?([\d.]+%)["\']?', attr_string)
-        width_attr = f' width="{width_match.group(1)}"' if width_match else ''
-
-        id_match = re.search(r'#([a-zA-Z0-9\-_]+)', attr_string)
-        id_attr = f' id="{id_match.group(1)}"' if id_match else ''
+    if pandoc_output is not None:
+        markdown_body = Path(pandoc_output).read_text(encoding="utf-8")
+    else:
+        # Private temporary directory, so several conversions can run at once.
+        with tempfile.TemporaryDirectory(prefix="pandoc-") as work_dir:
+            temp_md_path = Path(work_dir) / "temp_pandoc_output.md"
+
+            command = [
+                "pandoc",
+                str(tex_file),
+                "-o", str(temp_md_path),
+                "--from=latex",
+                "--to=markdown",
+                "--standalone",
+                "--citeproc",
+                f"--bibliography={bib_file}"
+            ]
+
+            cache_key = pandoc_cache_key(tex_file, bib_file) if cache else None
+
+            if cache and cache.get(cache_key, temp_md_path):
+                print(f"♻️ Reused cached Pandoc output for: {tex_file}")
+            else:
+                try:
+                    with buildtrace.span("pandoc", tool=True):
+                        subprocess.run(command, check=True)
+                        buildtrace.count("bytes_read", Path(tex_file).stat().st_size)
+                        buildtrace.count("bytes_written", temp_md_path.stat().st_size)
+                except subprocess.CalledProcessError as e:
+                    print("❌ Pandoc conversion failed:", e)
+                    return None
+                if cache:
+                    cache.put(cache_key, temp_md_path)
+
+            markdown_body = temp_md_path.read_text(encoding="utf-8")
 
-        alt_attr = caption.replace('"', '')
+    markdown_body = convert_pandoc_figures_to_html(markdown_body)
 
-        return (
-            f'<figure{id_attr}>\n'
-            f'  <img src="{img_path}" alt="{alt_attr}"{width_attr}>\n'
-            f'  <figcaption>\n'
-            f'    {caption}\n'
-            f'  </figcaption>\n'
-            f'</figure>'
-        )
+    front_matter = f"""---
+layout: post
+title: "{title}"
+date: {post_date}
+seo_title: "{seo_title}"
+seo_description: "{seo_description}"
+markdown: kramdown
+---
 
-    return figure_pattern.sub(repl, md_text)
+"""
+    return front_matter + markdown_body
 
 
 def generate_blog_post(
@@ -203,273 +385,523 @@ def generate_blog_post(
     seo_title: str = "Geometric Median – A Robust Alternative to the Mean in Machine Learning",
     seo_description: str = "Understand the geometric median, a key concept in robust statistics and machine learning.",
     post_slug: str = "geometric-median",
-    post_date: str | None = None
+    post_date: str | None = None,
+    cache: BuildCache | None = None,
+    pandoc_output: PathLike | None = None
 ) -> Path | None:
     """
-    Converts a LaTeX file to Markdown using Pandoc and adds Jekyll front matter.
-    Writes *raw* md file (suffix _raw.md) and returns that Path.
+    Writes the raw post of blog_post_markdown() to <date>-<slug>_raw.md and returns that Path.
     """
     post_date = post_date or date.today().isoformat()
     filename = f"{post_date}-{post_slug}_raw.md"
     output_path = Path(output_dir) / filename
     os.makedirs(output_path.parent, exist_ok=True)
 
-    temp_md_path = Path("temp_pandoc_output.md")
-
-    command = [
-        "pandoc",
-        str(tex_file),
-        "-o", str(temp_md_path),
-        "--from=latex",
-        "--to=markdown",
-        "--standalone",
-        "--citeproc",
-        f"--bibliography={bib_file}"
-    ]
-
-    try:
-        subprocess.run(command, check=True)
-    except subprocess.CalledProcessError as e:
-        print("❌ Pandoc conversion failed:", e)
+    raw_md = blog_post_markdown(
+        tex_file, bib_file, title, seo_title, seo_description, post_date,
+        cache=cache, pandoc_output=pandoc_output
+    )
+    if raw_md is None:
         return None
 
-    markdown_body = temp_md_path.read_text(encoding="utf-8")
-    markdown_body = convert_pandoc_figures_to_html(markdown_body)
-
-    front_matter = f"""---
-layout: post
-title: "{title}"
-date: {post_date}
-seo_title: "{seo_title}"
-seo_description: "{seo_description}"
-markdown: kramdown
----
-
-"""
-
-    output_path.write_text(front_matter + markdown_body, encoding="utf-8")
-    temp_md_path.unlink(missing_ok=True)
+    output_path.write_text(raw_md, encoding="utf-8")
 
     print(f"✅ Blog post written to: {output_path}")
     return output_path
 
 
-# ---------- NEW: robust parsing from ADictML*expanded.tex files ----------
-
-NEW_ENTRY_RE = re.compile(r"\\newglossaryentry\{([^}]+)\}\s*\{", re.DOTALL)
+# ---------- Your existing post-processing helpers ----------
 
-def extract_balanced_braces(s: str, start_brace_idx: int) -> Tuple[str, int]:
-    """
-    Given s[start_brace_idx] == '{', return (content_inside, index_after_closing_brace).
-    Handles nested braces.
-    """
-    if start_brace_idx < 0 or start_brace_idx >= len(s) or s[start_brace_idx] != "{":
-        raise ValueError("extract_balanced_braces: start index must point to '{'.")
+def fix_latex_in_file(md_path: PathLike) -> None:
+    p = Path(md_path)
+    content = p.read_text(encoding="utf-8")
+    fixed = fix_latex_in_text(content)
+    p.write_text(fixed, encoding="utf-8")
+    print(f"✔ Fixed LaTeX math in: {md_path}")
 
-    depth = 0
-    for i in range(start_brace_idx, len(s)):
-        ch = s[i]
-        if ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                return s[start_brace_idx + 1 : i], i + 1
-    raise ValueError("Unbalanced braces while parsing.")
 
-def iter_newglossaryentry_blocks(tex: str) -> Iterator[Tuple[str, str]]:
-    """
-    Yield (key, body_text) for each \\newglossaryentry{key}{body}.
-    """
-    pos = 0
-    while True:
-        m = NEW_ENTRY_RE.search(tex, pos)
-        if not m:
-            break
-        key = m.group(1).strip()
-        body_open_brace_idx = m.end() - 1  # points to '{' starting the body
-        body, next_pos = extract_balanced_braces(tex, body_open_brace_idx)
-        yield key, body
-        pos = next_pos
+def clean_markdown_file(input_path: Path, output_path: Path) -> None:
+    content = Path(input_path).read_text(encoding="utf-8")
+    content = remove_reference_blocks_and_headers(content)
+    Path(output_path).write_text(content, encoding="utf-8")
+    print(f"✅ Cleaned: {output_path.name}")
 
-def parse_glossary(tex: str) -> Dict[str, str]:
-    """
-    Return dict: key -> description text (value of description={...})
-    """
-    glossary: Dict[str, str] = {}
 
-    for key, body in iter_newglossaryentry_blocks(tex):
-        body_cleaned = re.sub(r"(?m)^%.*$", "", body)  # remove full-line comments
+def append_footer_to_markdown(md_path: PathLike) -> None:
+    path = Path(md_path)
+    content = path.read_text(encoding="utf-8")
 
-        desc_idx = body_cleaned.find("description=")
-        if desc_idx == -1:
-            continue
+    if "Aalto Dictionary of Machine Learning" not in content:
+        path.write_text(add_footer(content), encoding="utf-8")
+        print(f"✅ Footer added to: {md_path}")
+    else:
+        print(f"⚠️ Footer already present in: {md_path}")
 
-        brace_idx = body_cleaned.find("{", desc_idx)
-        if brace_idx == -1:
-            continue
 
-        try:
-            desc_text, _ = extract_balanced_braces(body_cleaned, brace_idx)
-        except ValueError:
-            continue
+def make_substack_ready(md_in_path: PathLike, md_out_path: PathLike) -> None:
+    raw = Path(md_in_path).read_text(encoding="utf-8")
+    cleaned = remove_math_and_raw(raw)
+    Path(md_out_path).write_text(cleaned, encoding="utf-8")
 
-        glossary[key] = desc_text.strip()
 
-    return glossary
+# ---------- Batch publishing (parse once, publish many) ----------
 
-def load_expanded_glossary_sources(source: PathLike) -> str:
+def publish_term(
+    term: str,
+    entry_text: str,
+    bib_file: PathLike,
+    output_folder: PathLike = "../_posts",
+    image_output_dir: PathLike = "../images",
+    tex_output_dir: PathLike = "../",
+    slug: str | None = None,
+    post_date: str | None = None,
+    image_url_prefix: str = IMAGE_URL_PREFIX,
+    cache: BuildCache | None = None,
+    compile_figure: bool = True,
+    raster: RasterOptions = RasterOptions(),
+    format_dir: str | None = None,
+    pandoc_output: str | None = None,
+    bib_cache: BibliographyCache | None = None
+) -> Tuple[Path, Path]:
     """
-    Load and concatenate LaTeX content from:
-      - a directory containing ADictML*expanded.tex files, OR
-      - a single .tex file (backwards compatible).
-
-    New naming convention: ADictML******expanded.tex
+    Run the full pipeline for one glossary entry:
+    TikZ -> image, entry -> .tex, pandoc -> raw md, then the Jekyll and Substack posts.
+    compile_figure=False assumes the image was already built (e.g. by compile_tikz_bulk).
+    pandoc_output is the already converted .tex (e.g. by convert_tex_batch);
+    the .tex is then taken as written and not generated again.
+    With a bib_cache, Pandoc only gets the bibliography entries the term cites.
+    Returns (jekyll_post_path, substack_post_path).
     """
-    p = Path(source).expanduser()
-
-    if p.is_file():
-        return p.read_text(encoding="utf-8")
-
-    if not p.is_dir():
-        raise FileNotFoundError(f"Glossary source not found: {p}")
-
-    files = sorted(p.glob("ADictML*expanded.tex"))
-    if not files:
-        files = sorted(p.glob("ADictML*Expanded.tex"))
-
-    if not files:
-        raise FileNotFoundError(
-            f"No expanded glossary files found in {p} matching ADictML*expanded.tex (or ADictML*Expanded.tex)."
+    with buildtrace.span("term", term=term):
+        slug = slug or term_slug(term)
+        post_date = post_date or date.today().isoformat()
+
+        # --- TikZ handling (optional) ---
+        with buildtrace.span("extract_tikz"):
+            tikz_code = extract_tikz_from_entry(entry_text)
+        image_rel_path = texfile_image_path(term, tikz_code, raster.image_format, image_url_prefix)
+        if tikz_code and compile_figure:
+            print(f"🔍 TikZ figure found in '{term}' – compiling to {raster.image_format.upper()}.")
+            result = compile_tikz_to_png(
+                tikz_code, term + "_tikz", output_dir=str(image_output_dir),
+                cache=cache, raster=raster, format_dir=format_dir
+            )
+            if not result.ok:
+                raise RuntimeError(f"TikZ compilation failed for '{term}': {result.error}")
+        elif not tikz_code:
+            print(f"ℹ️ No TikZ figure found in '{term}' – generating TeX without image.")
+
+        if pandoc_output is None:
+            with buildtrace.span("texfile"):
+                generate_texfile_with_image(
+                    term=term,
+                    description=entry_text,
+                    image_path=image_rel_path,
+                    output_dir=str(tex_output_dir)
+                )
+
+        # --- Convert TeX to Markdown blog post (raw) ---
+        tex_file = Path(tex_output_dir) / f"{term}.tex"
+        if bib_cache and pandoc_output is None:
+            bib_file = bib_cache.pruned(cited_keys(entry_text))
+        raw_md = blog_post_markdown(
+            tex_file=tex_file,
+            bib_file=bib_file,
+            title=f"Aalto Dictionary of ML – {term}",
+            seo_title=term,
+            seo_description=term,
+            post_date=post_date,
+            cache=cache,
+            pandoc_output=pandoc_output
         )
 
-    print(f"📚 Loading {len(files)} expanded glossary file(s) from: {p}")
-    combined = []
-    for f in files:
-        txt = f.read_text(encoding="utf-8")
-        combined.append(f"% --- BEGIN FILE: {f.name} ---\n{txt}\n% --- END FILE: {f.name} ---\n")
-    return "\n".join(combined)
-
-
-# ---------- Your existing post-processing helpers ----------
-
-def fix_latex_in_file(md_path: PathLike) -> None:
-    p = Path(md_path)
-    content = p.read_text(encoding="utf-8")
-    fixed = fix_latex_in_text(content)
-    p.write_text(fixed, encoding="utf-8")
-    print(f"✔ Fixed LaTeX math in: {md_path}")
-
+        if raw_md is None:
+            raise RuntimeError(f"Pandoc conversion failed for '{term}'; no markdown produced.")
 
-def remove_reference_blocks_and_headers(content: str) -> str:
-    lines = content.splitlines()
-    cleaned_lines = []
-
-    in_yaml_header = False
-    yaml_lines = []
-    i = 0
-
-    # Preserve front-matter block
-    if lines and lines[0].strip() == "---":
-        in_yaml_header = True
-        yaml_lines.append(lines[0])
-        i = 1
-        while i < len(lines):
-            yaml_lines.append(lines[i])
-            if lines[i].strip() == "---":
-                i += 1
-                break
-            i += 1
-
-    cleaned_lines.extend(yaml_lines)
-
-    # Skip bibliography block and handle references
-    skip_bib_block = False
-    for line in lines[i:]:
-        if line.strip() == "---" and not skip_bib_block:
-            skip_bib_block = True
-            continue
-        if skip_bib_block:
-            if line.strip().startswith("bibliography:"):
-                continue
-            elif line.strip() == "---":
-                skip_bib_block = False
-                continue
-            else:
-                continue
-
-        if re.match(r'^#\s+.+\{#.+\}', line):
-            continue
+        # Canonical Jekyll MD and Substack-ready MD, post-processed in memory (see mdpipeline)
+        os.makedirs(output_folder, exist_ok=True)
+        output_path, substack_path = write_posts(
+            raw_md,
+            Path(output_folder) / f"{post_date}-{slug}.md",
+            Path(output_folder) / f"{post_date}-{slug}_substack.md"
+        )
 
-        if line.strip() == ':::::: {#refs .references .csl-bib-body .hanging-indent entry-spacing="0"}':
-            cleaned_lines.append('**References**')
-            cleaned_lines.append('')
-            continue
+        return output_path, substack_path
 
-        if line.strip().startswith(":::"):
-            continue
 
-        cleaned_lines.append(line)
+def _init_publish_worker(scratch_root: str) -> None:
+    """
+    Give each pool worker its own scratch directory as working directory, so the
+    fixed intermediate files (figure.tex, temp_pandoc_output.md, ...) never collide.
+    """
+    os.chdir(tempfile.mkdtemp(prefix="worker-", dir=scratch_root))
+    buildtrace.drain()  # forked workers inherit the parent's events; report only their own
 
-    return "\n".join(cleaned_lines)
 
+@lru_cache(maxsize=None)
+def _worker_bib_cache(bib_file: str, cache_dir: str) -> BibliographyCache:
+    """
+    One BibliographyCache per process, so a worker decodes the parsed
+    bibliography once for all of its terms, not once per term.
+    """
+    return BibliographyCache(bib_file, cache_dir)
 
-def clean_markdown_file(input_path: Path, output_path: Path) -> None:
-    content = Path(input_path).read_text(encoding="utf-8")
-    content = remove_reference_blocks_and_headers(content)
-    Path(output_path).write_text(content, encoding="utf-8")
-    print(f"✅ Cleaned: {output_path.name}")
 
+def _publish_term_job(
+    kwargs: Dict,
+    cache_dir: str | None,
+    cache_max_bytes: int,
+    bib_cache_dir: str | None = None,
+    trace: bool = False
+) -> Tuple[Tuple[Path, Path], int, int, List[Dict]]:
+    """
+    Pool entry point: publish one term and report this job's cache hits/misses
+    and, with trace=True, its trace events.
+    """
+    buildtrace.enable(trace)
+    cache = BuildCache(cache_dir, cache_max_bytes) if cache_dir else None
+    bib_cache = _worker_bib_cache(kwargs["bib_file"], bib_cache_dir) if bib_cache_dir else None
+    paths = publish_term(**kwargs, cache=cache, bib_cache=bib_cache)
+    return paths, (cache.hits if cache else 0), (cache.misses if cache else 0), buildtrace.drain()
 
-def append_footer_to_markdown(md_path: PathLike) -> None:
-    footer = """
----
 
-📚 This explanation is part of the [Aalto Dictionary of Machine Learning](https://AaltoDictionaryofML.github.io) — 
-an open-access multi-lingual glossary developed at Aalto University to support 
-accessible and precise communication in ML.
-""".strip()
+def _evict_and_report(cache: BuildCache) -> None:
+    """
+    Enforce the cache's size limit (LRU) and print its hit/miss report.
+    """
+    removed = cache.evict()
+    if removed:
+        print(f"🧹 Evicted {removed} least recently used cache object(s).")
+    print(cache.report())
 
-    path = Path(md_path)
-    content = path.read_text(encoding="utf-8")
 
-    if "Aalto Dictionary of Machine Learning" not in content:
-        content = content.rstrip() + "\n\n" + footer + "\n"
-        path.write_text(content, encoding="utf-8")
-        print(f"✅ Footer added to: {md_path}")
-    else:
-        print(f"⚠️ Footer already present in: {md_path}")
+def _write_trace(trace_path: PathLike) -> None:
+    """
+    Write the collected trace events as a Chrome trace and print the summary table.
+    """
+    events = buildtrace.drain()
+    buildtrace.enable(False)
+    print(buildtrace.summary_table(events))
+    print(f"⏱️ Trace written to {buildtrace.write_chrome_trace(trace_path, events)} ({len(events)} events).")
 
 
-def remove_math_and_raw(text: str) -> str:
+def publish_glossary(
+    glossary: Dict[str, str],
+    bib_file: PathLike,
+    keys: Iterable[str] | None = None,
+    output_folder: PathLike = "../_posts",
+    image_output_dir: PathLike = "../images",
+    tex_output_dir: PathLike = "../",
+    post_date: str | None = None,
+    max_workers: int | None = None,
+    cache_dir: PathLike | None = None,
+    cache_max_bytes: int = DEFAULT_MAX_BYTES,
+    bulk_figures: bool = False,
+    raster: RasterOptions = RasterOptions(),
+    format_dir: PathLike | None = None,
+    pandoc_batch: bool = False,
+    pandoc_batch_size: int = DEFAULT_BATCH_SIZE,
+    prune_bibliography: bool = False,
+    trace_path: PathLike | None = None
+) -> Tuple[Dict[str, Tuple[Path, Path]], Dict[str, str]]:
     """
-    Remove LaTeX math and Jekyll raw tags from Markdown text.
-    Keeps all other Markdown content intact.
+    Publish many entries of an already parsed glossary (see parse_glossary).
+    keys=None publishes every entry. Terms are processed in a process pool,
+    each worker running in its own scratch directory.
+    With cache_dir, unchanged figures and Pandoc outputs are taken from the build cache.
+    bulk_figures=True compiles all TikZ figures up front in one pdflatex run.
+    format_dir enables the pre-compiled TikZ preamble format (see texformat).
+    pandoc_batch=True converts all .tex files up front with a few long-running
+    Pandoc processes (pandoc_batch_size files each) instead of one per term.
+    prune_bibliography=True parses bib_file once and hands each per-term Pandoc
+    run only the entries that term cites (see bibcache); batched runs already
+    parse the bibliography once per process.
+    trace_path records per-stage and per-term timings (see buildtrace), writes
+    them there as a Chrome trace and prints a summary.
+    Returns (published, failed): term -> (jekyll, substack) paths and term -> error message.
     """
-    text = re.sub(r"{%\s*raw\s*%}", "", text)
-    text = re.sub(r"{%\s*endraw\s*%}", "", text)
-    text = re.sub(r"{%.*?%}", "", text, flags=re.DOTALL)
-    text = re.sub(r"{{.*?}}", "", text, flags=re.DOTALL)
-
-    text = re.sub(r"\$\$(.*?)\$\$", "", text, flags=re.DOTALL)
-    text = re.sub(r"\\\[(.*?)\\\]", "", text, flags=re.DOTALL)
+    keys = list(glossary) if keys is None else list(keys)
+    missing = [k for k in keys if k not in glossary]
+    if missing:
+        raise KeyError(
+            f"Term(s) not found: {', '.join(missing)}. "
+            f"Parsed {len(glossary)} entries. Check key spelling / expanded sources."
+        )
 
-    envs = r"(equation\*?|align\*?|gather\*?|multline\*?|eqnarray\*?)"
-    text = re.sub(rf"\\begin\{{{envs}\}}.*?\\end\{{\1\}}", "", text, flags=re.DOTALL)
+    post_date = post_date or date.today().isoformat()
+    format_dir = str(Path(format_dir).resolve()) if format_dir else None
+    if trace_path:
+        buildtrace.enable()
+
+    # Workers change their working directory, so hand them absolute paths only.
+    jobs = {
+        term: dict(
+            term=term,
+            entry_text=glossary[term],
+            bib_file=str(Path(bib_file).resolve()),
+            output_folder=str(Path(output_folder).resolve()),
+            image_output_dir=str(Path(image_output_dir).resolve()),
+            tex_output_dir=str(Path(tex_output_dir).resolve()),
+            post_date=post_date,
+            compile_figure=not bulk_figures,
+            raster=raster,
+            format_dir=format_dir
+        )
+        for term in keys
+    }
+
+    cache = BuildCache(Path(cache_dir).resolve(), cache_max_bytes) if cache_dir else None
+    cache_root = str(cache.root) if cache else None
+
+    published: Dict[str, Tuple[Path, Path]] = {}
+    failed: Dict[str, str] = {}
+
+    if bulk_figures:
+        with buildtrace.span("bulk_figures"):
+            figure_results = compile_tikz_bulk(
+                glossary_figures(glossary, keys), str(image_output_dir),
+                cache=cache, max_workers=max_workers, raster=raster, format_dir=format_dir
+            )
+        for term in keys:
+            result = figure_results.get(f"{term}_tikz")
+            if result is not None and not result.ok:
+                failed[term] = f"TikZ compilation failed for '{term}': {result.error}"
+                print(f"❌ {term}: TikZ compilation failed")
+                del jobs[term]
+
+    with tempfile.TemporaryDirectory(prefix="makeblogpost-") as scratch_root:
+        bib_cache_dir = None
+        if prune_bibliography:
+            bib_cache_dir = str(Path(cache_dir).resolve() / "bibliography" if cache_dir else Path(scratch_root) / "bibliography")
+            with buildtrace.span("parse_bibliography"):
+                BibliographyCache(bib_file, bib_cache_dir).load()  # parse once, before the workers start
+
+        if pandoc_batch and jobs:
+            # The image path only depends on the term, so the .tex files can be written now;
+            # workers given a pandoc_output do not write them again.
+            tex_files = {}
+            for term, job in jobs.items():
+                image_rel_path = texfile_image_path(term, extract_tikz_from_entry(job["entry_text"]), raster.image_format)
+                generate_texfile_with_image(term, job["entry_text"], image_rel_path, job["tex_output_dir"])
+                tex_files[term] = Path(job["tex_output_dir"]) / f"{term}.tex"
+            with buildtrace.span("pandoc_batches"):
+                converted = convert_tex_batch(
+                    list(tex_files.values()), jobs[next(iter(jobs))]["bib_file"],
+                    Path(scratch_root) / "pandoc", batch_size=pandoc_batch_size,
+                    max_workers=max_workers, cache=cache
+                )
+            for term, tex_file in tex_files.items():
+                if tex_file in converted:
+                    jobs[term]["pandoc_output"] = str(converted[tex_file])
+
+        print(f"🚀 Publishing {len(jobs)} glossary entr{'y' if len(jobs) == 1 else 'ies'}.")
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_publish_worker,
+            initargs=(scratch_root,)
+        ) as pool:
+            futures = {
+                pool.submit(
+                    _publish_term_job, job, cache_root, cache_max_bytes, bib_cache_dir, buildtrace.is_enabled()
+                ): term
+                for term, job in jobs.items()
+            }
+            for fut in as_completed(futures):
+                term = futures[fut]
+                try:
+                    published[term], hits, misses, events = fut.result()
+                except Exception as e:
+                    failed[term] = str(e)
+                    print(f"❌ {term}: {e}")
+                    continue
+                buildtrace.record(events)
+                if cache:
+                    cache.hits += hits
+                    cache.misses += misses
+
+    print(f"✅ Published {len(published)} / {len(keys)} entries.")
+    if cache:
+        _evict_and_report(cache)
+    if trace_path:
+        _write_trace(trace_path)
+    return published, failed
+
+
+# ---------- Incremental publishing (build graph) ----------
+
+POST_NAME_RE = re.compile(r"(\d{4}-\d{2}-\d{2})-(.+)\.md")
+
+
+def existing_post_dates(output_folder: PathLike) -> Dict[str, str]:
+    """
+    slug -> date of its newest already published post (the directory is
+    listed once), so a rebuilt post keeps its date.
+    """
+    dates: Dict[str, str] = {}
+    folder = Path(output_folder)
+    if folder.is_dir():
+        for entry in os.scandir(folder):
+            m = POST_NAME_RE.fullmatch(entry.name)
+            if m and m.group(1) > dates.get(m.group(2), ""):
+                dates[m.group(2)] = m.group(1)
+    return dates
 
-    text = re.sub(r"\\\((.*?)\\\)", "", text, flags=re.DOTALL)
-    text = re.sub(r"(?<!\$)\$(?!\$)([^$]*?)(?<!\$)\$(?!\$)", "", text, flags=re.DOTALL)
 
-    text = re.sub(r"\\ensuremath\{.*?\}", "", text, flags=re.DOTALL)
+def _write_stage_output(src: Path, dest: Path, stages) -> None:
+    os.makedirs(dest.parent, exist_ok=True)
+    dest.write_text(run_stages(src.read_text(encoding="utf-8"), stages), encoding="utf-8")
 
-    text = re.sub(r"\n{3,}", "\n\n", text).strip()
-    return text
 
+def glossary_build_graph(
+    glossary: Dict[str, str],
+    bib_file: PathLike,
+    keys: Iterable[str] | None = None,
+    output_folder: PathLike = "../_posts",
+    image_output_dir: PathLike = "../images",
+    tex_output_dir: PathLike = "../",
+    build_dir: PathLike = "../.blogcache/build",
+    post_date: str | None = None,
+    image_url_prefix: str = IMAGE_URL_PREFIX,
+    cache: BuildCache | None = None,
+    raster: RasterOptions = RasterOptions(),
+    format_dir: str | None = None,
+    bib_cache: BibliographyCache | None = None
+) -> BuildGraph:
+    """
+    Build graph of the publishing pipeline, per term:
+    TikZ image -> .tex -> raw md (Pandoc) -> Jekyll md -> Substack md.
+    Each node hashes what it is built from (entry text, TikZ code and raster
+    options, cited bibliography entries, upstream outputs), so an edit to one
+    entry only makes that entry's nodes stale. Existing posts keep their date;
+    new posts get post_date.
+    """
+    post_date = post_date or date.today().isoformat()
+    build_dir = Path(build_dir).resolve()
+    graph = BuildGraph(build_dir / "build_state.json")
+    post_dates = existing_post_dates(output_folder)
+
+    for term in (glossary if keys is None else keys):
+        entry_text = glossary[term]
+        slug = term_slug(term)
+        term_date = post_dates.get(slug, post_date)
+        tex_file = Path(tex_output_dir) / f"{term}.tex"
+        raw_file = build_dir / "raw" / f"{term}.md"
+        jekyll_file = Path(output_folder) / f"{term_date}-{slug}.md"
+        substack_file = Path(output_folder) / f"{term_date}-{slug}_substack.md"
+
+        tex_deps = []
+        tikz_code = extract_tikz_from_entry(entry_text)
+        image_rel_path = texfile_image_path(term, tikz_code, raster.image_format, image_url_prefix)
+        if tikz_code:
+            image_file = Path(image_output_dir) / f"{term}_tikz.{raster.image_format}"
+
+            def build_image(tikz_code=tikz_code, term=term):
+                result = compile_tikz_to_png(
+                    tikz_code, term + "_tikz", output_dir=str(image_output_dir),
+                    cache=cache, raster=raster, format_dir=format_dir
+                )
+                if not result.ok:
+                    raise RuntimeError(f"TikZ compilation failed: {result.error}")
+
+            graph.add(BuildNode(
+                f"{term}:image", build_image, outputs=[image_file],
+                values=[tikz_standalone_document(tikz_code), raster.cache_tag()]
+            ))
+            tex_deps.append(f"{term}:image")
+
+        graph.add(BuildNode(
+            f"{term}:tex",
+            lambda term=term, entry_text=entry_text, image_rel_path=image_rel_path: generate_texfile_with_image(
+                term, entry_text, image_rel_path, str(tex_output_dir)
+            ),
+            outputs=[tex_file], deps=tex_deps, values=[entry_text, image_rel_path or ""]
+        ))
+
+        # The pruned .bib is only written when the node runs (not while planning a
+        # dry run); the node hashes the cited entries instead of the file.
+        cited = cited_keys(entry_text) if bib_cache else None
+        bib_digest = bib_cache.digest(cited) if bib_cache else None
+
+        def build_raw(term=term, tex_file=tex_file, cited=cited, term_date=term_date, raw_file=raw_file):
+            term_bib = bib_cache.pruned(cited) if bib_cache else bib_file
+            raw_md = blog_post_markdown(
+                tex_file, term_bib, f"Aalto Dictionary of ML – {term}", term, term, term_date, cache=cache
+            )
+            if raw_md is None:
+                raise RuntimeError("Pandoc conversion failed; no markdown produced.")
+            os.makedirs(raw_file.parent, exist_ok=True)
+            raw_file.write_text(raw_md, encoding="utf-8")
+
+        graph.add(BuildNode(
+            f"{term}:raw", build_raw, outputs=[raw_file], deps=[f"{term}:tex"],
+            files=[] if bib_digest else [bib_file], values=[term_date, bib_digest or ""]
+        ))
+        graph.add(BuildNode(
+            f"{term}:jekyll",
+            lambda src=raw_file, dest=jekyll_file: _write_stage_output(src, dest, JEKYLL_STAGES),
+            outputs=[jekyll_file], deps=[f"{term}:raw"]
+        ))
+        graph.add(BuildNode(
+            f"{term}:substack",
+            lambda src=jekyll_file, dest=substack_file: _write_stage_output(src, dest, SUBSTACK_STAGES),
+            outputs=[substack_file], deps=[f"{term}:jekyll"]
+        ))
+
+    return graph
+
+
+def publish_incremental(
+    glossary: Dict[str, str],
+    bib_file: PathLike,
+    keys: Iterable[str] | None = None,
+    output_folder: PathLike = "../_posts",
+    image_output_dir: PathLike = "../images",
+    tex_output_dir: PathLike = "../",
+    build_dir: PathLike = "../.blogcache/build",
+    post_date: str | None = None,
+    max_workers: int | None = None,
+    cache_dir: PathLike | None = None,
+    cache_max_bytes: int = DEFAULT_MAX_BYTES,
+    raster: RasterOptions = RasterOptions(),
+    format_dir: PathLike | None = None,
+    prune_bibliography: bool = False,
+    dry_run: bool = False,
+    trace_path: PathLike | None = None
+) -> BuildReport:
+    """
+    Bring the posts of the given entries (default: all) up to date, rebuilding
+    only stale nodes of glossary_build_graph(). dry_run=True only lists what
+    would be rebuilt, and why. trace_path as in publish_glossary.
+    """
+    missing = [k for k in (keys or []) if k not in glossary]
+    if missing:
+        raise KeyError(f"Term(s) not found: {', '.join(missing)}.")
+
+    cache = BuildCache(Path(cache_dir).resolve(), cache_max_bytes) if cache_dir else None
+    bib_cache = BibliographyCache(bib_file, Path(build_dir) / "bibliography") if prune_bibliography else None
+    graph = glossary_build_graph(
+        glossary, bib_file, keys, output_folder, image_output_dir, tex_output_dir, build_dir,
+        post_date=post_date, cache=cache, raster=raster,
+        format_dir=str(Path(format_dir).resolve()) if format_dir else None, bib_cache=bib_cache
+    )
 
-def make_substack_ready(md_in_path: PathLike, md_out_path: PathLike) -> None:
-    raw = Path(md_in_path).read_text(encoding="utf-8")
-    cleaned = remove_math_and_raw(raw)
-    Path(md_out_path).write_text(cleaned, encoding="utf-8")
+    if trace_path and not dry_run:
+        buildtrace.enable()
+    report = graph.build(max_workers=max_workers, dry_run=dry_run)
+    if dry_run:
+        for name, reason in report.planned.items():
+            print(f"🔎 would rebuild {name}: {reason}")
+        print(f"🔎 {len(report.planned)} of {len(graph.nodes)} build step(s) would run.")
+    else:
+        print(
+            f"✅ {len(report.rebuilt)} build step(s) rebuilt, {len(report.up_to_date)} up to date, "
+            f"{len(report.failed)} failed."
+        )
+        if cache:
+            _evict_and_report(cache)
+        if trace_path:
+            _write_trace(trace_path)
+    return report
 
 
 # ---------------- MAIN ----------------
@@ -482,76 +914,104 @@ if __name__ == "__main__":
     OUTPUT_FOLDER = "../_posts"
     IMAGE_OUTPUT_DIR = "../images"
     TEX_OUTPUT_DIR = "../"
+    CACHE_DIR = "../.blogcache"             # content-addressed build cache (None disables it)
+    TEX_FORMAT_DIR = "../.blogcache/formats"  # pre-compiled TikZ preamble (None disables it)
 
     # Choose a glossary key to post
     blog_sample_term = "spectraldecomp"     # e.g., "pmf", "spectraldecomp"
     slug = "Spectral-Decomposition"         # filename slug (avoid spaces)
 
-    heute = date.today().isoformat()
+    # Batch mode: list of keys, "all" for the whole dictionary, "changed" for the
+    # entries changed since the last publish, or "stale" to rebuild only the out-of-date
+    # steps via the build graph (None -> single term above)
+    BATCH_TERMS: List[str] | str | None = None
+    DRY_RUN = False                         # "stale" mode: only list what would be rebuilt
+    MAX_WORKERS = None                      # None -> one worker per CPU
+    BULK_FIGURES = True                     # batch mode: all TikZ figures in one pdflatex run
+    PANDOC_BATCH = True                     # batch mode: many .tex files per Pandoc process
+    PRUNE_BIBLIOGRAPHY = True               # give Pandoc only the cited bibliography entries
+    RASTER = RasterOptions(dpi=300, image_format="png", crop=False)
+    TRACE_FILE = None                       # batch mode: e.g. "../.blogcache/trace.json" (chrome://tracing)
 
-    # --- Load + parse expanded glossary files ---
-    content = load_expanded_glossary_sources(EXPANDED_SOURCES)
-    glossary = parse_glossary(content)
-
-    if blog_sample_term not in glossary:
-        raise KeyError(
-            f"Term '{blog_sample_term}' not found. "
-            f"Parsed {len(glossary)} entries. Check key spelling / expanded sources."
+    heute = date.today().isoformat()
+    buildtrace.enable(TRACE_FILE is not None)
+
+    if BATCH_TERMS == "changed":
+        # --- Only entries changed since the last publish, via the persistent index ---
+        index = GlossaryIndex(EXPANDED_SOURCES)
+        index.update()
+        changed = index.changed_since_publish()
+        print(f"🗂️ {len(changed)} entr{'y' if len(changed) == 1 else 'ies'} changed since the last publish.")
+        glossary = {key: index.lookup(key) for key in changed}
+        BATCH_TERMS = "all"
+    else:
+        # --- Stream + parse expanded glossary files ---
+        index = None
+        with buildtrace.span("parse_glossary"):
+            glossary = parse_glossary_sources(EXPANDED_SOURCES)
+
+    if BATCH_TERMS == "stale":
+        publish_incremental(
+            glossary,
+            bib_file=BIB_FILE,
+            output_folder=OUTPUT_FOLDER,
+            image_output_dir=IMAGE_OUTPUT_DIR,
+            tex_output_dir=TEX_OUTPUT_DIR,
+            build_dir=Path(CACHE_DIR or "../.blogcache") / "build",
+            post_date=heute,
+            max_workers=MAX_WORKERS,
+            cache_dir=CACHE_DIR,
+            raster=RASTER,
+            format_dir=TEX_FORMAT_DIR,
+            prune_bibliography=PRUNE_BIBLIOGRAPHY,
+            dry_run=DRY_RUN,
+            trace_path=TRACE_FILE
         )
-
-    entry_text = glossary[blog_sample_term]
-
-    # --- TikZ handling (optional) ---
-    tikz_code = extract_tikz_from_entry(entry_text)
-    if tikz_code:
-        print("🔍 TikZ figure found – compiling to PNG.")
-        compile_tikz_to_png(tikz_code, blog_sample_term + "_tikz", output_dir=IMAGE_OUTPUT_DIR)
-        image_rel_path = f"../images/{blog_sample_term}_tikz.png"
-        generate_texfile_with_image(
-            term=blog_sample_term,
-            description=entry_text,
-            image_path=image_rel_path,
-            output_dir=TEX_OUTPUT_DIR
+    elif BATCH_TERMS is not None:
+        published, failed = publish_glossary(
+            glossary,
+            bib_file=BIB_FILE,
+            keys=None if BATCH_TERMS == "all" else BATCH_TERMS,
+            output_folder=OUTPUT_FOLDER,
+            image_output_dir=IMAGE_OUTPUT_DIR,
+            tex_output_dir=TEX_OUTPUT_DIR,
+            post_date=heute,
+            max_workers=MAX_WORKERS,
+            cache_dir=CACHE_DIR,
+            bulk_figures=BULK_FIGURES,
+            raster=RASTER,
+            format_dir=TEX_FORMAT_DIR,
+            pandoc_batch=PANDOC_BATCH,
+            prune_bibliography=PRUNE_BIBLIOGRAPHY,
+            trace_path=TRACE_FILE
         )
+        if index is not None:
+            index.mark_published(published)
     else:
-        print("ℹ️ No TikZ figure found – generating TeX without image.")
-        generate_texfile_with_image(
-            term=blog_sample_term,
-            description=entry_text,
-            image_path=None,
-            output_dir=TEX_OUTPUT_DIR
+        if blog_sample_term not in glossary:
+            raise KeyError(
+                f"Term '{blog_sample_term}' not found. "
+                f"Parsed {len(glossary)} entries. Check key spelling / expanded sources."
+            )
+
+        cache = BuildCache(CACHE_DIR) if CACHE_DIR else None
+        output_path, substack_path = publish_term(
+            blog_sample_term,
+            glossary[blog_sample_term],
+            bib_file=BIB_FILE,
+            output_folder=OUTPUT_FOLDER,
+            image_output_dir=IMAGE_OUTPUT_DIR,
+            tex_output_dir=TEX_OUTPUT_DIR,
+            slug=slug,
+            post_date=heute,
+            cache=cache,
+            raster=RASTER,
+            format_dir=TEX_FORMAT_DIR,
+            bib_cache=BibliographyCache(BIB_FILE, Path(CACHE_DIR) / "bibliography")
+            if PRUNE_BIBLIOGRAPHY and CACHE_DIR else None
         )
 
-    # --- Convert TeX to Markdown blog post (raw) ---
-    tex_file = Path(TEX_OUTPUT_DIR) / f"{blog_sample_term}.tex"
-    mdfilename = generate_blog_post(
-        tex_file=tex_file,
-        bib_file=BIB_FILE,
-        post_slug=slug,
-        post_date=heute,
-        title=f"Aalto Dictionary of ML – {blog_sample_term}",
-        seo_title=blog_sample_term,
-        seo_description=blog_sample_term,
-        output_dir=OUTPUT_FOLDER
-    )
-
-    if mdfilename is None:
-        raise RuntimeError("Pandoc conversion failed; no markdown produced.")
-
-    # Paths for canonical Jekyll MD and Substack-ready MD
-    output_path = Path(OUTPUT_FOLDER) / f"{heute}-{slug}.md"
-    substack_path = Path(OUTPUT_FOLDER) / f"{heute}-{slug}_substack.md"
-
-    # Protect LaTeX from Jekyll/Liquid, then clean for Jekyll
-    fix_latex_in_file(mdfilename)
-    clean_markdown_file(Path(mdfilename), output_path)
-    append_footer_to_markdown(output_path)
-
-    # Remove raw temp file
-    Path(mdfilename).unlink(missing_ok=True)
-
-    # Produce Substack-ready twin
-    make_substack_ready(output_path, substack_path)
-
-    print(f"✅ Jekyll post:     {output_path}")
-    print(f"✅ Substack-ready:  {substack_path}")
+        print(f"✅ Jekyll post:     {output_path}")
+        print(f"✅ Substack-ready:  {substack_path}")
+        if cache:
+            _evict_and_report(cache)
@@ -15,9 +15,19 @@ mpl.rcParams['legend.fontsize'] = 25  # Legend font size
 mpl.rcParams['xtick.labelsize'] = 25  # X-axis tick label size
 mpl.rcParams['ytick.labelsize'] = 25  # Y-axis tick label size
 
-# Load the data from the CSV file
+# Load the data from the CSV file, or from a local observation store
+# (obsstore.py) holding the daily tmin/tmax of Kustavi Isokari (fmisid 100908)
 file_path = "KustaviIsokari.csv"  # Replace with the actual file path
-data = pd.read_csv(file_path)
+store_path = None  # e.g. "fmi_store"
+if store_path is not None:
+    from obsstore import ObservationStore
+    data = (
+        ObservationStore(store_path).frame([100908], ["tmax", "tmin"])
+        .pivot(index="time", columns="parameter", values="value").dropna()
+        .rename(columns={"tmax": "Maximum temperature [°C]", "tmin": "Minimum temperature [°C]"})
+    )
+else:
+    data = pd.read_csv(file_path)
 
 # Extract relevant columns
 data = data[["Maximum temperature [°C]", "Minimum temperature [°C]"]]
@@ -16,6 +16,8 @@ import numpy as np
 import pandas as pd
 from scipy.spatial.distance import cdist
 
+from fmiframe import observation_frame, station_table
+
 
 
 # Rounded polygon vertices
@@ -61,29 +63,17 @@ obs = download_stored_query("fmi::observations::weather::multipointcoverage",
                                   "endtime=" + end_time,
                                   "timeseries=True"])
 
-# Extract latitude, longitude, and fmisid
-latitudes = []
-longitudes = []
-fmisids = []
-stationname=[]
-
-
-for station in obs.data.keys():
-    metadata = obs.location_metadata.get(station, {})
-    lat = metadata.get("latitude")
-    lon = metadata.get("longitude")
-    fmisid = metadata.get("fmisid")
-    
-
-    if lat is not None and lon is not None:
-        latitudes.append(lat)
-        longitudes.append(lon)
-        fmisids.append(fmisid)
-        stationname.append(station)
-
+# All observations as one long table (station, fmisid, lat, lon, time,
+# parameter, value, unit) and one row per station with a known position
+df = observation_frame(obs)
+stations = station_table(obs).dropna(subset=["lat", "lon"]).reset_index(drop=True)
+latitudes = stations["lat"].to_numpy()
+longitudes = stations["lon"].to_numpy()
+fmisids = stations["fmisid"].to_numpy()
+stationname = stations["station"].to_numpy()
 
-# Combine latitudes and longitudes into a single array for clustering
-coordinates = np.array(list(zip(latitudes, longitudes)))
+# Latitudes and longitudes as a single array for clustering
+coordinates = stations[["lat", "lon"]].to_numpy()
 
 # Define the number of clusters based on the sample size (20% of stations)
 sample_size = int(len(coordinates) * 0.1)
@@ -122,7 +112,8 @@ sample_stationname = [stationname[i] for i in sample_indices]
 for station in obs.data.keys(): 
     print(obs.location_metadata[station])
 
-formatted_dates = [dt.strftime('%Y-%m-%d %H:%M:%S') for dt in obs.data['Kustavi Isokari']['times']]
+isokari = df[df["station"] == "Kustavi Isokari"]
+times = isokari["time"].unique()   # datetime64, formatted only when printed
 
 
 plt.figure(figsize=(10, 8))
@@ -142,13 +133,12 @@ plt.show()
 
 
 
-#print(formatted_dates)
+#print(np.datetime_as_string(times, unit="s"))
 
-# The times are as a list of datetime objects
-times = obs.data['Kustavi Isokari']['times']
-# Other data fields have another extra level, one for values and one for the unit
-print(len(obs.data['Kustavi Isokari']['Air temperature']['values']))
+# One row per time and parameter, with the unit of every value
+air_temperature = isokari[isokari["parameter"] == "Air temperature"]
+print(len(air_temperature))
 # -> 71
-print(obs.data['Kustavi Isokari']['Air temperature'])
-# -> 'degC'
+print(air_temperature[["time", "value", "unit"]])
+# -> unit 'degC'
 
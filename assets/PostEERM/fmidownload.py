@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Download long periods of FMI observations over large areas.
+
+The FMI WFS limits every observation query (one week per request for
+the weather stored queries, and a cap on the number of values), so a
+single window over all of Finland for months of history fails or crawls.
+download_observations() splits the period into windows of at most
+max_hours and the bbox into tiles of at most max_degrees, fetches the
+tiles concurrently through one fmiwfs.FMIClient (max_concurrency
+requests in flight) and merges them into one list sorted by time,
+station and parameter. Observations that two tiles share (window ends
+are inclusive; stations on a tile edge fall into both tiles) are kept
+once.
+
+    python fmidownload.py 2024-09-01T00:00:00Z 2024-12-01T00:00:00Z 19,59.859,32.035,70.170 obs.csv
+
+wfsstandin.MockObservations answers such tiled queries offline.
+"""
+
+import csv
+import math
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from typing import Union, Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+from fmiwfs import FMIClient, StationObservation
+
+PathLike = Union[str, Path]
+BBox = Tuple[float, float, float, float]   # lon_min, lat_min, lon_max, lat_max (EPSG:4326)
+
+MULTIPOINT_QUERY = "fmi::observations::weather::multipointcoverage"
+MAX_HOURS = 168          # FMI limit for a weather observation query
+FINLAND_BBOX: BBox = (19.0, 59.859, 32.035, 70.170)
+
+
+class Tile(NamedTuple):
+    start: datetime
+    end: datetime
+    bbox: BBox | None    # None: no bbox (e.g. queries by fmisid)
+
+    def params(self) -> Dict[str, str]:
+        params = {"starttime": iso_time(self.start), "endtime": iso_time(self.end)}
+        if self.bbox is not None:
+            params["bbox"] = ",".join(f"{x:g}" for x in self.bbox)
+        return params
+
+
+def iso_time(t: datetime) -> str:
+    return t.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_time(text: str) -> datetime:
+    t = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    return t if t.tzinfo else t.replace(tzinfo=timezone.utc)
+
+
+def time_windows(start: datetime, end: datetime, max_hours: float = MAX_HOURS) -> List[Tuple[datetime, datetime]]:
+    """
+    Consecutive windows of at most max_hours covering [start, end]; each
+    window starts where the previous one ends.
+    """
+    if end <= start:
+        raise ValueError(f"Empty period: {iso_time(start)} .. {iso_time(end)}")
+    step = timedelta(hours=max_hours)
+    windows = []
+    while start < end:
+        windows.append((start, min(start + step, end)))
+        start += step
+    return windows
+
+
+def bbox_tiles(bbox: BBox | None, max_degrees: float | None = None) -> List[BBox | None]:
+    """
+    Split bbox into a grid of tiles at most max_degrees wide and high
+    (None: the bbox as one tile). Neighbouring tiles share their edge.
+    """
+    if bbox is None:
+        return [None]
+    lon0, lat0, lon1, lat1 = bbox
+    if lon1 <= lon0 or lat1 <= lat0:
+        raise ValueError(f"Empty bbox: {bbox}")
+    if not max_degrees:
+        return [bbox]
+    nx, ny = math.ceil((lon1 - lon0) / max_degrees), math.ceil((lat1 - lat0) / max_degrees)
+    dx, dy = (lon1 - lon0) / nx, (lat1 - lat0) / ny
+    return [
+        (round(lon0 + i * dx, 6), round(lat0 + j * dy, 6),
+         lon1 if i == nx - 1 else round(lon0 + (i + 1) * dx, 6), lat1 if j == ny - 1 else round(lat0 + (j + 1) * dy, 6))
+        for j in range(ny) for i in range(nx)
+    ]
+
+
+def plan_tiles(
+    start: datetime,
+    end: datetime,
+    bbox: BBox | None = FINLAND_BBOX,
+    max_hours: float = MAX_HOURS,
+    max_degrees: float | None = None
+) -> List[Tile]:
+    return [Tile(s, e, b) for s, e in time_windows(start, end, max_hours) for b in bbox_tiles(bbox, max_degrees)]
+
+
+def merge_observations(chunks: Iterable[Iterable[StationObservation]]) -> List[StationObservation]:
+    """
+    One list sorted by (time, station, parameter); observations of the same
+    station, time and parameter from several tiles are kept once.
+    """
+    merged: Dict[Tuple, StationObservation] = {}
+    for chunk in chunks:
+        for obs in chunk:
+            merged.setdefault((obs.time, obs.fmisid, obs.lat, obs.lon, obs.parameter), obs)
+    return [merged[key] for key in sorted(merged)]
+
+
+def download_observations(
+    client: FMIClient,
+    start: datetime,
+    end: datetime,
+    bbox: BBox | None = FINLAND_BBOX,
+    stored_query_id: str = MULTIPOINT_QUERY,
+    max_hours: float = MAX_HOURS,
+    max_degrees: float | None = None,
+    max_concurrency: int | None = None,
+    **params
+) -> List[StationObservation]:
+    """
+    Observations of a multipointcoverage stored query for [start, end] in
+    bbox (None: no bbox, e.g. with fmisid=...), fetched tile by tile (see
+    plan_tiles) with up to max_concurrency (default: the client's)
+    concurrent requests. Extra params (e.g. parameters="t2m,ws_10min",
+    timestep=10) go to every request.
+    A tile whose response breaks off midway is fetched again (see
+    FMIClient.collect); one that still fails after the client's retries
+    raises fmiwfs.FMIError.
+    """
+    tiles = plan_tiles(start, end, bbox, max_hours, max_degrees)
+    print(f"📥 Fetching {len(tiles)} tile(s) for {iso_time(start)} .. {iso_time(end)}.")
+
+    def fetch(tile: Tile) -> List[StationObservation]:
+        return client.collect(lambda: client.multipoint_observations(stored_query_id, **tile.params(), **params))
+
+    observations = merge_observations(client.map(fetch, tiles, max_workers=max_concurrency))
+    print(f"✅ {len(observations)} observation(s) after merging.")
+    return observations
+
+
+def write_csv(observations: Sequence[StationObservation], path: PathLike) -> Path:
+    path = Path(path)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(StationObservation._fields)
+        writer.writerows(observations)
+    return path
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Download FMI weather observations in tiles.")
+    parser.add_argument("start", help="e.g. 2024-09-01T00:00:00Z")
+    parser.add_argument("end", help="e.g. 2024-12-01T00:00:00Z")
+    parser.add_argument("bbox", nargs="?", default=",".join(map(str, FINLAND_BBOX)), help="lon_min,lat_min,lon_max,lat_max")
+    parser.add_argument("output", nargs="?", default="observations.csv")
+    parser.add_argument("--max-hours", type=float, default=MAX_HOURS, help="time window per request")
+    parser.add_argument("--max-degrees", type=float, default=None, help="bbox tile size (default: whole bbox)")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight")
+    parser.add_argument("--parameters", default=None, help="e.g. t2m,ws_10min (default: the query's own)")
+    args = parser.parse_args(argv)
+
+    bbox = tuple(float(x) for x in args.bbox.split(","))
+    with FMIClient(max_concurrency=args.concurrency) as client:
+        observations = download_observations(
+            client, parse_time(args.start), parse_time(args.end), bbox,
+            max_hours=args.max_hours, max_degrees=args.max_degrees, parameters=args.parameters
+        )
+    print(f"💾 Written to {write_csv(observations, args.output)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Columnar views of fmiopendata multipoint coverage results.
+
+download_stored_query(..., args=[..., "timeseries=True"]) returns
+
+    obs.data[station]["times"]                 list of datetime (UTC)
+    obs.data[station][parameter]["values"]     list of float (NaN = missing)
+    obs.data[station][parameter]["unit"]       e.g. "degC"
+    obs.location_metadata[station]             {"fmisid", "latitude", "longitude"}
+
+observation_arrays() turns all of it into one long table of NumPy
+columns in a single pass. The output arrays are allocated once at their
+final size and every value list is copied exactly once, straight into
+its slice. Station, parameter and unit are stored as small integer
+codes into name tables, so no string is repeated per row. The per-row
+fmisid, lat and lon are gathered from the station table with one index
+operation each. Times stay datetime64.
+
+    obs = download_stored_query("fmi::observations::weather::multipointcoverage", args=[...])
+    df = observation_frame(obs)          # station, fmisid, lat, lon, time, parameter, value, unit
+    stations = station_table(obs)        # one row per station
+"""
+
+from typing import Dict, NamedTuple
+
+import numpy as np
+
+TIME_UNIT = "datetime64[s]"
+
+
+class ObservationArrays(NamedTuple):
+    station_code: np.ndarray     # int32 index into stations
+    fmisid: np.ndarray           # int64 (-1: unknown)
+    lat: np.ndarray              # float64
+    lon: np.ndarray              # float64
+    time: np.ndarray             # datetime64[s], UTC
+    parameter_code: np.ndarray   # int32 index into parameters / units
+    value: np.ndarray            # float64 (NaN = missing)
+    stations: np.ndarray         # station names
+    parameters: np.ndarray       # parameter names
+    units: np.ndarray            # unit of each parameter
+
+    @property
+    def station(self) -> np.ndarray:
+        return self.stations[self.station_code]
+
+    @property
+    def parameter(self) -> np.ndarray:
+        return self.parameters[self.parameter_code]
+
+    @property
+    def unit(self) -> np.ndarray:
+        return self.units[self.parameter_code]
+
+
+def _datetime64(times) -> np.ndarray:
+    # pandas parses a list of datetime objects ~15x faster than np.array(..., "datetime64").
+    import pandas as pd
+
+    return pd.DatetimeIndex(times).to_numpy().astype(TIME_UNIT)
+
+
+def station_arrays(obs) -> Dict[str, np.ndarray]:
+    """
+    station, fmisid, lat, lon of every station in obs.data (in that order;
+    NaN / -1 where obs.location_metadata has no entry).
+    """
+    names = list(obs.data)
+    meta = [obs.location_metadata.get(name, {}) for name in names]
+    return {
+        "station": np.array(names, dtype=object),
+        "fmisid": np.array([int(m.get("fmisid") or -1) for m in meta], dtype=np.int64),
+        "lat": np.array([m.get("latitude", np.nan) for m in meta], dtype=np.float64),
+        "lon": np.array([m.get("longitude", np.nan) for m in meta], dtype=np.float64),
+    }
+
+
+def observation_arrays(obs) -> ObservationArrays:
+    """
+    Long-format columns of a timeseries=True multipoint coverage result:
+    one row per (station, time, parameter).
+    """
+    stations = station_arrays(obs)
+    parameters: Dict[str, int] = {}
+    units: list = []
+
+    # Sizes first, so every column is allocated once at its final length.
+    n_rows = 0
+    for name in stations["station"]:
+        series = obs.data[name]
+        n_times = len(series["times"])
+        for parameter, field in series.items():
+            if parameter == "times":
+                continue
+            if len(field["values"]) != n_times:
+                raise ValueError(f"{name}/{parameter}: {len(field['values'])} values for {n_times} times")
+            if parameter not in parameters:
+                parameters[parameter] = len(parameters)
+                units.append(field.get("unit", ""))
+            n_rows += n_times
+
+    station_code = np.empty(n_rows, np.int32)
+    time = np.empty(n_rows, TIME_UNIT)
+    parameter_code = np.empty(n_rows, np.int32)
+    value = np.empty(n_rows, np.float64)
+
+    row = 0
+    for i, name in enumerate(stations["station"]):
+        series = obs.data[name]
+        times = _datetime64(series["times"])
+        for parameter, field in series.items():
+            if parameter == "times":
+                continue
+            end = row + len(times)
+            station_code[row:end] = i
+            time[row:end] = times
+            parameter_code[row:end] = parameters[parameter]
+            value[row:end] = field["values"]
+            row = end
+
+    return ObservationArrays(
+        station_code=station_code,
+        fmisid=stations["fmisid"][station_code],
+        lat=stations["lat"][station_code],
+        lon=stations["lon"][station_code],
+        time=time,
+        parameter_code=parameter_code,
+        value=value,
+        stations=stations["station"],
+        parameters=np.array(list(parameters), dtype=object),
+        units=np.array(units, dtype=object),
+    )
+
+
+def observation_frame(obs):
+    """
+    pandas DataFrame (station, fmisid, lat, lon, time, parameter, value, unit)
+    of observation_arrays(obs); station, parameter and unit are categoricals
+    over the code arrays, so the name strings are not repeated per row.
+    """
+    import pandas as pd
+
+    arrays = observation_arrays(obs)
+    unit_names, unit_of_parameter = np.unique(arrays.units.astype(str), return_inverse=True)
+    return pd.DataFrame({
+        "station": pd.Categorical.from_codes(arrays.station_code, categories=pd.Index(arrays.stations)),
+        "fmisid": arrays.fmisid,
+        "lat": arrays.lat,
+        "lon": arrays.lon,
+        "time": arrays.time,
+        "parameter": pd.Categorical.from_codes(arrays.parameter_code, categories=pd.Index(arrays.parameters)),
+        "value": arrays.value,
+        "unit": pd.Categorical.from_codes(unit_of_parameter[arrays.parameter_code], categories=pd.Index(unit_names)),
+    }, copy=False)
+
+
+def station_table(obs):
+    """
+    pandas DataFrame (station, fmisid, lat, lon) with one row per station.
+    """
+    import pandas as pd
+
+    return pd.DataFrame(station_arrays(obs))
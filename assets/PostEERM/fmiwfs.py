@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Client for the FMI open data WFS (https://opendata.fmi.fi/wfs).
+
+One FMIClient keeps a pooled requests.Session, so repeated queries reuse
+their HTTPS connections. At most max_concurrency requests are in flight
+at once (also when several threads share the client), and failed requests
+(connection errors, timeouts, 429 and 5xx answers, bodies that break off
+while they are read) are retried with exponential backoff, honouring
+Retry-After.
+
+GetFeature responses are parsed incrementally with ElementTree.iterparse
+straight from the socket: every feature is handed out as soon as it has
+been read and then dropped, so large responses are never held in memory
+as a whole, neither as text nor as a tree.
+
+    client = FMIClient()
+    for obs in client.simple_observations(
+        "fmi::observations::weather::simple",
+        place="Kustavi Isokari", starttime="2024-11-01T00:00:00Z", endtime="2024-11-02T00:00:00Z",
+    ):
+        print(obs.time, obs.parameter, obs.value)
+
+base_url can point at a local stand-in server (see wfsstandin.py) that
+serves recorded responses.
+"""
+
+import random
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Union, Callable, Dict, Iterable, Iterator, List, NamedTuple, Tuple, TypeVar
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+PathLike = Union[str, Path]
+T = TypeVar("T")
+R = TypeVar("R")
+
+FMI_WFS_URL = "https://opendata.fmi.fi/wfs"
+
+NS = {
+    "wfs": "http://www.opengis.net/wfs/2.0",
+    "gml": "http://www.opengis.net/gml/3.2",
+    "BsWfs": "http://xml.fmi.fi/schema/wfs/2.0",
+    "ows": "http://www.opengis.net/ows/1.1",
+}
+MEMBER_TAG = f"{{{NS['wfs']}}}member"
+SIMPLE_ELEMENT_TAG = f"{{{NS['BsWfs']}}}BsWfsElement"
+LOCATION_TAG = f"{{{NS['BsWfs']}}}Location"
+TIME_TAG = f"{{{NS['BsWfs']}}}Time"
+NAME_TAG = f"{{{NS['BsWfs']}}}ParameterName"
+VALUE_TAG = f"{{{NS['BsWfs']}}}ParameterValue"
+POS_PATH = f"{{{NS['gml']}}}Point/{{{NS['gml']}}}pos"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# A response body that breaks off (connection reset, read timeout, truncated XML)
+STREAM_ERRORS = (requests.RequestException, urllib3.exceptions.HTTPError, ConnectionError, TimeoutError, ET.ParseError)
+CHUNK_SIZE = 64 * 1024
+
+
+class FMIError(RuntimeError):
+    """
+    The WFS answered with an error (usually an OWS ExceptionReport).
+    """
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+
+class FMIStreamError(FMIError):
+    """
+    A streamed response broke off after part of it had been handed out, so
+    the request cannot be retried transparently (see FMIClient.collect).
+    """
+
+
+class SimpleObservation(NamedTuple):
+    """
+    One value of a "simple" stored query (BsWfs:BsWfsElement).
+    """
+    time: str          # ISO 8601, UTC ("2024-11-01T00:00:00Z")
+    lat: float
+    lon: float
+    parameter: str
+    value: float       # NaN for missing values
+
+
+def _exception_text(body: bytes) -> str:
+    """
+    The ExceptionText lines of an OWS ExceptionReport, or the start of the body.
+    """
+    try:
+        root = ET.fromstring(body)
+    except ET.ParseError:
+        return body[:500].decode("utf-8", "replace").strip()
+    texts = [t.text.strip() for t in root.iter(f"{{{NS['ows']}}}ExceptionText") if t.text and t.text.strip()]
+    return " ".join(texts) or body[:500].decode("utf-8", "replace").strip()
+
+
+def _retry_after(response: requests.Response | None) -> float | None:
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+class StationObservation(NamedTuple):
+    """
+    One value of a "multipointcoverage" stored query.
+    """
+    time: int          # seconds since the epoch, UTC
+    fmisid: int        # -1 if the response names no FMI station id
+    station: str
+    lat: float
+    lon: float
+    parameter: str
+    value: float       # NaN for missing values
+
+
+def _local(tag: str) -> str:
+    return tag.rpartition("}")[2]
+
+
+def _multipoint_member(member: ET.Element) -> Iterator[StationObservation]:
+    """
+    Observations of one wfs:member of a MultiPointCoverage response: the
+    station list (target:Location -> gml:Point), the field names
+    (swe:field), the (lat, lon, epoch) positions and one row of values per position.
+    """
+    gml_id = f"{{{NS['gml']}}}id"
+    href = "{http://www.w3.org/1999/xlink}href"
+    point_station: Dict[str, Tuple[int, str]] = {}
+    point_pos: Dict[str, Tuple[float, float]] = {}
+    fields: List[str] = []
+    positions: List[str] = []
+    values: List[str] = []
+
+    for elem in member.iter():
+        name = _local(elem.tag)
+        if name == "Location":
+            fmisid, station, point = -1, "", None
+            for child in elem:
+                child_name, code_space = _local(child.tag), child.get("codeSpace", "")
+                if child_name == "identifier" and code_space.endswith("fmisid"):
+                    fmisid = int(child.text)
+                elif child_name == "name" and code_space.endswith("/name") and not station:
+                    station = (child.text or "").strip()
+                elif child_name == "representativePoint":
+                    point = child.get(href, "").lstrip("#")
+            if point:
+                point_station[point] = (fmisid, station)
+        elif name == "Point" and elem.get(gml_id):
+            pos = elem.findtext(f"{{{NS['gml']}}}pos", "").split()
+            if len(pos) >= 2:
+                point_pos[elem.get(gml_id)] = (float(pos[0]), float(pos[1]))
+        elif name == "field" and elem.get("name"):
+            fields.append(elem.get("name"))
+        elif name == "positions":
+            positions = (elem.text or "").split()
+        elif name == "doubleOrNilReasonTupleList":
+            values = (elem.text or "").split()
+
+    stations = {point_pos[p]: station for p, station in point_station.items() if p in point_pos}
+    n_fields = len(fields)
+    for row in range(len(positions) // 3):
+        lat, lon = float(positions[3 * row]), float(positions[3 * row + 1])
+        epoch = int(positions[3 * row + 2])
+        fmisid, station = stations.get((lat, lon), (-1, ""))
+        for i, parameter in enumerate(fields):
+            value = values[row * n_fields + i]
+            yield StationObservation(epoch, fmisid, station, lat, lon, parameter, float(value))
+
+
+class FMIClient:
+    """
+    Pooled, retrying, streaming WFS client. Thread-safe; share one per process.
+    """
+
+    def __init__(
+        self,
+        base_url: str = FMI_WFS_URL,
+        max_concurrency: int = 4,
+        retries: int = 4,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        timeout: float | tuple = (10, 120),
+        session: requests.Session | None = None
+    ):
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "FMIClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---------- requests ----------
+
+    @staticmethod
+    def get_feature_params(stored_query_id: str | None = None, **params) -> Dict[str, str]:
+        """
+        Query parameters of a WFS 2.0 GetFeature request (values given as str/num).
+        """
+        query = {"service": "WFS", "version": "2.0.0", "request": "GetFeature"}
+        if stored_query_id:
+            query["storedquery_id"] = stored_query_id
+        query.update((k, str(v)) for k, v in params.items() if v is not None)
+        return query
+
+    def _delay(self, attempt: int, response: requests.Response | None) -> float:
+        delay = _retry_after(response)
+        if delay is None:
+            delay = self.backoff * 2 ** attempt * (0.5 + random.random())  # +-50% jitter
+        return min(delay, self.max_backoff)
+
+    def _retry(self, attempt: int, error: str, response: requests.Response | None = None) -> int:
+        """
+        Wait before the next attempt (raise FMIError once retries are used up);
+        returns the next attempt number.
+        """
+        if attempt == self.retries:
+            raise FMIError(f"WFS request failed after {attempt + 1} attempt(s): {error}")
+        delay = self._delay(attempt, response)
+        attempt += 1
+        print(f"⚠️ FMI WFS request failed ({error}); retry {attempt}/{self.retries} in {delay:.1f} s")
+        time.sleep(delay)
+        return attempt
+
+    def _open(self, params: Dict[str, str], attempt: int = 0) -> Tuple[requests.Response, int]:
+        """
+        Send the request (with retries, counting on from attempt) and return the
+        streamed 200 response and the attempt it took.
+        """
+        while True:
+            response = None
+            try:
+                response = self.session.get(self.base_url, params=params, timeout=self.timeout, stream=True)
+                if response.status_code == 200:
+                    return response, attempt
+                body = response.content
+                response.close()
+                if response.status_code not in RETRY_STATUSES:
+                    raise FMIError(f"WFS error {response.status_code}: {_exception_text(body)}", response.status_code)
+                error = f"HTTP {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = type(e).__name__
+            attempt = self._retry(attempt, error, response)
+
+    def iter_elements(self, params: Dict[str, str], tag: str = MEMBER_TAG) -> Iterator[ET.Element]:
+        """
+        Stream the response and yield every element with the given (namespaced)
+        tag once it has been parsed completely. Each element is cleared after
+        it was handed out, so keep what you need, not the element. The request
+        holds one of the max_concurrency slots until the generator is exhausted
+        or closed. A body that breaks off is requested again as long as nothing
+        has been yielded; afterwards FMIStreamError is raised.
+        """
+        attempt, yielded = 0, False
+        with self._slots:
+            while True:
+                response, attempt = self._open(params, attempt)
+                root = None
+                try:
+                    response.raw.decode_content = True   # transparently gunzip
+                    for event, elem in ET.iterparse(response.raw, events=("start", "end")):
+                        if root is None:
+                            root = elem
+                        elif event == "end" and elem.tag == tag:
+                            yielded = True
+                            yield elem
+                            elem.clear()
+                            root.clear()   # drop the references to already handled siblings
+                    break
+                except STREAM_ERRORS as e:
+                    if yielded:
+                        raise FMIStreamError(f"WFS response broke off midway: {type(e).__name__}: {e}") from e
+                    error = f"{type(e).__name__} while reading the response"
+                finally:
+                    response.close()
+                attempt = self._retry(attempt, error)
+        if root is not None and root.tag == f"{{{NS['ows']}}}ExceptionReport":
+            raise FMIError(f"WFS error: {_exception_text(ET.tostring(root))}")
+
+    def download(self, params: Dict[str, str], path: PathLike) -> Path:
+        """
+        Save the raw response to path (written to a .part file, then renamed).
+        A body that breaks off is downloaded again from the start.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".part")
+        attempt = 0
+        try:
+            with self._slots:
+                while True:
+                    response, attempt = self._open(params, attempt)
+                    try:
+                        with open(tmp, "wb") as f:
+                            for chunk in response.iter_content(CHUNK_SIZE):
+                                f.write(chunk)
+                        break
+                    except STREAM_ERRORS as e:
+                        error = f"{type(e).__name__} while reading the response"
+                    finally:
+                        response.close()
+                    attempt = self._retry(attempt, error)
+            tmp.replace(path)
+        finally:
+            tmp.unlink(missing_ok=True)
+        return path
+
+    def collect(self, stream: Callable[[], Iterable[T]]) -> List[T]:
+        """
+        list(stream()), started over (with backoff) if the response breaks off
+        after part of it was read, e.g.
+        client.collect(lambda: client.multipoint_observations(query, **params)).
+        """
+        attempt = 0
+        while True:
+            try:
+                return list(stream())
+            except FMIStreamError as e:
+                attempt = self._retry(attempt, str(e))
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T], max_workers: int | None = None) -> Iterator[R]:
+        """
+        Run fn over items in up to max_workers (default: max_concurrency)
+        threads; results in input order.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers or self.max_concurrency) as pool:
+            yield from pool.map(fn, items)
+
+    # ---------- stored queries ----------
+
+    def simple_observations(self, stored_query_id: str, **params) -> Iterator[SimpleObservation]:
+        """
+        Stream the BsWfsElements of a "...::simple" stored query.
+        """
+        for elem in self.iter_elements(self.get_feature_params(stored_query_id, **params), SIMPLE_ELEMENT_TAG):
+            fields = {child.tag: child for child in elem}
+            pos = fields[LOCATION_TAG].findtext(POS_PATH, "").split() if LOCATION_TAG in fields else []
+            value = (fields[VALUE_TAG].text or "").strip() if VALUE_TAG in fields else ""
+            yield SimpleObservation(
+                (fields[TIME_TAG].text or "").strip() if TIME_TAG in fields else "",
+                float(pos[0]) if pos else float("nan"),
+                float(pos[1]) if len(pos) > 1 else float("nan"),
+                (fields[NAME_TAG].text or "").strip() if NAME_TAG in fields else "",
+                float(value) if value else float("nan"),   # float("NaN") is NaN as well
+            )
+
+    def multipoint_observations(self, stored_query_id: str, **params) -> Iterator[StationObservation]:
+        """
+        Stream a "...::multipointcoverage" stored query, one observation
+        (station, time, parameter) at a time. Each wfs:member is parsed on its own.
+        """
+        for member in self.iter_elements(self.get_feature_params(stored_query_id, **params), MEMBER_TAG):
+            yield from _multipoint_member(member)
+
+    def simple_observations_many(self, stored_query_id: str, queries: Iterable[Dict]) -> List[List[SimpleObservation]]:
+        """
+        Run several simple queries concurrently (one list of observations per query).
+        """
+        return list(self.map(lambda q: self.collect(lambda: self.simple_observations(stored_query_id, **q)), queries))
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local store of FMI observations, keyed by fmisid, parameter and time.
+
+Every (station, parameter) series is one NumPy file of records
+
+    <root>/<fmisid>/<parameter>.npy    (time: datetime64[s], sorted, unique;
+                                        value: float64, NaN = missing)
+
+plus <root>/stations.json with name and position of every station. The
+files are opened memory-mapped, so loading years of a station takes
+milliseconds and touches only the pages that are used. A series is
+rewritten atomically on update (times and values in the same file), so
+a reader never sees a half-written or mismatched series.
+
+refresh() asks the service only for what is missing: for each station,
+the time after the newest stored (non-NaN) value up to now. FMI reports
+steps whose data has not arrived yet as NaN, so those are asked for
+again and filled in by a later refresh. Analysis scripts
+then read with series() / frame() without network access:
+
+    store = ObservationStore("fmi_store")
+    with FMIClient() as client:
+        store.refresh(client, [100908], default_start=parse_time("2022-01-01T00:00:00Z"))
+    times, values = store.series(100908, "t2m")
+
+or from the command line (daily minimum/maximum temperature at Kustavi
+Isokari, as used by ExplainableML.py):
+
+    python obsstore.py fmi_store 100908 --since 2022-08-01T00:00:00Z \\
+        --query fmi::observations::weather::daily::multipointcoverage \\
+        --parameters tmin,tmax --max-hours 8760
+"""
+
+import os
+import re
+import json
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from typing import Union, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from fmiwfs import FMIClient, StationObservation
+from fmidownload import MULTIPOINT_QUERY, MAX_HOURS, Tile, plan_tiles, merge_observations, iso_time, parse_time
+
+PathLike = Union[str, Path]
+
+STATIONS_FILE = "stations.json"
+PARAMETER_RE = re.compile(r"[A-Za-z0-9_.\-]+")
+SERIES_DTYPE = np.dtype([("time", "datetime64[s]"), ("value", np.float64)])
+
+
+def _save_atomic(path: Path, array: np.ndarray) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=".npy", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+class ObservationStore:
+    """
+    Directory of memory-mapped (fmisid, parameter) series.
+    """
+
+    def __init__(self, root: PathLike):
+        self.root = Path(root).expanduser().resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    # ---------- layout ----------
+
+    def _path(self, fmisid: int, parameter: str) -> Path:
+        if not PARAMETER_RE.fullmatch(parameter):
+            raise ValueError(f"Unsupported parameter name: {parameter!r}")
+        return self.root / str(int(fmisid)) / f"{parameter}.npy"
+
+    def _records(self, fmisid: int, parameter: str, mmap: bool = True) -> np.ndarray:
+        path = self._path(fmisid, parameter)
+        if not path.exists():
+            return np.empty(0, SERIES_DTYPE)
+        return np.load(path, mmap_mode="r" if mmap else None)
+
+    def stations(self) -> Dict[int, Dict]:
+        """
+        fmisid -> {"station": name, "lat": ..., "lon": ...}
+        """
+        try:
+            data = json.loads((self.root / STATIONS_FILE).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        return {int(k): v for k, v in data.items()}
+
+    def _save_stations(self, stations: Dict[int, Dict]) -> None:
+        fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=self.root)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({str(k): v for k, v in sorted(stations.items())}, f, indent=1, ensure_ascii=False)
+            os.replace(tmp, self.root / STATIONS_FILE)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+    def parameters(self, fmisid: int) -> List[str]:
+        return sorted(p.stem for p in (self.root / str(int(fmisid))).glob("*.npy"))
+
+    # ---------- reading ----------
+
+    def series(self, fmisid: int, parameter: str, start=None, end=None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (times, values) of one series, memory-mapped and read-only, optionally
+        restricted to start <= time <= end (datetime, np.datetime64 or ISO string).
+        Empty arrays if nothing is stored.
+        """
+        records = self._records(fmisid, parameter)
+        times, values = records["time"], records["value"]
+        lo = 0 if start is None else np.searchsorted(times, _datetime64(start), side="left")
+        hi = len(times) if end is None else np.searchsorted(times, _datetime64(end), side="right")
+        return times[lo:hi], values[lo:hi]
+
+    def newest(self, fmisid: int) -> np.datetime64 | None:
+        """
+        Newest timestamp with a (non-NaN) value of the station over all its
+        parameters.
+        """
+        newest = None
+        for parameter in self.parameters(fmisid):
+            t = _last_valid_time(self._records(fmisid, parameter))
+            if t is not None and (newest is None or t > newest):
+                newest = t
+        return newest
+
+    def frame(self, fmisids: Iterable[int] | None = None, parameters: Sequence[str] | None = None, start=None, end=None):
+        """
+        Long-format pandas DataFrame (fmisid, station, time, parameter, value).
+        """
+        import pandas as pd
+
+        stations = self.stations()
+        parts = []
+        for fmisid in (stations if fmisids is None else fmisids):
+            for parameter in (self.parameters(fmisid) if parameters is None else parameters):
+                times, values = self.series(fmisid, parameter, start, end)
+                if len(times):
+                    parts.append(pd.DataFrame({
+                        "fmisid": np.full(len(times), fmisid),
+                        "station": stations.get(fmisid, {}).get("station", ""),
+                        "time": times,
+                        "parameter": parameter,
+                        "value": values,
+                    }))
+        if not parts:
+            return pd.DataFrame(columns=["fmisid", "station", "time", "parameter", "value"])
+        return pd.concat(parts, ignore_index=True)
+
+    # ---------- writing ----------
+
+    def append(self, observations: Iterable[StationObservation]) -> int:
+        """
+        Merge observations into the store (a new value replaces a stored one
+        at the same time). Returns the number of new (time, value) points.
+        """
+        groups: Dict[Tuple[int, str], Tuple[List[int], List[float]]] = {}
+        stations = self.stations()
+        stations_changed = False
+        for obs in observations:
+            if obs.fmisid < 0:
+                continue   # not addressable by fmisid
+            times, values = groups.setdefault((obs.fmisid, obs.parameter), ([], []))
+            times.append(obs.time)
+            values.append(obs.value)
+            if obs.fmisid not in stations:
+                stations[obs.fmisid] = {"station": obs.station, "lat": obs.lat, "lon": obs.lon}
+                stations_changed = True
+
+        added = 0
+        for (fmisid, parameter), (times, values) in groups.items():
+            added += self._merge_series(fmisid, parameter, np.array(times, "datetime64[s]"), np.array(values, np.float64))
+        if stations_changed:
+            self._save_stations(stations)
+        return added
+
+    def _merge_series(self, fmisid: int, parameter: str, times: np.ndarray, values: np.ndarray) -> int:
+        old = self._records(fmisid, parameter, mmap=False)
+        new = np.empty(len(times), SERIES_DTYPE)
+        new["time"], new["value"] = times, values
+        new = new[np.argsort(new["time"], kind="stable")]
+
+        merged = np.concatenate([old, new])
+        if len(old) and len(new) and new["time"][0] <= old["time"][-1]:
+            # Overlap: sort old before new, keep the last (newest) value per timestamp.
+            merged = merged[np.argsort(merged["time"], kind="stable")]
+        keep = np.ones(len(merged), bool)
+        keep[:-1] = merged["time"][1:] != merged["time"][:-1]
+        merged = merged[keep]
+
+        _save_atomic(self._path(fmisid, parameter), merged)
+        return len(merged) - len(old)
+
+    # ---------- refreshing ----------
+
+    def refresh(
+        self,
+        client: FMIClient,
+        fmisids: Iterable[int],
+        default_start: datetime,
+        end: datetime | None = None,
+        stored_query_id: str = MULTIPOINT_QUERY,
+        max_hours: float = MAX_HOURS,
+        **params
+    ) -> int:
+        """
+        Fetch, per station, the observations after its newest stored timestamp
+        (default_start for stations not stored yet) up to end (default: now),
+        all stations' time windows concurrently. Returns the number of new points.
+        """
+        end = end or datetime.now(timezone.utc)
+        jobs: List[Tuple[int, Tile]] = []
+        for fmisid in fmisids:
+            newest = self.newest(fmisid)
+            if newest is None:
+                start = default_start
+            else:
+                start = newest.astype(datetime).replace(tzinfo=timezone.utc) + timedelta(seconds=1)
+            if start < end:
+                jobs += [(fmisid, tile) for tile in plan_tiles(start, end, None, max_hours)]
+        if not jobs:
+            print("✅ Observation store is up to date.")
+            return 0
+
+        print(f"📥 Refreshing {len({f for f, _ in jobs})} station(s) in {len(jobs)} request(s), up to {iso_time(end)}.")
+
+        def fetch(job: Tuple[int, Tile]) -> List[StationObservation]:
+            fmisid, tile = job
+            return client.collect(
+                lambda: client.multipoint_observations(stored_query_id, fmisid=fmisid, **tile.params(), **params)
+            )
+
+        added = self.append(merge_observations(client.map(fetch, jobs)))
+        print(f"✅ {added} new observation(s) stored.")
+        return added
+
+
+def _last_valid_time(records: np.ndarray, block: int = 4096) -> np.datetime64 | None:
+    # Scan back from the end in blocks, so only the tail of a long series is read.
+    end = len(records)
+    while end > 0:
+        start = max(0, end - block)
+        valid = np.flatnonzero(~np.isnan(records["value"][start:end]))
+        if len(valid):
+            return records["time"][start + valid[-1]]
+        end = start
+        block *= 2
+    return None
+
+
+def _datetime64(t) -> np.datetime64:
+    if isinstance(t, datetime) and t.tzinfo is not None:
+        t = t.astimezone(timezone.utc).replace(tzinfo=None)
+    if isinstance(t, str):
+        t = t.rstrip("Z")
+    return np.datetime64(t, "s")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bring a local FMI observation store up to date.")
+    parser.add_argument("root", help="store directory")
+    parser.add_argument("fmisids", type=int, nargs="+", help="stations to refresh")
+    parser.add_argument("--since", default="2024-01-01T00:00:00Z", help="start for stations not stored yet")
+    parser.add_argument("--query", default=MULTIPOINT_QUERY, help="multipointcoverage stored query")
+    parser.add_argument("--parameters", default=None, help="e.g. t2m,ws_10min (default: the query's own)")
+    parser.add_argument("--max-hours", type=float, default=MAX_HOURS, help="time window per request")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight")
+    args = parser.parse_args(argv)
+
+    with FMIClient(max_concurrency=args.concurrency) as client:
+        ObservationStore(args.root).refresh(
+            client, args.fmisids, parse_time(args.since),
+            stored_query_id=args.query, max_hours=args.max_hours, parameters=args.parameters
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
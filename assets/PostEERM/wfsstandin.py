@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for the FMI WFS that serves recorded responses, for
+exercising fmiwfs.FMIClient (and code built on it) offline.
+
+Record real answers once,
+
+    python wfsstandin.py record recordings "fmi::observations::weather::simple" \
+        place="Kustavi Isokari" starttime=2024-11-01T00:00:00Z endtime=2024-11-02T00:00:00Z
+
+then point a client at the stand-in:
+
+    with StandInWFS("recordings", fail_first=2) as wfs:
+        client = FMIClient(base_url=wfs.url, backoff=0.01)
+        rows = list(client.simple_observations("fmi::observations::weather::simple", ...))
+        assert wfs.requests == 3   # two injected 503s, then the recording
+
+Each recording is stored under recording_name(params), a hash of the
+query parameters. Unknown queries get a 400 ExceptionReport, like the
+real service answers a bad query, unless a responder such as
+MockObservations (synthetic multipointcoverage answers for any time
+window and bbox) generates the answer. Responses are streamed from the recording in
+small chunks, so the client's incremental parsing is exercised.
+"""
+
+import io
+import sys
+import time
+import hashlib
+import threading
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from datetime import datetime, timedelta
+from typing import Union, BinaryIO, Callable, Dict, List, Tuple
+
+from fmiwfs import FMIClient
+
+PathLike = Union[str, Path]
+
+EXCEPTION_REPORT = """<?xml version="1.0" encoding="UTF-8"?>
+<ExceptionReport xmlns="http://www.opengis.net/ows/1.1" version="2.0.0">
+  <Exception exceptionCode="InvalidParameterValue">
+    <ExceptionText>{text}</ExceptionText>
+  </Exception>
+</ExceptionReport>
+"""
+
+
+def recording_name(params: Dict[str, str]) -> str:
+    """
+    File name of the recorded response for a query (parameter names are case-insensitive).
+    """
+    canonical = "&".join(f"{k.lower()}={v}" for k, v in sorted((k.lower(), v) for k, v in params.items()))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:20] + ".xml"
+
+
+def record(client: FMIClient, params: Dict[str, str], directory: PathLike) -> Path:
+    """
+    Fetch the response of params with client and store it as a recording.
+    """
+    return client.download(params, Path(directory) / recording_name(params))
+
+
+class StandInWFS:
+    """
+    Threaded HTTP server on 127.0.0.1 (free port) serving the recordings in
+    directory. fail_first answers the first n requests with 503 (Retry-After
+    retry_after), break_first drops the connection of the next n (successful)
+    responses after break_at of their body, delay is added before every
+    response and chunk_size sets the size of the chunks a body is sent in. A responder (query parameters
+    -> (status, body), e.g. MockObservations) answers queries that have no
+    recording.
+    """
+
+    def __init__(
+        self,
+        directory: PathLike | None = None,
+        fail_first: int = 0,
+        retry_after: float | None = None,
+        delay: float = 0.0,
+        chunk_size: int = 16 * 1024,
+        responder: Callable[[Dict[str, str]], Tuple[int, bytes]] | None = None,
+        break_first: int = 0,
+        break_at: float = 0.5
+    ):
+        self.directory = Path(directory) if directory is not None else None
+        self.responder = responder
+        self.fail_first = fail_first
+        self.retry_after = retry_after
+        self.delay = delay
+        self.chunk_size = chunk_size
+        self.break_first = break_first
+        self.break_at = break_at
+        self.broken = 0
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/wfs"
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes | BinaryIO, size: int, headers: Dict[str, str] | None = None) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", "text/xml; charset=UTF-8")
+                self.send_header("Content-Length", str(size))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                limit = size
+                if status == 200:
+                    with standin._lock:
+                        if standin.broken < standin.break_first:
+                            standin.broken += 1
+                            limit = int(size * standin.break_at)
+                stream = io.BytesIO(body) if isinstance(body, bytes) else body
+                sent = 0
+                while sent < limit and (chunk := stream.read(min(standin.chunk_size, limit - sent))):
+                    self.wfile.write(chunk)
+                    self.wfile.flush()
+                    sent += len(chunk)
+                if sent < size:
+                    self.close_connection = True   # the client sees a truncated body
+
+            def _send_error(self, status: int, text: str, headers: Dict[str, str] | None = None) -> None:
+                body = EXCEPTION_REPORT.format(text=text).encode("utf-8")
+                self._send(status, body, len(body), headers)
+
+            def do_GET(self):
+                with standin._lock:
+                    standin.requests += 1
+                    number = standin.requests
+                    standin.in_flight += 1
+                    standin.max_in_flight = max(standin.max_in_flight, standin.in_flight)
+                try:
+                    if standin.delay:
+                        time.sleep(standin.delay)
+                    if number <= standin.fail_first:
+                        headers = {"Retry-After": str(standin.retry_after)} if standin.retry_after is not None else {}
+                        self._send_error(503, "Service busy", headers)
+                        return
+                    params = dict(parse_qsl(urlsplit(self.path).query, keep_blank_values=True))
+                    path = standin.directory / recording_name(params) if standin.directory else None
+                    if (path is None or not path.is_file()) and standin.responder:
+                        status, body = standin.responder(params)
+                        self._send(status, body, len(body))
+                        return
+                    if path is None or not path.is_file():
+                        self._send_error(400, f"No recorded response for {sorted(params.items())}")
+                        return
+                    with open(path, "rb") as f:
+                        self._send(200, f, path.stat().st_size)
+                finally:
+                    with standin._lock:
+                        standin.in_flight -= 1
+
+        return Handler
+
+    def start(self) -> "StandInWFS":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StandInWFS":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+# ---------- Synthetic observations ----------
+
+MULTIPOINT_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<wfs:FeatureCollection xmlns:wfs="http://www.opengis.net/wfs/2.0" xmlns:gml="http://www.opengis.net/gml/3.2"
+    xmlns:om="http://www.opengis.net/om/2.0" xmlns:omso="http://inspire.ec.europa.eu/schemas/omso/3.0"
+    xmlns:sams="http://www.opengis.net/samplingSpatial/2.0" xmlns:sam="http://www.opengis.net/sampling/2.0"
+    xmlns:target="http://xml.fmi.fi/namespace/om/atmosphericfeatures/1.1" xmlns:gmlcov="http://www.opengis.net/gmlcov/1.0"
+    xmlns:swe="http://www.opengis.net/swe/2.0" xmlns:xlink="http://www.w3.org/1999/xlink"
+    numberMatched="1" numberReturned="1">
+<wfs:member><omso:GridSeriesObservation gml:id="obs-obs-1-1">
+<om:featureOfInterest><sams:SF_SpatialSamplingFeature gml:id="sampling-feature-1-1-fmisid">
+<sam:sampledFeature><target:LocationCollection gml:id="sampled-target-1-1">
+{locations}</target:LocationCollection></sam:sampledFeature>
+<sams:shape><gml:MultiPoint gml:id="mp-1-1-fmisid">
+{points}</gml:MultiPoint></sams:shape>
+</sams:SF_SpatialSamplingFeature></om:featureOfInterest>
+<om:result><gmlcov:MultiPointCoverage gml:id="mpcv-1-1-fmisid">
+<gml:domainSet><gmlcov:SimpleMultiPoint gml:id="mp-1-1-fmisid-domain" srsDimension="3"><gmlcov:positions>
+{positions}</gmlcov:positions></gmlcov:SimpleMultiPoint></gml:domainSet>
+<gml:rangeSet><gml:DataBlock><gml:rangeParameters/><gml:doubleOrNilReasonTupleList>
+{values}</gml:doubleOrNilReasonTupleList></gml:DataBlock></gml:rangeSet>
+<gmlcov:rangeType><swe:DataRecord>
+{fields}</swe:DataRecord></gmlcov:rangeType>
+</gmlcov:MultiPointCoverage></om:result>
+</omso:GridSeriesObservation></wfs:member>
+</wfs:FeatureCollection>
+"""
+
+
+def _parse_time(text: str) -> datetime:
+    return datetime.fromisoformat(text.replace("Z", "+00:00"))
+
+
+class MockObservations:
+    """
+    Responder for StandInWFS that answers multipointcoverage queries from a
+    deterministic synthetic data set: every station observes every parameter
+    each step_minutes, value = f(fmisid, parameter, time). Stations are
+    selected by bbox and/or fmisid (comma-separated). Like the real
+    service it returns both window ends (inclusive) and rejects queries over
+    max_hours or with more than max_values values (400 ExceptionReport).
+    """
+
+    def __init__(
+        self,
+        stations: List[Tuple[int, str, float, float]],   # (fmisid, name, lat, lon)
+        parameters: Tuple[str, ...] = ("t2m", "ws_10min"),
+        step_minutes: int = 60,
+        max_hours: int = 168,
+        max_values: int | None = None
+    ):
+        self.stations = stations
+        self.parameters = parameters
+        self.step = timedelta(minutes=step_minutes)
+        self.max_hours = max_hours
+        self.max_values = max_values
+
+    @staticmethod
+    def value(fmisid: int, parameter: str, epoch: int) -> float:
+        return round((fmisid % 97) + len(parameter) + (epoch // 3600) % 24 / 10, 1)
+
+    def __call__(self, params: Dict[str, str]) -> Tuple[int, bytes]:
+        params = {k.lower(): v for k, v in params.items()}
+        try:
+            start, end = _parse_time(params["starttime"]), _parse_time(params["endtime"])
+            stations = self.stations
+            if "fmisid" in params:
+                fmisids = {int(x) for x in params["fmisid"].split(",")}
+                stations = [s for s in stations if s[0] in fmisids]
+            if "bbox" in params:
+                lon0, lat0, lon1, lat1 = (float(x) for x in params["bbox"].split(",")[:4])
+                stations = [s for s in stations if lat0 <= s[2] <= lat1 and lon0 <= s[3] <= lon1]
+        except (KeyError, ValueError) as e:
+            return 400, EXCEPTION_REPORT.format(text=f"Invalid query: {e}").encode("utf-8")
+        if end - start > timedelta(hours=self.max_hours):
+            return 400, EXCEPTION_REPORT.format(text=f"Too long time interval (max {self.max_hours} hours)").encode()
+
+        epoch = int(-(-start.timestamp() // self.step.total_seconds()) * self.step.total_seconds())
+        times = []
+        while epoch <= end.timestamp():
+            times.append(epoch)
+            epoch += int(self.step.total_seconds())
+        if self.max_values is not None and len(stations) * len(times) * len(self.parameters) > self.max_values:
+            return 400, EXCEPTION_REPORT.format(text="Too many values requested").encode()
+
+        locations = "".join(
+            f'<target:member><target:Location gml:id="obsloc-fmisid-{f}-pos">'
+            f'<gml:identifier codeSpace="http://xml.fmi.fi/namespace/stationcode/fmisid">{f}</gml:identifier>'
+            f'<gml:name codeSpace="http://xml.fmi.fi/namespace/locationcode/name">{name}</gml:name>'
+            f'<target:representativePoint xlink:href="#point-{f}"/></target:Location></target:member>\n'
+            for f, name, _, _ in stations
+        )
+        points = "".join(
+            f'<gml:pointMember><gml:Point gml:id="point-{f}"><gml:name>{name}</gml:name>'
+            f"<gml:pos>{lat:.5f} {lon:.5f} </gml:pos></gml:Point></gml:pointMember>\n"
+            for f, name, lat, lon in stations
+        )
+        rows = [(s, t) for s in stations for t in times]
+        positions = "".join(f"{s[2]:.5f} {s[3]:.5f}  {t}\n" for s, t in rows)
+        values = "".join(" ".join(str(self.value(s[0], p, t)) for p in self.parameters) + " \n" for s, t in rows)
+        fields = "".join(f'<swe:field name="{p}" xlink:href="param={p}"/>\n' for p in self.parameters)
+        body = MULTIPOINT_TEMPLATE.format(
+            locations=locations, points=points, positions=positions, values=values, fields=fields
+        )
+        return 200, body.encode("utf-8")
+
+
+def main(argv=None) -> int:
+    """
+    record <directory> <stored_query_id> key=value ...   store a live response
+    serve <directory>                                     run the stand-in until Ctrl-C
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) >= 3 and argv[0] == "record":
+        params = FMIClient.get_feature_params(argv[2], **dict(a.split("=", 1) for a in argv[3:]))
+        with FMIClient() as client:
+            print(f"💾 Recorded {record(client, params, argv[1])}")
+        return 0
+    if len(argv) == 2 and argv[0] == "serve":
+        with StandInWFS(argv[1]) as wfs:
+            print(f"🌐 Serving recordings from {argv[1]} at {wfs.url}")
+            try:
+                threading.Event().wait()
+            except KeyboardInterrupt:
+                pass
+        return 0
+    print(main.__doc__)
+    return 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
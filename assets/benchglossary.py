@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks on a large synthetic glossary.
+
+    python benchglossary.py [n_entries]
+    python benchglossary.py --suite [--sizes 200 1000 5000] [--save-baseline]
+    python benchglossary.py --startup
+
+Without --suite: times brace matching (texscan.find_matching_brace) against
+the old character-by-character loop, and the Markdown tokenizer behind
+fix_latex_in_text / remove_math_and_raw against the old cascaded regex
+passes, on realistic posts and on worst-case input (unclosed openers).
+
+--suite: times every text transform from glossary source to post on
+synthetic glossaries of increasing size, plus publish_term end to end with
+stub pandoc / pdflatex / convert executables (so it runs offline and
+measures the pipeline, not the tools). Reports throughput (MB/s of input)
+and peak Python memory (tracemalloc), and compares against a baseline
+saved with --save-baseline; cases more than --tolerance slower (or
+hungrier) than the baseline are flagged and the exit status is 1.
+
+--startup (also part of --suite): imports the light modules in fresh
+interpreters and fails if one takes longer than STARTUP_BUDGET_S or pulls
+in a heavy optional dependency (networkx, matplotlib, the rasterizers).
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import subprocess
+import platform
+import tempfile
+import tracemalloc
+from pathlib import Path
+from contextlib import contextmanager, redirect_stdout
+from typing import Callable, Dict, Iterator, List, NamedTuple, Sequence, Tuple
+
+from texscan import find_matching_brace, extract_balanced_braces
+from mdpipeline import fix_latex_in_text, remove_math_and_raw, remove_reference_blocks_and_headers
+from blogcore import NEW_ENTRY_RE, convert_pandoc_figures_to_html, iter_newglossaryentry_blocks, parse_glossary
+from MakeBlogPost import RasterOptions, publish_term
+
+SNIPPETS = [
+    "The model $h(\\featurevec) = \\weights^{T} \\featurevec$ is trained by \\gls{erm}. ",
+    "Consider the set $\\{ \\datapoint^{(\\sampleidx)} \\}_{\\sampleidx=1}^{\\samplesize}$. ",
+    "A {nested {group {of braces}}} inside the text. ",
+    "We use \\emph{regularization} to avoid \\gls{overfitting} \\cite{MLBasics}. ",
+    "A literal percent sign \\% and escaped braces \\{ \\} are not structure. ",
+    "\n% a comment with {braces} in it\n",
+    "$$\\mathbb{E} \\{ \\lossfunc{(\\feature,\\truelabel)}{h} \\} = \\frac{1}{m} \\sum_{i} x_{i}$$ ",
+]
+
+TIKZ_SNIPPET = (
+    "\\begin{figure}[H]\\centering\\begin{tikzpicture}[scale=1.5]\n"
+    "  \\draw[->] (0,0) -- (2,1) node[above] {$\\lambda_{1} {\\bf u}^{(1)}$};\n"
+    "\\end{tikzpicture}\\caption{A figure.}\\end{figure} "
+)
+
+
+def synthetic_glossary(n_entries: int, seed: int = 0, snippets_per_entry: int = 40) -> str:
+    """
+    Expanded-glossary-like TeX source with nested braces, comments, escapes,
+    math and occasional TikZ figures.
+    """
+    rng = random.Random(seed)
+    parts = []
+    for i in range(n_entries):
+        body = "".join(rng.choice(SNIPPETS) for _ in range(snippets_per_entry))
+        if i % 5 == 0:
+            body += TIKZ_SNIPPET
+        parts.append(
+            f"\\newglossaryentry{{term{i}}}\n{{name={{term {i}}},\n"
+            f" description={{{body}}},\n first={{term {i}}},type=math, text={{term {i}}}\n}}\n\n"
+        )
+    return "".join(parts)
+
+
+def naive_find_matching_brace(text: str, start: int) -> int:
+    """
+    The previous per-character loop (ignores escapes and comments), as reference.
+    """
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] == "{":
+            depth += 1
+        elif text[i] == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+    raise ValueError("Unmatched brace")
+
+
+def _entry_starts(tex: str) -> list:
+    starts = []
+    pos = tex.find("\\newglossaryentry{")
+    while pos != -1:
+        starts.append(tex.index("\n{", pos) + 1)
+        pos = tex.find("\\newglossaryentry{", pos + 1)
+    return starts
+
+
+def time_it(fn: Callable[[], object], repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench_brace_matching(n_entries: int = 5000) -> None:
+    tex = synthetic_glossary(n_entries)
+    starts = _entry_starts(tex)
+    mb = len(tex.encode("utf-8")) / 1e6
+
+    def run(fn):
+        return lambda: [fn(tex, s) for s in starts]
+
+    # Snippets keep braces balanced even inside escapes/comments, so both agree.
+    assert run(find_matching_brace)() == run(naive_find_matching_brace)()
+
+    t_new = time_it(run(find_matching_brace))
+    t_old = time_it(run(naive_find_matching_brace))
+    print(f"Brace matching on {n_entries} entries ({mb:.1f} MB):")
+    print(f"  texscan.find_matching_brace : {t_new:7.3f} s  {mb / t_new:8.1f} MB/s")
+    print(f"  per-character loop          : {t_old:7.3f} s  {mb / t_old:8.1f} MB/s")
+    print(f"  speed-up                    : {t_old / t_new:7.1f}x")
+
+
+# ---------- Markdown math / Liquid scanning ----------
+
+MD_PIECES = [
+    "The model", "is trained by", "$h(x) = w^{T} x$", "$x^{{2}}$", "$$\\sum_{i=1}^{m} L(h(x_{i}), y_{i})$$",
+    "$$\\mathbf{{A}} = \\mathbf{U}$$", "\\[z\\]", "\\(w\\)", "\\begin{equation}E=mc^2\\end{equation}",
+    "{% raw %}$a{{b}}${% endraw %}", "```\ncode here\n```", "**bold**", "[link](https://x.org)", "\n\n",
+]
+
+# Unclosed openers only: every one of them made a lazy DOTALL pattern scan to the end.
+WORST_CASE_UNIT = "x {{ a \\[ b {% c \\( d \\begin{equation} e {% raw %} f "
+
+
+def synthetic_post(n_pieces: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(MD_PIECES) for _ in range(n_pieces))
+
+
+def regex_fix_latex_in_text(md_text: str) -> str:
+    """
+    The previous split + DISPLAY/INLINE regex passes, as reference.
+    """
+    fence_or_raw = re.compile(r"(```.*?```|{% raw %}.*?{% endraw %})", flags=re.DOTALL)
+    display = re.compile(r"\$\$(.+?)\$\$", flags=re.DOTALL)
+    inline = re.compile(r"(?<!\$)\$(?!\$)(.+?)(?<!\$)\$(?!\$)", flags=re.DOTALL)
+
+    def wrap_if_liquid(match: re.Match) -> str:
+        if "{{" in match.group(1) or "}}" in match.group(1):
+            return "{% raw %}" + match.group(0) + "{% endraw %}"
+        return match.group(0)
+
+    return "".join(
+        part if fence_or_raw.fullmatch(part or "") else inline.sub(wrap_if_liquid, display.sub(wrap_if_liquid, part))
+        for part in fence_or_raw.split(md_text)
+    )
+
+
+def regex_remove_math_and_raw(text: str) -> str:
+    """
+    The previous cascade of lazy DOTALL re.sub passes, as reference.
+    """
+    text = re.sub(r"{%\s*raw\s*%}", "", text)
+    text = re.sub(r"{%\s*endraw\s*%}", "", text)
+    text = re.sub(r"{%.*?%}", "", text, flags=re.DOTALL)
+    text = re.sub(r"{{.*?}}", "", text, flags=re.DOTALL)
+    text = re.sub(r"\$\$(.*?)\$\$", "", text, flags=re.DOTALL)
+    text = re.sub(r"\\\[(.*?)\\\]", "", text, flags=re.DOTALL)
+    envs = r"(equation\*?|align\*?|gather\*?|multline\*?|eqnarray\*?)"
+    text = re.sub(rf"\\begin\{{{envs}\}}.*?\\end\{{\1\}}", "", text, flags=re.DOTALL)
+    text = re.sub(r"\\\((.*?)\\\)", "", text, flags=re.DOTALL)
+    text = re.sub(r"(?<!\$)\$(?!\$)([^$]*?)(?<!\$)\$(?!\$)", "", text, flags=re.DOTALL)
+    text = re.sub(r"\\ensuremath\{.*?\}", "", text, flags=re.DOTALL)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def bench_markdown_scanning(n_pieces: int = 200000, worst_case_units: tuple = (500, 1000, 2000)) -> None:
+    post = synthetic_post(n_pieces)
+    mb = len(post.encode("utf-8")) / 1e6
+
+    # Pieces are separated by blanks, the shape of Pandoc output; there both agree.
+    assert fix_latex_in_text(post) == regex_fix_latex_in_text(post)
+    assert remove_math_and_raw(post) == regex_remove_math_and_raw(post)
+
+    print(f"Markdown post-processing on a synthetic post ({mb:.1f} MB):")
+    for name, new, old in (
+        ("fix_latex_in_text", fix_latex_in_text, regex_fix_latex_in_text),
+        ("remove_math_and_raw", remove_math_and_raw, regex_remove_math_and_raw),
+    ):
+        t_new = time_it(lambda: new(post))
+        t_old = time_it(lambda: old(post))
+        print(f"  {name:20s} tokenizer {mb / t_new:7.1f} MB/s   regex passes {mb / t_old:7.1f} MB/s")
+
+    print("Worst case (unclosed openers), time per call:")
+    for units in worst_case_units:
+        text = WORST_CASE_UNIT * units
+        t_new = time_it(lambda: (fix_latex_in_text(text), remove_math_and_raw(text)), repeat=1)
+        t_old = time_it(lambda: (regex_fix_latex_in_text(text), regex_remove_math_and_raw(text)), repeat=1)
+        print(f"  {len(text) / 1e3:6.0f} kB   tokenizer {t_new:8.4f} s   regex passes {t_old:8.3f} s")
+
+
+# ---------- Benchmark suite with baseline ----------
+
+SUITE_SIZES = (200, 1000, 5000)
+BASELINE_FILE = Path(__file__).with_name("bench_baseline.json")
+SLOWDOWN_TOLERANCE = 0.25   # flag cases more than 25% below baseline throughput (or above baseline memory)
+E2E_ENTRIES = 20            # publish_term spawns stub processes; keep the end-to-end case small
+MIN_CASE_SECONDS = 0.2      # small inputs are run repeatedly to get stable timings
+
+FIGURE_PIECES = [
+    '![Eigenvectors $\\mathbf{u}^{(1)}$ of $\\mathbf{{A}}$.](../images/t_tikz.png){#fig:eig width="80%"}',
+    '![A plain caption.](../images/u_tikz.png){width="50%"}',
+]
+
+REFERENCES_BLOCK = (
+    ':::::: {#refs .references .csl-bib-body .hanging-indent entry-spacing="0"}\n'
+    "::: {#ref-MLBasics .csl-entry}\nA. Jung, *Machine Learning: The Basics*. Springer, 2022.\n:::\n"
+    "::::::\n"
+)
+
+PNG_1X1 = (
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=="
+)
+
+# Stand-ins for the external tools: same command-line contract, trivial work.
+STUB_TOOLS = {
+    "pandoc": """
+import sys
+args = sys.argv[1:]
+src = open(args[0], encoding="utf-8").read()
+body = src.split("\\\\begin{document}")[-1].split("\\\\end{document}")[0]
+with open(args[args.index("-o") + 1], "w", encoding="utf-8") as f:
+    f.write("---\\nbibliography: lit.bib\\n---\\n\\n" + body.strip() + "\\n\\n" + REFERENCES_BLOCK)
+""",
+    "pdflatex": """
+import sys, pathlib
+pathlib.Path(sys.argv[-1]).with_suffix(".pdf").write_bytes(b"%PDF-1.4\\n%%EOF\\n")
+""",
+    "convert": """
+import sys, base64
+open(sys.argv[-1], "wb").write(base64.b64decode(PNG_1X1))
+""",
+}
+
+
+def synthetic_pandoc_markdown(n_entries: int, seed: int = 0, pieces_per_entry: int = 40) -> str:
+    """
+    Pandoc-output-like Markdown of roughly the size of synthetic_glossary(n_entries):
+    front matter, headers with ids, math, Liquid, code, figures and a reference block.
+    """
+    rng = random.Random(seed)
+    parts = ["---\nbibliography: Literature.bib\n---\n\n"]
+    for i in range(n_entries):
+        parts.append(f"# Term {i} {{#term{i}}}\n\n")
+        parts.append(" ".join(rng.choice(MD_PIECES) for _ in range(pieces_per_entry)))
+        if i % 5 == 0:
+            parts.append("\n\n" + rng.choice(FIGURE_PIECES))
+        parts.append("\n\n")
+    parts.append(REFERENCES_BLOCK)
+    return "".join(parts)
+
+
+@contextmanager
+def offline_tools() -> Iterator[Path]:
+    """
+    Put stub pandoc / pdflatex / convert executables first on PATH.
+    """
+    with tempfile.TemporaryDirectory(prefix="benchtools-") as bin_dir:
+        for name, code in STUB_TOOLS.items():
+            path = Path(bin_dir) / name
+            path.write_text(
+                f"#!{sys.executable}\nREFERENCES_BLOCK = {REFERENCES_BLOCK!r}\nPNG_1X1 = {PNG_1X1!r}\n{code}",
+                encoding="utf-8"
+            )
+            path.chmod(0o755)
+        old_path = os.environ.get("PATH", "")
+        os.environ["PATH"] = bin_dir + os.pathsep + old_path
+        try:
+            yield Path(bin_dir)
+        finally:
+            os.environ["PATH"] = old_path
+
+
+def publish_stubbed(glossary: Dict[str, str]) -> None:
+    """
+    publish_term for every entry into a throw-away directory (tools must be stubbed).
+    """
+    with tempfile.TemporaryDirectory(prefix="benchpublish-") as work_dir, redirect_stdout(io.StringIO()):
+        work = Path(work_dir)
+        bib = work / "lit.bib"
+        bib.write_text("@book{MLBasics, title={Machine Learning: The Basics}, year={2022}}\n", encoding="utf-8")
+        for term, entry_text in glossary.items():
+            publish_term(
+                term, entry_text, bib, output_folder=work / "posts", image_output_dir=work / "images",
+                tex_output_dir=work / "tex", post_date="2026-01-01",
+                raster=RasterOptions(backend="imagemagick")
+            )
+
+
+def _mb(text: str) -> float:
+    return len(text.encode("utf-8")) / 1e6
+
+
+def suite_cases(n_entries: int) -> List[Tuple[str, float, Callable[[], object]]]:
+    """
+    (case name, MB of input, function) for one glossary size.
+    """
+    tex = synthetic_glossary(n_entries)
+    brace_starts = [m.end() - 1 for m in NEW_ENTRY_RE.finditer(tex)]
+    md = synthetic_pandoc_markdown(n_entries)
+
+    return [
+        ("parse_glossary", _mb(tex), lambda: parse_glossary(tex)),
+        ("iter_newglossaryentry_blocks", _mb(tex), lambda: list(iter_newglossaryentry_blocks(tex))),
+        ("extract_balanced_braces", _mb(tex), lambda: [extract_balanced_braces(tex, i) for i in brace_starts]),
+        ("fix_latex_in_text", _mb(md), lambda: fix_latex_in_text(md)),
+        ("convert_pandoc_figures_to_html", _mb(md), lambda: convert_pandoc_figures_to_html(md)),
+        ("remove_reference_blocks_and_headers", _mb(md), lambda: remove_reference_blocks_and_headers(md)),
+        ("remove_math_and_raw", _mb(md), lambda: remove_math_and_raw(md)),
+    ]
+
+
+def time_per_call(fn: Callable[[], object], repeat: int = 3, min_seconds: float = MIN_CASE_SECONDS) -> float:
+    """
+    Best average time per call over repeat rounds of at least min_seconds each.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        calls, t0 = 0, time.perf_counter()
+        while True:
+            fn()
+            calls += 1
+            elapsed = time.perf_counter() - t0
+            if elapsed >= min_seconds:
+                break
+        best = min(best, elapsed / calls)
+    return best
+
+
+def peak_memory_mb(fn: Callable[[], object]) -> float:
+    """
+    Peak memory allocated by Python while fn runs (its input is allocated before).
+    """
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+class BenchResult(NamedTuple):
+    case: str
+    size: int
+    mb: float
+    seconds: float
+    peak_mb: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.case}@{self.size}"
+
+    @property
+    def mb_s(self) -> float:
+        return self.mb / self.seconds
+
+
+def run_suite(sizes: Sequence[int] = SUITE_SIZES, repeat: int = 3) -> List[BenchResult]:
+    cases = [(size, *case) for size in sizes for case in suite_cases(size)]
+    e2e = dict(list(parse_glossary(synthetic_glossary(E2E_ENTRIES)).items()))
+    cases.append((E2E_ENTRIES, "publish_term (stub tools)", sum(map(_mb, e2e.values())), lambda: publish_stubbed(e2e)))
+
+    results = []
+    with offline_tools():
+        for size, case, mb, fn in cases:
+            # Timed without tracemalloc, which slows allocation-heavy code down.
+            results.append(BenchResult(case, size, mb, time_per_call(fn, repeat), peak_memory_mb(fn)))
+    return results
+
+
+def load_baseline(path: Path) -> Dict[str, Dict[str, float]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))["results"]
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results: Sequence[BenchResult], path: Path) -> None:
+    path.write_text(json.dumps({
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {r.key: {"mb_s": round(r.mb_s, 3), "peak_mb": round(r.peak_mb, 3)} for r in results},
+    }, indent=1), encoding="utf-8")
+
+
+def compare_to_baseline(
+    results: Sequence[BenchResult],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float = SLOWDOWN_TOLERANCE
+) -> List[str]:
+    """
+    Print the results next to the baseline; return the keys of flagged cases.
+    """
+    flagged = []
+    print(f"{'case':38s} {'size':>5s} {'MB':>7s} {'ms':>9s} {'MB/s':>9s} {'base':>9s} {'peak MB':>8s} {'base':>8s}")
+    for r in results:
+        base = baseline.get(r.key)
+        flags = []
+        if base and r.mb_s < base["mb_s"] * (1 - tolerance):
+            flags.append(f"SLOWER {r.mb_s / base['mb_s'] - 1:+.0%}")
+        if base and r.peak_mb > base["peak_mb"] * (1 + tolerance) + 0.1:
+            flags.append(f"MEMORY {r.peak_mb / base['peak_mb'] - 1:+.0%}")
+        if flags:
+            flagged.append(r.key)
+        print(
+            f"{r.case[:38]:38s} {r.size:5d} {r.mb:7.2f} {r.seconds * 1000:9.1f} {r.mb_s:9.2f} "
+            f"{base['mb_s'] if base else float('nan'):9.2f} {r.peak_mb:8.2f} "
+            f"{base['peak_mb'] if base else float('nan'):8.2f}  {'⚠️ ' + ', '.join(flags) if flags else ''}"
+        )
+    return flagged
+
+
+# ---------- Import time ----------
+
+STARTUP_MODULES = ("blogcore", "texscan", "glossarystream", "mdpipeline", "MakeBlogPost")
+STARTUP_BUDGET_S = 0.2
+HEAVY_MODULES = ("networkx", "matplotlib", "numpy", "PIL", "pdf2image", "pypdfium2")
+
+STARTUP_PROBE = """
+import sys, time
+sys.path.insert(0, {path!r})
+t0 = time.perf_counter()
+import {module}
+print(time.perf_counter() - t0)
+print(" ".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def check_startup(
+    modules: Sequence[str] = STARTUP_MODULES,
+    budget: float = STARTUP_BUDGET_S,
+    repeat: int = 3
+) -> List[str]:
+    """
+    Import each module in fresh interpreters (best of repeat). Returns the
+    problems found: over budget, or a heavy optional dependency imported.
+    """
+    problems = []
+    print(f"Import time (budget {budget * 1000:.0f} ms):")
+    for module in modules:
+        probe = STARTUP_PROBE.format(path=str(Path(__file__).resolve().parent), module=module, heavy=HEAVY_MODULES)
+        best, heavy = float("inf"), ""
+        for _ in range(repeat):
+            out = subprocess.run([sys.executable, "-c", probe], check=True, capture_output=True, text=True).stdout
+            seconds, heavy = out.split("\n")[:2]
+            best = min(best, float(seconds))
+        flags = []
+        if best > budget:
+            flags.append("over budget")
+        if heavy:
+            flags.append(f"imports {heavy}")
+        if flags:
+            problems.append(f"{module}: {', '.join(flags)}")
+        print(f"  {module:20s} {best * 1000:7.1f} ms  {'⚠️ ' + ', '.join(flags) if flags else ''}")
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks for the glossary-to-post pipeline.")
+    parser.add_argument("n_entries", nargs="?", type=int, default=5000, help="entries for the brace benchmark")
+    parser.add_argument("--suite", action="store_true", help="run the benchmark suite against the baseline")
+    parser.add_argument("--startup", action="store_true", help="only check the import time of the light modules")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SUITE_SIZES), help="glossary sizes (entries)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE, help="baseline file (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=SLOWDOWN_TOLERANCE, help="allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        return 1 if check_startup() else 0
+    if not args.suite:
+        bench_brace_matching(args.n_entries)
+        bench_markdown_scanning()
+        return 0
+
+    startup_problems = check_startup()
+    results = run_suite(args.sizes)
+    baseline = load_baseline(args.baseline)
+    if not baseline:
+        print(f"ℹ️ No baseline at {args.baseline}; run with --save-baseline to create one.")
+    flagged = compare_to_baseline(results, baseline, args.tolerance)
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"💾 Baseline saved to {args.baseline}")
+        flagged = []
+    if flagged:
+        print(f"⚠️ {len(flagged)} case(s) regressed beyond {args.tolerance:.0%}: {', '.join(flagged)}")
+    if startup_problems:
+        print(f"⚠️ Slow or heavy imports: {'; '.join(startup_problems)}")
+    return 1 if flagged or startup_problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pre-parsed, pruned bibliographies for citeproc.
+
+Passing the full Literature.bib to every pandoc run makes each conversion
+re-parse the whole library. BibliographyCache splits it once into its
+entries and stores them as JSON (<cache_dir>/<stem>-<hash>.json, named after
+the hash of the .bib file, so an edited bibliography is re-parsed). For each
+glossary entry it then writes a minimal .bib holding only the cited entries,
+the entries they crossref and all @string/@preamble definitions.
+
+Entries are copied verbatim rather than converted to CSL-JSON: the CSL-JSON
+round trip loses TeX math and {case protection} in titles. Pruning does not
+change the output, since citeproc only formats (and disambiguates) the
+references a document actually cites.
+"""
+
+import os
+import re
+import json
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from typing import Union, Dict, Iterable, List
+
+from buildcache import hash_file
+
+PathLike = Union[str, Path]
+
+CACHE_VERSION = 1
+
+ENTRY_START_RE = re.compile(r"@\s*([A-Za-z]+)\s*\{")
+BRACE_RE = re.compile(r"[{}]")
+CROSSREF_RE = re.compile(r"\b(?:crossref|xdata)\s*=\s*[{\"]?\s*([^},\"]+)", re.IGNORECASE)
+
+# Blocks every pruned file keeps (macros may be used by any entry)
+SHARED_TYPES = {"string", "preamble"}
+
+
+def _matching_brace(text: str, start: int) -> int:
+    """
+    BibTeX brace matching: every brace counts (no escapes, '%' is not a comment
+    inside entries, e.g. in URLs).
+    """
+    depth = 0
+    for m in BRACE_RE.finditer(text, start):
+        depth += 1 if m.group(0) == "{" else -1
+        if depth == 0:
+            return m.start()
+    raise ValueError("Unbalanced braces in bibliography.")
+
+
+def parse_bib_entries(text: str) -> Dict[str, object]:
+    """
+    Split a .bib file into {"shared": [block, ...], "entries": {key: block},
+    "crossrefs": {key: [parent, ...]}}. Blocks are the verbatim source.
+    """
+    shared: List[str] = []
+    entries: Dict[str, str] = {}
+    crossrefs: Dict[str, List[str]] = {}
+    pos = 0
+    while True:
+        m = ENTRY_START_RE.search(text, pos)
+        if not m:
+            break
+        end = _matching_brace(text, m.end() - 1)
+        block = text[m.start() : end + 1]
+        entry_type = m.group(1).lower()
+        pos = end + 1
+
+        if entry_type == "comment":
+            continue
+        if entry_type in SHARED_TYPES:
+            shared.append(block)
+            continue
+
+        key = text[m.end() : end].split(",", 1)[0].strip()
+        entries[key] = block
+        parents = [p.strip() for cm in CROSSREF_RE.finditer(block) for p in cm.group(1).split(",") if p.strip()]
+        if parents:
+            crossrefs[key] = parents
+    return {"shared": shared, "entries": entries, "crossrefs": crossrefs}
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+class BibliographyCache:
+    """
+    Parsed entries of a .bib file plus pruned per-entry bibliographies.
+    """
+
+    def __init__(self, bib_file: PathLike, cache_dir: PathLike):
+        self.bib_file = Path(bib_file).expanduser().resolve()
+        self.cache_dir = Path(cache_dir).expanduser().resolve()
+        self._parsed: Dict[str, object] | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def index_path(self) -> Path:
+        return self.cache_dir / f"{self.bib_file.stem}-{hash_file(self.bib_file)[:16]}.json"
+
+    def load(self) -> Dict[str, object] | None:
+        """
+        The parsed bibliography, from the JSON cache or parsed (and cached) now.
+        None if the .bib file cannot be split; callers then use the full file.
+        """
+        with self._lock:
+            if self._parsed is None:
+                path = self.index_path
+                try:
+                    data = json.loads(path.read_text(encoding="utf-8"))
+                    if data.get("version") != CACHE_VERSION:
+                        raise ValueError("stale cache version")
+                except (OSError, ValueError):
+                    try:
+                        data = parse_bib_entries(self.bib_file.read_text(encoding="utf-8"))
+                    except (ValueError, UnicodeDecodeError) as e:
+                        print(f"⚠️ Could not pre-parse {self.bib_file.name} ({e}); using the full bibliography.")
+                        data = {"version": CACHE_VERSION, "error": str(e)}
+                    else:
+                        data["version"] = CACHE_VERSION
+                        print(f"📖 Pre-parsed {len(data['entries'])} bibliography entries from {self.bib_file.name}.")
+                    self.cache_dir.mkdir(parents=True, exist_ok=True)
+                    _write_atomic(path, json.dumps(data, ensure_ascii=False))
+                self._parsed = data
+            return None if "error" in self._parsed else self._parsed
+
+    def _selection(self, keys: Iterable[str]) -> str | None:
+        """
+        Text of the pruned bibliography for keys, or None for the full file.
+        """
+        keys = set(keys)
+        parsed = self.load()
+        if parsed is None or "*" in keys:
+            return None
+
+        entries, crossrefs = parsed["entries"], parsed["crossrefs"]
+        wanted = set()
+        todo = [k for k in keys if k in entries]
+        while todo:
+            key = todo.pop()
+            if key in wanted:
+                continue
+            wanted.add(key)
+            todo.extend(p for p in crossrefs.get(key, []) if p in entries)
+
+        # Keep the original order (crossref parents may have to follow their children).
+        blocks = parsed["shared"] + [block for key, block in entries.items() if key in wanted]
+        return "\n\n".join(blocks) + "\n"
+
+    def digest(self, keys: Iterable[str]) -> str | None:
+        """
+        Content hash of what pruned(keys) would contain, without writing it
+        (None if pruned(keys) is the full bibliography).
+        """
+        text = self._selection(keys)
+        return None if text is None else hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def pruned(self, keys: Iterable[str]) -> Path:
+        """
+        A .bib file with only the given keys and the entries they crossref
+        (unknown keys are left for pandoc to warn about). Files are
+        content-addressed, so entries citing the same keys share one file.
+        A '*' (\\nocite{*}) selects the full bibliography.
+        """
+        text = self._selection(keys)
+        if text is None:
+            return self.bib_file
+        path = self.cache_dir / f"cited-{hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]}.bib"
+        if not path.exists():
+            _write_atomic(path, text)
+        return path
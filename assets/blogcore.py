@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Light core of the blog publishing pipeline: parsing the expanded glossary
+sources and the pure text transforms on entries and Pandoc output.
+
+Only the standard library and the small local scanners are imported here,
+so short-lived tools (pre-commit hooks, the benchmarks) can use these
+functions without importing the rest of the pipeline (build cache,
+process pools, rasterizers). MakeBlogPost re-exports everything below.
+"""
+
+import re
+from pathlib import Path
+from typing import Union, Dict, Iterator, Tuple
+
+from texscan import extract_balanced_braces
+from glossarystream import description_from_body, glossary_source_files
+
+PathLike = Union[str, Path]
+
+
+# ---------- Glossary sources ----------
+
+NEW_ENTRY_RE = re.compile(r"\\newglossaryentry\{([^}]+)\}\s*\{", re.DOTALL)
+
+def iter_newglossaryentry_blocks(tex: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (key, body_text) for each \\newglossaryentry{key}{body}.
+    """
+    pos = 0
+    while True:
+        m = NEW_ENTRY_RE.search(tex, pos)
+        if not m:
+            break
+        key = m.group(1).strip()
+        body_open_brace_idx = m.end() - 1  # points to '{' starting the body
+        body, next_pos = extract_balanced_braces(tex, body_open_brace_idx)
+        yield key, body
+        pos = next_pos
+
+def parse_glossary(tex: str) -> Dict[str, str]:
+    """
+    Return dict: key -> description text (value of description={...})
+    """
+    glossary: Dict[str, str] = {}
+
+    for key, body in iter_newglossaryentry_blocks(tex):
+        desc_text = description_from_body(body)  # ignores full-line comments
+        if desc_text is not None:
+            glossary[key] = desc_text
+
+    return glossary
+
+def load_expanded_glossary_sources(source: PathLike) -> str:
+    """
+    Load and concatenate LaTeX content from:
+      - a directory containing ADictML*expanded.tex files, OR
+      - a single .tex file (backwards compatible).
+
+    New naming convention: ADictML******expanded.tex
+    For large dictionaries prefer glossarystream.parse_glossary_sources, which
+    parses file by file without building the concatenated string.
+    """
+    p = Path(source).expanduser()
+
+    if p.is_file():
+        return p.read_text(encoding="utf-8")
+
+    files = glossary_source_files(p)
+
+    print(f"📚 Loading {len(files)} expanded glossary file(s) from: {p}")
+    combined = []
+    for f in files:
+        txt = f.read_text(encoding="utf-8")
+        combined.append(f"% --- BEGIN FILE: {f.name} ---\n{txt}\n% --- END FILE: {f.name} ---\n")
+    return "\n".join(combined)
+
+
+# ---------- Entry text ----------
+
+def extract_tikz_from_entry(entry_text: str) -> str | None:
+    """
+    Try to extract a TikZ picture from the entry text.
+    Returns TikZ code if found, otherwise None.
+    """
+    match = re.search(r'\\begin\{tikzpicture\}.*?\\end\{tikzpicture\}', entry_text, re.DOTALL)
+    if match:
+        return match.group(0)
+
+    # Fallback for custom {tikzpicture} ... {tikzpicture} style
+    match = re.search(r'\{tikzpicture\}.*?\{tikzpicture\}', entry_text, re.DOTALL)
+    if match:
+        tikz_inner = match.group(0)[13:-13].strip()
+        return f"\\begin{{tikzpicture}}\n{tikz_inner}\n\\end{{tikzpicture}}"
+
+    return None
+
+
+def replace_tikz_with_includegraphics(description: str, image_path: str) -> str:
+    """
+    Replace the TikZ block in the description with a single \\includegraphics command.
+    """
+    include_cmd = fr"\\includegraphics[width=0.8\\linewidth]{{{image_path}}}"
+    return re.sub(
+        r'\\begin\{tikzpicture\}.*?\\end\{tikzpicture\}',
+        include_cmd,
+        description,
+        count=1,
+        flags=re.DOTALL
+    )
+
+
+def term_slug(term: str) -> str:
+    """
+    Turn a glossary key into a filename slug (letters, digits and '-').
+    """
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", term).strip("-")
+    return slug or "entry"
+
+
+# ---------- Pandoc output ----------
+
+def convert_pandoc_figures_to_html(md_text: str) -> str:
+    """
+    Converts Pandoc-style image+caption blocks to HTML <figure> with <figcaption>,
+    preserving inline LaTeX and width attributes.
+    """
+    figure_pattern = re.compile(r'!\[([^\]]+)\]\(([^)]+)\)\{([^}]*)\}', flags=re.DOTALL)
+
+    def repl(match: re.Match) -> str:
+        caption = match.group(1).strip()
+        img_path = match.group(2).strip()
+        attr_string = match.group(3).strip()
+
+        width_match = re.search(r'width\s*=\s*["\']?([\d.]+%)["\']?', attr_string)
+        width_attr = f' width="{width_match.group(1)}"' if width_match else ''
+
+        id_match = re.search(r'#([a-zA-Z0-9\-_]+)', attr_string)
+        id_attr = f' id="{id_match.group(1)}"' if id_match else ''
+
+        alt_attr = caption.replace('"', '')
+
+        return (
+            f'<figure{id_attr}>\n'
+            f'  <img src="{img_path}" alt="{alt_attr}"{width_attr}>\n'
+            f'  <figcaption>\n'
+            f'    {caption}\n'
+            f'  </figcaption>\n'
+            f'</figure>'
+        )
+
+    return figure_pattern.sub(repl, md_text)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Content-addressed on-disk cache for the blog publishing pipeline.
+
+Build stages (pdflatex + convert, pandoc) hash their inputs into a key and
+store their output file under that key. A later run with the same inputs
+copies the cached file instead of launching the external tool again.
+
+Objects live in <root>/objects/<key[:2]>/<key>. The mtime of an object is
+its "last used" time; evict() drops the least recently used objects until
+the cache fits into max_bytes.
+"""
+
+import os
+import shutil
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from typing import Union, Dict, Tuple, List
+
+import buildtrace
+
+PathLike = Union[str, Path]
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3   # 2 GiB
+
+_file_hash_memo: Dict[str, Tuple[int, int, str]] = {}   # resolved path -> (mtime_ns, size, sha256)
+
+
+def hash_file(path: PathLike) -> str:
+    """
+    SHA-256 of a file's content, memoized on (path, mtime, size) so that a large
+    Literature.bib is hashed only once per process. A file rewritten with the
+    same size within the filesystem's timestamp granularity keeps its old memo
+    entry, so whoever rewrites a hashed file must call forget(path).
+    """
+    p = Path(path)
+    st = p.stat()
+    resolved = str(p.resolve())
+    memo = _file_hash_memo.get(resolved)
+    if memo is None or memo[:2] != (st.st_mtime_ns, st.st_size):
+        h = hashlib.sha256()
+        with open(p, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        memo = (st.st_mtime_ns, st.st_size, h.hexdigest())
+        _file_hash_memo[resolved] = memo
+    return memo[2]
+
+
+def forget(path: PathLike) -> None:
+    """
+    Drop the memoized hash of a file that has just been (re)written.
+    """
+    _file_hash_memo.pop(str(Path(path).resolve()), None)
+
+
+class BuildCache:
+    """
+    Persistent cache mapping an input hash to one output file.
+    """
+
+    def __init__(self, root: PathLike, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root).expanduser()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # figures may be compiled from several threads
+        (self.root / "objects").mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(*parts: Union[str, bytes]) -> str:
+        """
+        Hash the inputs of a stage. Parts are length-prefixed so that
+        ("ab", "c") and ("a", "bc") never share a key.
+        """
+        h = hashlib.sha256()
+        for part in parts:
+            data = part.encode("utf-8") if isinstance(part, str) else part
+            h.update(len(data).to_bytes(8, "little"))
+            h.update(data)
+        return h.hexdigest()
+
+    def _object_path(self, key: str) -> Path:
+        return self.root / "objects" / key[:2] / key
+
+    def get(self, key: str, dest: PathLike) -> bool:
+        """
+        Copy the cached object for key to dest. Returns False on a miss.
+        """
+        obj = self._object_path(key)
+        try:
+            os.makedirs(Path(dest).parent, exist_ok=True)
+            shutil.copyfile(obj, dest)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            buildtrace.count("cache_misses")
+            return False
+        try:
+            os.utime(obj)  # mark as recently used
+        except FileNotFoundError:
+            pass  # evicted by a concurrent run in the meantime; the copy is still valid
+        with self._lock:
+            self.hits += 1
+        buildtrace.count("cache_hits")
+        return True
+
+    def put(self, key: str, src: PathLike) -> None:
+        """
+        Store a copy of src under key. The write is atomic, so concurrent
+        workers storing the same key never expose a partial object.
+        """
+        obj = self._object_path(key)
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=obj.parent)
+        os.close(fd)
+        try:
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, obj)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+    def _objects(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        for obj in (self.root / "objects").glob("*/*"):
+            if obj.name.startswith(".tmp-"):
+                continue
+            try:
+                st = obj.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, obj))
+        return entries
+
+    def evict(self) -> int:
+        """
+        Delete least recently used objects until the cache fits into max_bytes.
+        Returns the number of removed objects.
+        """
+        entries = sorted(self._objects())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, obj in entries:
+            if total <= self.max_bytes:
+                break
+            obj.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        entries = self._objects()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+    def report(self) -> str:
+        s = self.stats()
+        lookups = s["hits"] + s["misses"]
+        hit_rate = 100.0 * s["hits"] / lookups if lookups else 0.0
+        return (
+            f"📦 Build cache {self.root}: {s['hits']} hit(s), {s['misses']} miss(es) "
+            f"({hit_rate:.0f}% hit rate), {s['entries']} object(s), "
+            f"{s['bytes'] / 1024 ** 2:.1f} / {s['max_bytes'] / 1024 ** 2:.0f} MiB"
+        )
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+A small make-like build graph for the blog publishing pipeline.
+
+Every BuildNode declares what it is built from: other nodes (their output
+files), external files and plain values such as the entry text or the
+raster options. Its signature is a hash over the content of all of these.
+A node is rebuilt when its signature differs from the one saved after its
+last successful build, or when one of its outputs is missing or was
+modified since. Because the signature uses the *content* of upstream
+outputs, a rebuilt node whose output comes out unchanged does not make its
+dependents stale (early cut-off).
+
+Independent nodes run in parallel in a thread pool; the stages mostly wait
+for pdflatex and pandoc.
+"""
+
+import os
+import json
+import tempfile
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Union, Callable, Dict, Iterable, List, NamedTuple
+
+from buildcache import BuildCache, hash_file, forget
+import buildtrace
+
+PathLike = Union[str, Path]
+
+STATE_VERSION = 1
+
+
+class BuildNode:
+    """
+    One build step. action() must (re)create all outputs; it may raise to fail.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        action: Callable[[], None],
+        outputs: Iterable[PathLike] = (),
+        deps: Iterable[str] = (),
+        files: Iterable[PathLike] = (),
+        values: Iterable[str] = ()
+    ):
+        self.name = name
+        self.action = action
+        self.outputs = [Path(p).resolve() for p in outputs]
+        self.deps = list(deps)
+        self.files = [Path(p).resolve() for p in files]
+        self.values = list(values)
+
+
+class BuildReport(NamedTuple):
+    rebuilt: List[str]
+    up_to_date: List[str]
+    failed: Dict[str, str]     # node -> error (dependents of a failed node included)
+    planned: Dict[str, str]    # dry run: node -> reason it would be rebuilt
+
+
+def _output_hashes(node: BuildNode) -> Dict[str, str] | None:
+    """
+    Content hashes of the node's outputs, or None if one is missing.
+    """
+    hashes = {}
+    for path in node.outputs:
+        if not path.exists():
+            return None
+        hashes[str(path)] = hash_file(path)
+    return hashes
+
+
+class BuildGraph:
+    """
+    Nodes plus the saved state of their last successful builds.
+    """
+
+    def __init__(self, state_path: PathLike):
+        self.state_path = Path(state_path).expanduser().resolve()
+        self.nodes: Dict[str, BuildNode] = {}
+        self.state: Dict[str, Dict] = self._load_state()
+
+    # ---------- graph ----------
+
+    def add(self, node: BuildNode) -> BuildNode:
+        if node.name in self.nodes:
+            raise ValueError(f"Duplicate build node: {node.name}")
+        self.nodes[node.name] = node
+        return node
+
+    def topological_order(self) -> List[str]:
+        order, visiting, done = [], set(), set()
+
+        def visit(name: str) -> None:
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through build node: {name}")
+            if name not in self.nodes:
+                raise KeyError(f"Unknown build node: {name}")
+            visiting.add(name)
+            for dep in self.nodes[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name)
+        return order
+
+    # ---------- state ----------
+
+    def _load_state(self) -> Dict[str, Dict]:
+        try:
+            data = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+        return data.get("nodes", {}) if data.get("version") == STATE_VERSION else {}
+
+    def save_state(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=self.state_path.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": STATE_VERSION, "nodes": self.state}, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.state_path)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+    # ---------- staleness ----------
+
+    def signature(self, name: str) -> str:
+        """
+        Hash of everything the node is built from. Upstream outputs must exist.
+        """
+        node = self.nodes[name]
+        parts: List[str] = [name, *node.values]
+        for path in node.files:
+            parts += [str(path), hash_file(path)]
+        for dep in node.deps:
+            hashes = _output_hashes(self.nodes[dep])
+            if hashes is None:
+                raise FileNotFoundError(f"Outputs of '{dep}' missing while checking '{name}'.")
+            parts += [dep, json.dumps(hashes, sort_keys=True)]
+        return BuildCache.key(*parts)
+
+    def stale_reason(self, name: str) -> str | None:
+        """
+        Why the node has to be rebuilt (None if it is up to date), assuming its
+        dependencies are up to date.
+        """
+        saved = self.state.get(name)
+        if saved is None:
+            return "never built"
+        outputs = _output_hashes(self.nodes[name])
+        if outputs is None:
+            return "output missing"
+        if outputs != saved["outputs"]:
+            return "output modified"
+        if self.signature(name) != saved["signature"]:
+            return "inputs changed"
+        return None
+
+    # ---------- building ----------
+
+    def plan(self) -> Dict[str, str]:
+        """
+        Dry run: node -> reason, for every node a build would (re)run. A node
+        below a stale node is listed as possibly stale, since early cut-off
+        can only be decided once the upstream node has been rebuilt.
+        """
+        planned: Dict[str, str] = {}
+        for name in self.topological_order():
+            stale_deps = [d for d in self.nodes[name].deps if d in planned]
+            if stale_deps:
+                planned[name] = f"depends on {', '.join(stale_deps)}"
+                continue
+            reason = self.stale_reason(name)
+            if reason:
+                planned[name] = reason
+        return planned
+
+    def build(self, max_workers: int | None = None, dry_run: bool = False) -> BuildReport:
+        """
+        Rebuild stale nodes, independent ones in parallel, and save the state.
+        A failed node fails its dependents; everything else is still built.
+        """
+        if dry_run:
+            return BuildReport([], [], {}, self.plan())
+
+        order = self.topological_order()
+        waiting = {name: set(self.nodes[name].deps) for name in order}
+        dependents: Dict[str, List[str]] = {name: [] for name in order}
+        for name in order:
+            for dep in self.nodes[name].deps:
+                dependents[dep].append(name)
+
+        rebuilt: List[str] = []
+        up_to_date: List[str] = []
+        failed: Dict[str, str] = {}
+
+        def run(name: str) -> str | None:
+            """
+            Check and, if stale, rebuild one node. Returns the stale reason.
+            """
+            node = self.nodes[name]
+            reason = self.stale_reason(name)
+            if reason is None:
+                return None
+            signature = self.signature(name)
+            with buildtrace.span(name, cat="build", reason=reason):
+                node.action()
+            for path in node.outputs:
+                forget(path)   # rewritten: the (mtime, size) memo may be stale
+            outputs = _output_hashes(node)
+            if outputs is None:
+                raise FileNotFoundError(f"'{name}' did not produce all of its outputs.")
+            self.state[name] = {"signature": signature, "outputs": outputs}
+            return reason
+
+        def fail(name: str, error: str) -> None:
+            failed[name] = error
+            for child in dependents[name]:
+                if child not in failed:
+                    fail(child, f"dependency '{name}' failed")
+
+        ready = [name for name in order if not waiting[name]]
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            running = {}
+            while ready or running:
+                for name in ready:
+                    running[pool.submit(run, name)] = name
+                ready = []
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    name = running.pop(fut)
+                    try:
+                        reason = fut.result()
+                    except Exception as e:
+                        print(f"❌ {name}: {e}")
+                        self.state.pop(name, None)
+                        fail(name, str(e))
+                        continue
+                    if reason:
+                        print(f"🔨 Rebuilt {name} ({reason})")
+                        rebuilt.append(name)
+                    else:
+                        up_to_date.append(name)
+                    for child in dependents[name]:
+                        waiting[child].discard(name)
+                        if not waiting[child] and child not in failed:
+                            ready.append(child)
+
+        self.save_state()
+        return BuildReport(rebuilt, up_to_date, failed, {})
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Optional timing instrumentation for the blog publishing pipeline.
+
+Pipeline stages wrap their work in span("name", term=...). While tracing is
+disabled (the default) a span costs one flag check. Once enable() was
+called, every span records its wall time plus counters that its nested
+spans and the code inside add to:
+
+    tool_ms        time spent in external tools (spans opened with tool=True:
+                   pdflatex, rasterization, pandoc)
+    bytes_read     bytes_written     cache_hits     cache_misses
+
+Counters add up into the enclosing spans, so the span of a term reports the
+totals of all its stages. Events are collected per process; pool workers
+hand theirs back with drain() and the parent merges them with record().
+write_chrome_trace() writes a JSON file for chrome://tracing (or Perfetto),
+summary_table() a per-stage overview and the slowest terms.
+"""
+
+import os
+import json
+import time
+import threading
+import contextvars
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Union, Dict, Iterator, List
+
+PathLike = Union[str, Path]
+
+COUNTERS = ("bytes_read", "bytes_written", "cache_hits", "cache_misses")
+
+_enabled = False
+_events: List[Dict] = []
+_lock = threading.Lock()
+_current: contextvars.ContextVar = contextvars.ContextVar("buildtrace_span", default=None)
+
+
+class _Span:
+    __slots__ = ("parent", "args", "counters", "tool_s")
+
+    def __init__(self, parent: "_Span | None", args: Dict):
+        self.parent = parent
+        self.args = args
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.tool_s = 0.0
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = on
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+@contextmanager
+def span(name: str, cat: str = "stage", tool: bool = False, **args) -> Iterator[None]:
+    """
+    Time the enclosed block as one trace event. The term argument (if any) is
+    inherited from the enclosing span.
+    """
+    if not _enabled:
+        yield
+        return
+
+    parent = _current.get()
+    if "term" not in args and parent is not None and "term" in parent.args:
+        args["term"] = parent.args["term"]
+    current = _Span(parent, args)
+    token = _current.set(current)
+    start_us = time.time_ns() // 1000
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        _current.reset(token)
+        if tool:
+            current.tool_s += elapsed
+        if parent is not None:
+            parent.tool_s += current.tool_s
+            for key, value in current.counters.items():
+                parent.counters[key] += value
+
+        event_args = dict(args)
+        event_args.update((k, v) for k, v in current.counters.items() if v)
+        if current.tool_s:
+            event_args["tool_ms"] = round(current.tool_s * 1000, 3)
+        event = {
+            "name": name, "cat": cat, "ph": "X",
+            "ts": start_us, "dur": round(elapsed * 1e6, 1),
+            "pid": os.getpid(), "tid": threading.get_ident(),
+            "args": event_args,
+        }
+        with _lock:
+            _events.append(event)
+
+
+def count(key: str, n: int = 1) -> None:
+    """
+    Add n to a counter (see COUNTERS) of the innermost open span.
+    """
+    if _enabled:
+        current = _current.get()
+        if current is not None:
+            current.counters[key] += n
+
+
+def drain() -> List[Dict]:
+    """
+    Return and clear the events recorded in this process.
+    """
+    with _lock:
+        events = list(_events)
+        _events.clear()
+    return events
+
+
+def record(events: List[Dict]) -> None:
+    """
+    Merge events recorded elsewhere (e.g. in a pool worker).
+    """
+    with _lock:
+        _events.extend(events)
+
+
+def write_chrome_trace(path: PathLike, events: List[Dict] | None = None) -> Path:
+    path = Path(path)
+    events = drain() if events is None else events
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding="utf-8")
+    return path
+
+
+def summary_table(events: List[Dict], top_terms: int = 10) -> str:
+    """
+    Per-stage totals (count, wall time, tool time, bytes, cache hits/misses),
+    followed by the slowest terms.
+    """
+    stages: Dict[str, Dict[str, float]] = {}
+    for e in events:
+        s = stages.setdefault(e["name"], dict(count=0, wall_ms=0.0, max_ms=0.0, tool_ms=0.0, **dict.fromkeys(COUNTERS, 0)))
+        dur_ms = e["dur"] / 1000
+        s["count"] += 1
+        s["wall_ms"] += dur_ms
+        s["max_ms"] = max(s["max_ms"], dur_ms)
+        s["tool_ms"] += e["args"].get("tool_ms", 0.0)
+        for key in COUNTERS:
+            s[key] += e["args"].get(key, 0)
+
+    lines = [
+        f"{'stage':24s} {'n':>6s} {'wall s':>9s} {'max ms':>9s} {'tool s':>8s} "
+        f"{'read MB':>8s} {'write MB':>8s} {'hits':>6s} {'misses':>6s}"
+    ]
+    for name, s in sorted(stages.items(), key=lambda kv: -kv[1]["wall_ms"]):
+        lines.append(
+            f"{name[:24]:24s} {s['count']:6d} {s['wall_ms'] / 1000:9.3f} {s['max_ms']:9.1f} {s['tool_ms'] / 1000:8.3f} "
+            f"{s['bytes_read'] / 1e6:8.2f} {s['bytes_written'] / 1e6:8.2f} {s['cache_hits']:6d} {s['cache_misses']:6d}"
+        )
+
+    terms = sorted((e for e in events if e["name"] == "term"), key=lambda e: -e["dur"])[:top_terms]
+    if terms:
+        lines.append("")
+        lines.append(f"Slowest terms (of {sum(1 for e in events if e['name'] == 'term')}):")
+        for e in terms:
+            lines.append(
+                f"  {e['args'].get('term', '?'):30s} {e['dur'] / 1000:9.1f} ms   "
+                f"tool {e['args'].get('tool_ms', 0.0):9.1f} ms   "
+                f"hits {e['args'].get('cache_hits', 0)}  misses {e['args'].get('cache_misses', 0)}"
+            )
+    return "\n".join(lines)
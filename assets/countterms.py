@@ -1,25 +1,42 @@
 # -*- coding: utf-8 -*-
 """
 Count glossary entries by type for ADictML.
-Spyder-friendly version (no CLI args).
+Spyder-friendly: without CLI args it prints the counts by type.
+
+Statistics per type and per source file (entries, description size, TikZ
+figures, citations, \\gls cross references) can be written for CI:
+
+    python countterms.py --json stats.json --csv stats.csv
 
 Assumptions:
 - This script is located in a subfolder (e.g. assets/)
 - The main TeX file is one folder above this script
 """
 
+import os
 import re
+import csv
+import json
+import argparse
 from pathlib import Path
-from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from texscan import find_matching_brace, strip_comments, GLS_REF_RE, cited_keys
+from glossarystream import description_from_body
+from blogcore import extract_tikz_from_entry
 
 # ---------------- Configuration ----------------
 
 MAIN_TEX_NAME = "ADictML_English.tex"
 DEFAULT_TYPE = "ML"
+CACHE_NAME = ".countterms_cache.json"   # per-file scan cache, next to this script
+MAX_WORKERS = 8
 
 # -----------------------------------------------
 
-INPUT_RE = re.compile(r'\\input\{([^}]+)\}')
+CACHE_VERSION = 3
+STAT_FIELDS = ["entries", "description_chars", "tikz_figures", "citations", "gls_refs"]
+INCLUDE_RE = re.compile(r'\\(?:input|include|subfile)\{([^}]+)\}')
 NEW_ENTRY_RE = re.compile(r'\\newglossaryentry\s*\{[^}]+\}\s*\{', re.MULTILINE)
 TYPE_RE = re.compile(r'type\s*=\s*([a-zA-Z]+)')
 
@@ -29,70 +46,182 @@ def read_tex(path):
     except UnicodeDecodeError:
         return path.read_text(encoding="latin1")
 
-def find_matching_brace(text, start):
-    depth = 0
-    for i in range(start, len(text)):
-        if text[i] == "{":
-            depth += 1
-        elif text[i] == "}":
-            depth -= 1
-            if depth == 0:
-                return i
-    raise ValueError(f"Unmatched brace in file")
-
 def extract_glossary_entries(text):
     for m in NEW_ENTRY_RE.finditer(text):
         brace_start = m.end() - 1
         brace_end = find_matching_brace(text, brace_start)
         yield text[brace_start + 1 : brace_end]
 
-def collect_tex_files(main_file):
-    seen = set()
-    stack = [main_file]
-
-    while stack:
-        current = stack.pop()
-        if current in seen or not current.exists():
-            continue
-        seen.add(current)
-
-        text = read_tex(current)
-        for m in INPUT_RE.finditer(text):
-            fname = m.group(1)
-            if not fname.endswith(".tex"):
-                fname += ".tex"
-            stack.append((current.parent / fname).resolve())
-
-    return seen
+def entry_type(entry_body):
+    m = TYPE_RE.search(entry_body)
+    return m.group(1) if m else DEFAULT_TYPE
+
+def entry_stats(entry_body):
+    description = description_from_body(entry_body) or ""
+    return {
+        "type": entry_type(entry_body),
+        "description_chars": len(description),
+        # The figure MakeBlogPost publishes (also the bare {tikzpicture}...{tikzpicture} form)
+        "tikz_figures": 1 if extract_tikz_from_entry(entry_body) else 0,
+        "citations": len(cited_keys(entry_body)),
+        "gls_refs": len(GLS_REF_RE.findall(entry_body)),
+    }
+
+def included_files(path, text):
+    children = []
+    for m in INCLUDE_RE.finditer(strip_comments(text)):
+        fname = m.group(1).strip()
+        if not fname.endswith(".tex"):
+            fname += ".tex"
+        children.append(str((path.parent / fname).resolve()))
+    return children
+
+def scan_file(path, stat):
+    """Read a TeX file once: its \\input/\\include/\\subfile children and per-entry statistics."""
+    text = read_tex(path)
+    return {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "children": included_files(path, text),
+        "entries": [entry_stats(body) for body in extract_glossary_entries(text)],
+    }
+
+def load_cache(cache_path):
+    try:
+        data = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+    return data.get("files", {}) if data.get("version") == CACHE_VERSION else {}
+
+def save_cache(cache_path, files):
+    tmp = cache_path.with_name(cache_path.name + ".tmp")
+    tmp.write_text(json.dumps({"version": CACHE_VERSION, "files": files}), encoding="utf-8")
+    os.replace(tmp, cache_path)
+
+def _scan_cached(path, cache):
+    """Return (record, rescanned). Unchanged files (same mtime and size) come from the cache."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None, False
+    known = cache.get(str(path))
+    if known and known["mtime_ns"] == stat.st_mtime_ns and known["size"] == stat.st_size:
+        return known, False
+    return scan_file(path, stat), True
+
+def scan_tex_tree(main_file, cache=None, max_workers=MAX_WORKERS):
+    """
+    Walk the include graph from main_file level by level, scanning each level in a
+    thread pool. Returns (files, rescanned): path -> record (children = dependency
+    graph edges) and the list of files that actually had to be read.
+    """
+    cache = {} if cache is None else cache
+    files = {}
+    rescanned = []
+    frontier = [str(Path(main_file).resolve())]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while frontier:
+            todo = [p for p in dict.fromkeys(frontier) if p not in files]
+            frontier = []
+            for p, (record, fresh) in zip(todo, pool.map(lambda p: _scan_cached(Path(p), cache), todo)):
+                if record is None:
+                    continue  # missing file, as before: silently skipped
+                files[p] = record
+                if fresh:
+                    rescanned.append(p)
+                frontier.extend(record["children"])
+
+    return files, rescanned
 
-def main():
+def collect_tex_files(main_file):
+    files, _ = scan_tex_tree(main_file)
+    return {Path(p) for p in files}
+
+def _empty_stats():
+    return dict.fromkeys(STAT_FIELDS, 0)
+
+def _add_entry(stats, entry):
+    stats["entries"] += 1
+    for field in STAT_FIELDS[1:]:
+        stats[field] += entry[field]
+
+def glossary_statistics(main_tex, cache_path=None, max_workers=MAX_WORKERS):
+    """
+    Statistics of all glossary entries reachable from main_tex, totalled and
+    grouped by entry type and by source file. With cache_path, only files changed
+    since the last run are re-read.
+    """
+    main_tex = Path(main_tex).resolve()
+    cache = load_cache(cache_path) if cache_path else {}
+    files, rescanned = scan_tex_tree(main_tex, cache, max_workers)
+    if cache_path:
+        save_cache(cache_path, files)
+
+    totals = _empty_stats()
+    by_type = {}
+    by_file = {}
+    for path, record in sorted(files.items()):
+        try:
+            name = os.path.relpath(path, main_tex.parent)
+        except ValueError:  # other drive on Windows
+            name = path
+        file_stats = by_file[name] = _empty_stats()
+        for entry in record["entries"]:
+            _add_entry(totals, entry)
+            _add_entry(file_stats, entry)
+            _add_entry(by_type.setdefault(entry["type"], _empty_stats()), entry)
+
+    return {
+        "main_file": str(main_tex),
+        "files_scanned": len(files),
+        "files_reread": len(rescanned),
+        "totals": totals,
+        "by_type": dict(sorted(by_type.items())),
+        "by_file": by_file,
+    }
+
+def write_json(report, path):
+    Path(path).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+def write_csv(report, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["scope", "name"] + STAT_FIELDS)
+        writer.writerow(["total", "TOTAL"] + [report["totals"][k] for k in STAT_FIELDS])
+        for scope in ("type", "file"):
+            for name, stats in report[f"by_{scope}"].items():
+                writer.writerow([scope, name] + [stats[k] for k in STAT_FIELDS])
+
+def main(argv=None):
     script_dir = Path(__file__).resolve().parent
-    main_tex = (script_dir / ".." / MAIN_TEX_NAME).resolve()
 
+    parser = argparse.ArgumentParser(description="Count and describe ADictML glossary entries.")
+    parser.add_argument("--main", default=str(script_dir / ".." / MAIN_TEX_NAME), help="main TeX file")
+    parser.add_argument("--json", metavar="PATH", help="write the statistics report as JSON")
+    parser.add_argument("--csv", metavar="PATH", help="write the statistics report as CSV")
+    parser.add_argument("--no-cache", action="store_true", help="re-read every file")
+    args = parser.parse_args(argv)
+
+    main_tex = Path(args.main).resolve()
     if not main_tex.exists():
         raise FileNotFoundError(f"Main TeX file not found: {main_tex}")
 
-    tex_files = collect_tex_files(main_tex)
-    counts = Counter()
-    total = 0
-
-    for tex in tex_files:
-        text = read_tex(tex)
-        for entry_body in extract_glossary_entries(text):
-            total += 1
-            m = TYPE_RE.search(entry_body)
-            if m:
-                counts[m.group(1)] += 1
-            else:
-                counts[DEFAULT_TYPE] += 1
+    report = glossary_statistics(main_tex, None if args.no_cache else script_dir / CACHE_NAME)
+    if args.json:
+        write_json(report, args.json)
+    if args.csv:
+        write_csv(report, args.csv)
 
     print("\nGlossary entry counts by type")
     print("--------------------------------")
-    for k in sorted(counts):
-        print(f"{k:15s}: {counts[k]:4d}")
+    for k, stats in report["by_type"].items():
+        print(f"{k:15s}: {stats['entries']:4d}")
     print("--------------------------------")
-    print(f"{'TOTAL':15s}: {total:4d}")
-    print(f"\nScanned {len(tex_files)} TeX files.")
+    print(f"{'TOTAL':15s}: {report['totals']['entries']:4d}")
+    n_files, n_reread = report["files_scanned"], report["files_reread"]
+    print(f"\nScanned {n_files} TeX files ({n_reread} re-read, {n_files - n_reread} from cache).")
 
-# Run automatically in Spyder
-main()
+# Run automatically in Spyder (Spyder also runs scripts as __main__)
+if __name__ == "__main__":
+    main()
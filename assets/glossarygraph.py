@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cross-reference graph of the glossary (\\gls{...}, \\Gls{...}, ...).
+
+analyze_glossary() builds the directed reference graph with networkx,
+detects communities (greedy modularity), computes PageRank-style
+centrality and a publishing order, and packs everything into a compact
+GlossaryGraph (CSR adjacency arrays + per-key tables). The result is
+pickled, so publishing tools can look up related posts in O(1) without
+re-parsing the TeX sources.
+
+Usage:
+    python glossarygraph.py <source dir or file> [--out graph.pkl] [--related KEY]
+"""
+
+import pickle
+import argparse
+from array import array
+from pathlib import Path
+from typing import Union, Dict, List
+
+import networkx as nx
+from networkx.algorithms.community import greedy_modularity_communities
+
+from texscan import GLS_REF_RE
+
+PathLike = Union[str, Path]
+
+N_RELATED = 5
+
+
+def build_reference_graph(glossary: Dict[str, str]) -> nx.DiGraph:
+    """
+    Directed graph with an edge term -> ref for every \\gls-style reference in
+    the description of term. References to unknown keys are kept as node
+    attribute 'dangling' of the referring term.
+    """
+    graph = nx.DiGraph()
+    graph.add_nodes_from(glossary)
+    for term, description in glossary.items():
+        dangling = []
+        for m in GLS_REF_RE.finditer(description):
+            ref = m.group(1).strip()
+            if ref == term:
+                continue
+            if ref in glossary:
+                graph.add_edge(term, ref)
+            elif ref not in dangling:
+                dangling.append(ref)
+        graph.nodes[term]["dangling"] = dangling
+    return graph
+
+
+def pagerank(indptr: array, indices: array, damping: float = 0.85, tol: float = 1e-10, max_iter: int = 100) -> List[float]:
+    """
+    Power iteration on the CSR adjacency (node i links to indices[indptr[i]:indptr[i+1]]).
+    Nodes without out-links spread their rank uniformly.
+    """
+    n = len(indptr) - 1
+    if n == 0:
+        return []
+    rank = [1.0 / n] * n
+    for _ in range(max_iter):
+        new = [0.0] * n
+        sink = 0.0
+        for i in range(n):
+            start, end = indptr[i], indptr[i + 1]
+            if start == end:
+                sink += rank[i]
+                continue
+            share = rank[i] / (end - start)
+            for j in indices[start:end]:
+                new[j] += share
+        base = (1.0 - damping + damping * sink) / n
+        new = [base + damping * r for r in new]
+        if sum(abs(a - b) for a, b in zip(new, rank)) < tol:
+            return new
+        rank = new
+    return rank
+
+
+class GlossaryGraph:
+    """
+    Compact, picklable result of analyze_glossary().
+    """
+
+    def __init__(self, graph: nx.DiGraph):
+        self.keys: List[str] = sorted(graph.nodes)
+        self.index: Dict[str, int] = {k: i for i, k in enumerate(self.keys)}
+
+        # CSR arrays for out-references and back-references
+        self.indptr, self.indices = self._csr(graph.successors)
+        self.rev_indptr, self.rev_indices = self._csr(graph.predecessors)
+
+        self.dangling: Dict[str, List[str]] = {
+            k: graph.nodes[k]["dangling"] for k in self.keys if graph.nodes[k].get("dangling")
+        }
+        self.rank: List[float] = pagerank(self.indptr, self.indices)
+
+        self.community = array("i", [0] * len(self.keys))
+        undirected = graph.to_undirected()
+        communities = greedy_modularity_communities(undirected) if undirected.number_of_edges() else [
+            {k} for k in self.keys
+        ]
+        for c, members in enumerate(sorted(communities, key=lambda m: (-len(m), min(m)))):
+            for k in members:
+                self.community[self.index[k]] = c
+
+        self.publishing_order: List[str] = self._publishing_order(graph)
+        self.related_terms: List[List[str]] = [self._related(i) for i in range(len(self.keys))]
+
+    def _csr(self, neighbours) -> tuple:
+        indptr = array("i", [0])
+        indices = array("i")
+        for k in self.keys:
+            indices.extend(sorted(self.index[n] for n in neighbours(k)))
+            indptr.append(len(indices))
+        return indptr, indices
+
+    def _publishing_order(self, graph: nx.DiGraph) -> List[str]:
+        """
+        Referenced entries before the entries that use them (cycles are published
+        together), more central entries first among independent ones.
+        """
+        condensed = nx.condensation(graph.reverse(copy=False))
+        members = condensed.graph["mapping"]
+        scc_rank = {}
+        for k, c in members.items():
+            scc_rank[c] = max(scc_rank.get(c, 0.0), self.rank[self.index[k]])
+        order = []
+        for c in nx.lexicographical_topological_sort(condensed, key=lambda c: (-scc_rank[c], c)):
+            order.extend(sorted(condensed.nodes[c]["members"], key=lambda k: -self.rank[self.index[k]]))
+        return order
+
+    def _related(self, i: int) -> List[str]:
+        neighbours = set(self.indices[self.indptr[i]:self.indptr[i + 1]])
+        neighbours.update(self.rev_indices[self.rev_indptr[i]:self.rev_indptr[i + 1]])
+        neighbours.discard(i)
+        ranked = sorted(neighbours, key=lambda j: (self.community[j] != self.community[i], -self.rank[j]))
+        return [self.keys[j] for j in ranked[:N_RELATED]]
+
+    # ---------- O(1) lookups ----------
+
+    def references(self, key: str) -> List[str]:
+        i = self.index[key]
+        return [self.keys[j] for j in self.indices[self.indptr[i]:self.indptr[i + 1]]]
+
+    def referenced_by(self, key: str) -> List[str]:
+        i = self.index[key]
+        return [self.keys[j] for j in self.rev_indices[self.rev_indptr[i]:self.rev_indptr[i + 1]]]
+
+    def related(self, key: str) -> List[str]:
+        """
+        Up to N_RELATED linked entries, same community and higher rank first.
+        """
+        return self.related_terms[self.index[key]]
+
+    def centrality(self, key: str) -> float:
+        return self.rank[self.index[key]]
+
+    def community_of(self, key: str) -> int:
+        return self.community[self.index[key]]
+
+    # ---------- persistence ----------
+
+    def save(self, path: PathLike) -> None:
+        Path(path).write_bytes(pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL))
+
+    @staticmethod
+    def load(path: PathLike) -> "GlossaryGraph":
+        return pickle.loads(Path(path).read_bytes())
+
+
+def analyze_glossary(glossary: Dict[str, str]) -> GlossaryGraph:
+    return GlossaryGraph(build_reference_graph(glossary))
+
+
+def main() -> None:
+    from glossarystream import parse_glossary_sources
+
+    parser = argparse.ArgumentParser(description="Analyze \\gls cross references of the glossary.")
+    parser.add_argument("source", help="directory with ADictML*expanded.tex files, or a single .tex file")
+    parser.add_argument("--out", default="glossary_graph.pkl", help="where to pickle the graph")
+    parser.add_argument("--related", metavar="KEY", help="print the entries related to KEY")
+    args = parser.parse_args()
+
+    gg = analyze_glossary(parse_glossary_sources(args.source))
+    gg.save(args.out)
+    n_edges = len(gg.indices)
+    n_communities = len(set(gg.community))
+    print(f"🕸️ {len(gg.keys)} entries, {n_edges} references, {n_communities} communities -> {args.out}")
+    for key, refs in sorted(gg.dangling.items()):
+        print(f"⚠️ {key}: dangling reference(s) to {', '.join(refs)}")
+    if args.related:
+        print(f"Related to {args.related}: {', '.join(gg.related(args.related))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent on-disk index of the expanded glossary sources.
+
+For every entry the index stores file, byte offset, length, content hash,
+type and a has-TikZ flag. update() re-parses only files whose mtime/size
+and content hash changed, so looking up one term or asking which entries
+changed since the last publish does not re-scan the whole dictionary.
+Every definition of a key is kept (one per file); the one in the last
+file wins, as in parse_glossary_sources, so removing a redefinition
+falls back to the earlier file without re-parsing it.
+
+Usage:
+    python glossaryindex.py <source dir or file> [--lookup KEY] [--changed]
+"""
+
+import os
+import re
+import json
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Union, Dict, List, Iterable
+
+from glossarystream import (
+    NEW_ENTRY_BYTES_RE, COMMENT_LINE_RE, description_from_body, glossary_source_files, iter_glossary_file
+)
+
+PathLike = Union[str, Path]
+
+INDEX_VERSION = 2
+DEFAULT_TYPE = "ML"
+TYPE_RE = re.compile(r"type\s*=\s*([a-zA-Z]+)")
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class GlossaryIndex:
+    """
+    key -> location/metadata of a glossary entry, persisted as JSON.
+    """
+
+    def __init__(self, source: PathLike, index_path: PathLike | None = None):
+        self.source = Path(source).expanduser().resolve()
+        base = self.source if self.source.is_dir() else self.source.parent
+        self.index_path = Path(index_path) if index_path else base / ".glossary_index.json"
+        self.files: Dict[str, Dict] = {}      # path -> {mtime_ns, size, sha256}
+        self.definitions: Dict[str, Dict[str, Dict]] = {}  # key -> path -> {offset, length, line, hash, type, has_tikz}
+        self.published: Dict[str, str] = {}  # key -> entry hash at the last publish
+        self._load()
+
+    # ---------- persistence ----------
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return
+        if data.get("version") != INDEX_VERSION:
+            return
+        self.files = data.get("files", {})
+        self.definitions = data.get("definitions", {})
+        self.published = data.get("published", {})
+
+    def save(self) -> None:
+        data = {
+            "version": INDEX_VERSION, "files": self.files, "definitions": self.definitions, "published": self.published
+        }
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=self.index_path.parent)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.index_path)
+
+    @property
+    def entries(self) -> Dict[str, Dict]:
+        """
+        key -> {file, offset, length, line, hash, type, has_tikz} of the winning
+        definition (the one in the last file, as in parse_glossary_sources).
+        """
+        return {key: self._entry(key) for key in self.definitions}
+
+    def _entry(self, key: str) -> Dict | None:
+        by_file = self.definitions.get(key)
+        if not by_file:
+            return None
+        path = max(by_file)
+        return {"file": path, **by_file[path]}
+
+    # ---------- incremental update ----------
+
+    def _forget_files(self, paths: Iterable[str]) -> None:
+        paths = set(paths)
+        for key in list(self.definitions):
+            by_file = self.definitions[key]
+            for path in paths & by_file.keys():
+                del by_file[path]
+            if not by_file:
+                del self.definitions[key]
+
+    def _index_file(self, path: Path, data: bytes) -> None:
+        self._forget_files([str(path)])
+        for rec in iter_glossary_file(path):
+            raw = data[rec.offset : rec.offset + rec.length]
+            body = COMMENT_LINE_RE.sub("", raw.decode("utf-8"))
+            m = TYPE_RE.search(body)
+            self.definitions.setdefault(rec.key, {})[str(path)] = {
+                "offset": rec.offset,
+                "length": rec.length,
+                "line": rec.line,
+                "hash": _sha256(raw),
+                "type": m.group(1) if m else DEFAULT_TYPE,
+                "has_tikz": "{tikzpicture}" in rec.description,
+            }
+
+    def _refresh_file(self, path: Path) -> bool:
+        """
+        Re-index path if it changed. Returns True if its entries were re-parsed.
+        """
+        st = path.stat()
+        known = self.files.get(str(path))
+        if known and known["mtime_ns"] == st.st_mtime_ns and known["size"] == st.st_size:
+            return False
+
+        data = path.read_bytes()
+        digest = _sha256(data)
+        changed = not known or known["sha256"] != digest
+        if changed:
+            self._index_file(path, data)
+        self.files[str(path)] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": digest}
+        return changed
+
+    def update(self, save: bool = True) -> List[Path]:
+        """
+        Bring the index up to date with the sources; returns the re-parsed files.
+        """
+        paths = [p.resolve() for p in glossary_source_files(self.source)]
+        current = {str(p) for p in paths}
+        changed = [p for p in paths if self._refresh_file(p)]
+
+        removed = [f for f in self.files if f not in current]
+        for f in removed:
+            del self.files[f]
+        self._forget_files(removed)
+
+        if save and (changed or removed):
+            self.save()
+        return changed
+
+    # ---------- queries ----------
+
+    def lookup(self, key: str) -> str:
+        """
+        Description of one entry, read directly from its byte range.
+        The entry's file is re-indexed first if it changed on disk.
+        """
+        entry = self._entry(key)
+        if entry is None or self._refresh_file(Path(entry["file"])):
+            self.update(save=False)
+            self.save()
+            entry = self._entry(key)
+        if entry is None:
+            raise KeyError(f"Term '{key}' not found in glossary index {self.index_path}.")
+
+        with open(entry["file"], "rb") as f:
+            f.seek(entry["offset"])
+            raw = f.read(entry["length"])
+        m = NEW_ENTRY_BYTES_RE.match(raw)
+        description = description_from_body(raw[m.end() : -1].decode("utf-8")) if m else None
+        if description is None:
+            raise KeyError(f"Term '{key}' has no description at {entry['file']}:{entry['line']}.")
+        return description
+
+    def changed_since_publish(self) -> List[str]:
+        """
+        Keys that are new or whose entry text changed since mark_published.
+        """
+        return sorted(k for k, e in self.entries.items() if self.published.get(k) != e["hash"])
+
+    def mark_published(self, keys: Iterable[str], save: bool = True) -> None:
+        for key in keys:
+            self.published[key] = self._entry(key)["hash"]
+        if save:
+            self.save()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build/query the persistent glossary index.")
+    parser.add_argument("source", help="directory with ADictML*expanded.tex files, or a single .tex file")
+    parser.add_argument("--index", help="index file (default: <source>/.glossary_index.json)")
+    parser.add_argument("--lookup", metavar="KEY", help="print the description of one entry")
+    parser.add_argument("--changed", action="store_true", help="list entries changed since the last publish")
+    args = parser.parse_args()
+
+    index = GlossaryIndex(args.source, args.index)
+    changed_files = index.update()
+    print(f"🗂️ Indexed {len(index.entries)} entries ({len(changed_files)} file(s) re-parsed).")
+
+    if args.lookup:
+        print(index.lookup(args.lookup))
+    if args.changed:
+        for key in index.changed_since_publish():
+            print(key)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streaming parser for the ADictML*expanded.tex glossary sources.
+
+Each file is memory-mapped and scanned for \\newglossaryentry{key}{body}
+blocks; only the body of the current entry is copied and decoded. Records
+are yielded lazily together with their source location, so peak memory is
+bounded by the largest single entry and errors point to file and line.
+"""
+
+import re
+import mmap
+from pathlib import Path
+from typing import Union, Dict, Iterator, List, NamedTuple
+
+from texscan import find_matching_brace
+
+PathLike = Union[str, Path]
+
+NEW_ENTRY_BYTES_RE = re.compile(rb"\\newglossaryentry\{([^}]+)\}\s*\{", re.DOTALL)
+COMMENT_LINE_RE = re.compile(r"(?m)^%.*$")
+
+
+class GlossaryParseError(ValueError):
+    """
+    Malformed glossary source; the message starts with file:line.
+    """
+
+    def __init__(self, message: str, source_file: PathLike, line: int):
+        super().__init__(f"{source_file}:{line}: {message}")
+        self.source_file = Path(source_file)
+        self.line = line
+
+
+class GlossaryRecord(NamedTuple):
+    key: str
+    description: str
+    source_file: Path
+    offset: int    # byte offset of "\newglossaryentry" in source_file
+    length: int    # byte length of the whole entry, up to its closing brace
+    line: int      # 1-based line of "\newglossaryentry"
+
+
+def description_from_body(body: str) -> str | None:
+    """
+    Value of description={...} in an entry body (full-line comments ignored),
+    or None if the entry has no parsable description.
+    """
+    body_cleaned = COMMENT_LINE_RE.sub("", body)
+
+    desc_idx = body_cleaned.find("description=")
+    if desc_idx == -1:
+        return None
+
+    brace_idx = body_cleaned.find("{", desc_idx)
+    if brace_idx == -1:
+        return None
+
+    try:
+        end = find_matching_brace(body_cleaned, brace_idx)
+    except ValueError:
+        return None
+
+    return body_cleaned[brace_idx + 1 : end].strip()
+
+
+def glossary_source_files(source: PathLike) -> List[Path]:
+    """
+    The expanded glossary files for source: the file itself, or the
+    ADictML*expanded.tex (or ADictML*Expanded.tex) files of a directory.
+    """
+    p = Path(source).expanduser()
+
+    if p.is_file():
+        return [p]
+
+    if not p.is_dir():
+        raise FileNotFoundError(f"Glossary source not found: {p}")
+
+    files = sorted(p.glob("ADictML*expanded.tex"))
+    if not files:
+        files = sorted(p.glob("ADictML*Expanded.tex"))
+
+    if not files:
+        raise FileNotFoundError(
+            f"No expanded glossary files found in {p} matching ADictML*expanded.tex (or ADictML*Expanded.tex)."
+        )
+    return files
+
+
+def iter_glossary_file(path: PathLike) -> Iterator[GlossaryRecord]:
+    """
+    Yield a GlossaryRecord for every entry with a description in one file.
+    """
+    path = Path(path)
+    with open(path, "rb") as f:
+        if path.stat().st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = 0
+            line = 1
+            line_pos = 0
+            while True:
+                m = NEW_ENTRY_BYTES_RE.search(mm, pos)
+                if not m:
+                    break
+                line += mm[line_pos : m.start()].count(b"\n")
+                line_pos = m.start()
+
+                body_open = m.end() - 1
+                try:
+                    body_close = find_matching_brace(mm, body_open)
+                except ValueError:
+                    raise GlossaryParseError(
+                        f"unbalanced braces in entry '{m.group(1).decode('utf-8', 'replace').strip()}'",
+                        path, line
+                    ) from None
+
+                key = m.group(1).decode("utf-8").strip()
+                try:
+                    body = mm[body_open + 1 : body_close].decode("utf-8")
+                except UnicodeDecodeError as e:
+                    raise GlossaryParseError(f"entry '{key}' is not valid UTF-8 ({e.reason})", path, line) from None
+
+                description = description_from_body(body)
+                if description is not None:
+                    yield GlossaryRecord(key, description, path, m.start(), body_close + 1 - m.start(), line)
+                pos = body_close + 1
+
+
+def iter_glossary_records(source: PathLike) -> Iterator[GlossaryRecord]:
+    """
+    Lazily yield the entries of all expanded glossary files of source, file by file.
+    """
+    for path in glossary_source_files(source):
+        yield from iter_glossary_file(path)
+
+
+def parse_glossary_sources(source: PathLike) -> Dict[str, str]:
+    """
+    Streaming equivalent of parse_glossary(load_expanded_glossary_sources(source)):
+    key -> description text. Later definitions of a key win, as before.
+    """
+    files = glossary_source_files(source)
+    print(f"📚 Streaming {len(files)} expanded glossary file(s) from: {Path(source).expanduser()}")
+    return {rec.key: rec.description for path in files for rec in iter_glossary_file(path)}
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+In-memory Markdown post-processing for the blog publishing pipeline.
+
+The Pandoc output of an entry goes through a fixed sequence of text stages:
+Liquid protection of math (fix_latex_in_text), removal of the bibliography
+front matter and Pandoc divs (remove_reference_blocks_and_headers) and the
+footer (add_footer) give the Jekyll post; remove_math_and_raw turns that
+into the Substack post. Each stage is a plain str -> str function, so
+run_stages() can chain them over one string and write_posts() writes both
+posts once, instead of reading and rewriting a file per stage.
+"""
+
+import re
+from pathlib import Path
+from typing import Union, Callable, Dict, Iterator, NamedTuple, Sequence, Tuple
+
+import buildtrace
+
+PathLike = Union[str, Path]
+
+Stage = Callable[[str], str]
+
+# --- LaTeX + Markdown safety wrappers ---
+RAW_OPEN  = "{% raw %}"
+RAW_CLOSE = "{% endraw %}"
+
+# ---------- Tokenizer ----------
+#
+# One left-to-right scan splits a post into text, code fences, Liquid tags
+# ({% ... %}, {{ ... }}) and math tokens. Both fix_latex_in_text (Jekyll) and
+# remove_math_and_raw (Substack) are rendered from this token stream. Posts
+# with many unclosed openers (stray '$', '\[' or '{{') are still scanned in
+# linear time, where lazy DOTALL regexes rescanned the rest of the text for
+# every opener.
+
+TEXT = "text"
+FENCE = "fence"                 # ```...```
+RAW_TAG = "raw"                 # {% raw %}
+ENDRAW_TAG = "endraw"           # {% endraw %}
+LIQUID = "liquid"               # any other {% ... %} or {{ ... }}
+DISPLAY_MATH = "display"        # $$...$$
+INLINE_MATH = "inline"          # $...$
+PAREN_MATH = "paren"            # \(...\)
+BRACKET_MATH = "bracket"        # \[...\]
+ENV_MATH = "env"                # \begin{equation}...\end{equation} (align, gather, ...)
+ENSUREMATH = "ensuremath"       # \ensuremath{...}
+
+MATH_KINDS = {DISPLAY_MATH, INLINE_MATH, PAREN_MATH, BRACKET_MATH, ENV_MATH, ENSUREMATH}
+
+MATH_ENVS = r"(?:equation|align|gather|multline|eqnarray)\*?"
+
+# Openers, plus escapes that must be skipped as a whole (\\, \$, \{, \}).
+OPENER_RE = re.compile(
+    r"\\[\\${}]|```|\{%|\{\{|\$\$|\$|\\\(|\\\[|\\begin\{(" + MATH_ENVS + r")\}|\\ensuremath\{"
+)
+
+LIQUID_TAG_RE = re.compile(r"\{%-?\s*(raw|endraw)\s*-?%\}")
+
+# Closers that are searched for with a regex (an escaped '$' does not close math).
+DOLLAR_RE = re.compile(r"(?<!\\)\$")
+DOUBLE_DOLLAR_RE = re.compile(r"(?<!\\)\$\$")
+BRACE_RE = re.compile(r"\\[\\{}]|[{}]")
+
+
+class MdToken(NamedTuple):
+    kind: str
+    text: str     # source text of the token, delimiters included
+    inner: str    # text between the delimiters ("" for TEXT)
+
+
+# Opener -> (kind, closer, length of closer); closers given as patterns skip escaped '$'.
+SIMPLE_OPENERS = {
+    "$": (INLINE_MATH, DOLLAR_RE, 1),
+    "$$": (DISPLAY_MATH, DOUBLE_DOLLAR_RE, 2),
+    "{{": (LIQUID, "}}", 2),
+    "{%": (LIQUID, "%}", 2),
+    "```": (FENCE, "```", 3),
+    "\\(": (PAREN_MATH, "\\)", 2),
+    "\\[": (BRACKET_MATH, "\\]", 2),
+}
+
+
+def _brace_pairs(text: str) -> Dict[int, int]:
+    """
+    Position of every '{' -> position of its matching '}' (escaped braces ignored).
+    """
+    pairs, stack = {}, []
+    for m in BRACE_RE.finditer(text):
+        if m.group(0) == "{":
+            stack.append(m.start())
+        elif m.group(0) == "}" and stack:
+            pairs[stack.pop()] = m.start()
+    return pairs
+
+
+def _scan(text: str) -> Iterator[Tuple[str, int, int, int, int]]:
+    """
+    Yield (kind, start, inner_start, inner_end, end) for every non-text token.
+
+    At every opener the next closer is looked up once. Openers are visited in
+    increasing order, so the position found for a closer stays valid until
+    the scan passes it; caching it means a closer is searched for at most
+    once per stretch of text, and the whole scan is linear.
+    """
+    next_closer: Dict[object, Tuple[int, int]] = {}   # closer -> (searched_from, found_at)
+    brace_pairs = None
+    search = OPENER_RE.search
+    pos = 0
+    while True:
+        m = search(text, pos)
+        if not m:
+            return
+        op, start, after = m.group(0), m.start(), m.end()
+
+        spec = SIMPLE_OPENERS.get(op)
+        if spec is not None:
+            kind, closer, closer_len = spec
+        elif op[1] in "\\${}":
+            pos = after  # escaped character, part of the text
+            continue
+        elif op[1] == "b":  # \begin{env}
+            kind, closer = ENV_MATH, f"\\end{{{m.group(1)}}}"
+            closer_len = len(closer)
+        else:  # \ensuremath{
+            if brace_pairs is None:
+                brace_pairs = _brace_pairs(text)
+            inner_end = brace_pairs.get(after - 1, -1)
+            if inner_end == -1:
+                pos = start + 1
+                continue
+            yield ENSUREMATH, start, after, inner_end, inner_end + 1
+            pos = inner_end + 1
+            continue
+
+        cached = next_closer.get(closer)
+        if cached is not None and cached[0] <= after and (cached[1] == -1 or cached[1] >= after):
+            inner_end = cached[1]
+        else:
+            if closer.__class__ is str:
+                inner_end = text.find(closer, after)
+            else:
+                cm = closer.search(text, after)
+                inner_end = cm.start() if cm else -1
+            next_closer[closer] = (after, inner_end)
+
+        end = inner_end + closer_len
+        if inner_end == -1 or (inner_end == after and kind in MATH_KINDS):
+            pos = start + 1  # unclosed opener, or empty math ("$$", "$$$$"): plain text
+            continue
+        if kind is INLINE_MATH and text.startswith("$", end):
+            pos = start + 1  # the closing '$' opens display math: plain text
+            continue
+        if op == "{%":
+            tag = LIQUID_TAG_RE.fullmatch(text, start, end)
+            if tag:
+                kind = RAW_TAG if tag.group(1) == "raw" else ENDRAW_TAG
+        yield kind, start, after, inner_end, end
+        pos = end
+
+
+def tokenize_markdown(text: str) -> Iterator[MdToken]:
+    """
+    Split Markdown into MdTokens; concatenating all token texts gives text back.
+    Unclosed openers are plain text.
+    """
+    text_start = 0
+    for kind, start, inner_start, inner_end, end in _scan(text):
+        if start > text_start:
+            yield MdToken(TEXT, text[text_start:start], "")
+        yield MdToken(kind, text[start:end], text[inner_start:inner_end])
+        text_start = end
+    if text_start < len(text):
+        yield MdToken(TEXT, text[text_start:], "")
+
+
+def fix_latex_in_text(md_text: str) -> str:
+    """
+    Process a Markdown string so that ONLY LaTeX math tokens containing '{{' or '}}'
+    are wrapped with {% raw %}...{% endraw %}.
+    - Idempotent for code fences and existing raw blocks.
+    - No extra line breaks introduced.
+    """
+    out = []
+    copied = 0
+    in_raw = False
+    for kind, start, inner_start, inner_end, end in _scan(md_text):
+        if kind is RAW_TAG:
+            in_raw = True
+        elif kind is ENDRAW_TAG:
+            in_raw = False
+        elif kind in MATH_KINDS and not in_raw:
+            inner = md_text[inner_start:inner_end]
+            if "{{" in inner or "}}" in inner:
+                out.append(md_text[copied:start])
+                out.append(f"{RAW_OPEN}{md_text[start:end]}{RAW_CLOSE}")
+                copied = end
+    out.append(md_text[copied:])
+    return "".join(out)
+
+
+def remove_reference_blocks_and_headers(content: str) -> str:
+    lines = content.splitlines()
+    cleaned_lines = []
+
+    in_yaml_header = False
+    yaml_lines = []
+    i = 0
+
+    # Preserve front-matter block
+    if lines and lines[0].strip() == "---":
+        in_yaml_header = True
+        yaml_lines.append(lines[0])
+        i = 1
+        while i < len(lines):
+            yaml_lines.append(lines[i])
+            if lines[i].strip() == "---":
+                i += 1
+                break
+            i += 1
+
+    cleaned_lines.extend(yaml_lines)
+
+    # Skip bibliography block and handle references
+    skip_bib_block = False
+    for line in lines[i:]:
+        if line.strip() == "---" and not skip_bib_block:
+            skip_bib_block = True
+            continue
+        if skip_bib_block:
+            if line.strip().startswith("bibliography:"):
+                continue
+            elif line.strip() == "---":
+                skip_bib_block = False
+                continue
+            else:
+                continue
+
+        if re.match(r'^#\s+.+\{#.+\}', line):
+            continue
+
+        if line.strip() == ':::::: {#refs .references .csl-bib-body .hanging-indent entry-spacing="0"}':
+            cleaned_lines.append('**References**')
+            cleaned_lines.append('')
+            continue
+
+        if line.strip().startswith(":::"):
+            continue
+
+        cleaned_lines.append(line)
+
+    return "\n".join(cleaned_lines)
+
+
+FOOTER = """
+---
+
+📚 This explanation is part of the [Aalto Dictionary of Machine Learning](https://AaltoDictionaryofML.github.io) — 
+an open-access multi-lingual glossary developed at Aalto University to support 
+accessible and precise communication in ML.
+""".strip()
+
+
+def add_footer(content: str) -> str:
+    """
+    Append the dictionary footer unless the text already mentions the dictionary.
+    """
+    if "Aalto Dictionary of Machine Learning" in content:
+        return content
+    return content.rstrip() + "\n\n" + FOOTER + "\n"
+
+
+def remove_math_and_raw(text: str) -> str:
+    """
+    Remove LaTeX math and Jekyll raw tags from Markdown text.
+    Keeps all other Markdown content intact.
+    """
+    out = []
+    copied = 0
+    for kind, start, _, _, end in _scan(text):
+        if kind is not FENCE:
+            out.append(text[copied:start])
+            copied = end
+    out.append(text[copied:])
+    text = "".join(out)
+    text = re.sub(r"\n{3,}", "\n\n", text).strip()
+    return text
+
+
+# ---------- Pipeline ----------
+
+JEKYLL_STAGES: Tuple[Stage, ...] = (fix_latex_in_text, remove_reference_blocks_and_headers, add_footer)
+SUBSTACK_STAGES: Tuple[Stage, ...] = (remove_math_and_raw,)
+
+
+def run_stages(text: str, stages: Sequence[Stage]) -> str:
+    for stage in stages:
+        with buildtrace.span(stage.__name__):
+            if buildtrace.is_enabled():
+                buildtrace.count("bytes_read", len(text.encode("utf-8")))
+            text = stage(text)
+            if buildtrace.is_enabled():
+                buildtrace.count("bytes_written", len(text.encode("utf-8")))
+    return text
+
+
+def postprocess_markdown(
+    raw_md: str,
+    jekyll_stages: Sequence[Stage] = JEKYLL_STAGES,
+    substack_stages: Sequence[Stage] = SUBSTACK_STAGES
+) -> Tuple[str, str]:
+    """
+    Raw post (front matter + Pandoc output) -> (Jekyll post, Substack post).
+    The Substack stages run on the finished Jekyll post.
+    """
+    jekyll = run_stages(raw_md, jekyll_stages)
+    return jekyll, run_stages(jekyll, substack_stages)
+
+
+def write_posts(raw_md: str, jekyll_path: PathLike, substack_path: PathLike) -> Tuple[Path, Path]:
+    """
+    Post-process raw_md in memory and write the Jekyll and Substack posts.
+    """
+    jekyll, substack = postprocess_markdown(raw_md)
+    jekyll_path, substack_path = Path(jekyll_path), Path(substack_path)
+    with buildtrace.span("write_posts"):
+        jekyll_path.write_text(jekyll, encoding="utf-8")
+        substack_path.write_text(substack, encoding="utf-8")
+        buildtrace.count("bytes_written", jekyll_path.stat().st_size + substack_path.stat().st_size)
+    print(f"✅ Posts written: {jekyll_path.name}, {substack_path.name}")
+    return jekyll_path, substack_path
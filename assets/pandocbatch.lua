@@ -0,0 +1,82 @@
+--[[
+pandocbatch.lua -- convert many LaTeX files to Markdown in ONE pandoc process.
+
+Run as a filter on an empty document (see pandocbatch.py):
+
+  pandoc -f markdown -t markdown -o /dev/null -L pandocbatch.lua \
+         -M batch_manifest=jobs.tsv -M batch_bibliography=Literature.bib < /dev/null
+
+jobs.tsv holds one "input.tex<TAB>output.md" pair per line. The bibliography
+is parsed once; each input is then read, run through citeproc with only the
+references it cites and written as standalone Markdown, i.e. the same output
+as `pandoc input.tex --from=latex --to=markdown --standalone --citeproc
+--bibliography=...` for that file alone.
+]]
+
+local function read_file(path)
+  local f = assert(io.open(path, "rb"))
+  local text = f:read("a")
+  f:close()
+  return text
+end
+
+local function write_file(path, text)
+  local f = assert(io.open(path, "wb"))
+  f:write(text)
+  f:close()
+end
+
+function Pandoc(doc)
+  local manifest = pandoc.utils.stringify(doc.meta.batch_manifest)
+  local bibliography = pandoc.utils.stringify(doc.meta.batch_bibliography)
+
+  -- Parse the whole bibliography once (nocite @* selects every entry).
+  local all = pandoc.read("---\nnocite: '@*'\n---\n", "markdown")
+  all.meta.bibliography = bibliography
+  local by_id = {}
+  for _, ref in ipairs(pandoc.utils.references(all)) do
+    by_id[ref.id] = ref
+  end
+
+  local template = pandoc.template.compile(pandoc.template.default("markdown"))
+
+  for line in io.lines(manifest) do
+    local input, output = line:match("^(.-)\t(.*)$")
+    if input then
+      local ok, err = pcall(function()
+        local sub = pandoc.read(read_file(input), "latex")
+
+        local cited, seen = {}, {}
+        sub:walk({
+          Cite = function(cite)
+            for _, citation in ipairs(cite.citations) do
+              local ref = by_id[citation.id]
+              if ref and not seen[citation.id] then
+                seen[citation.id] = true
+                table.insert(cited, ref)
+              end
+            end
+          end
+        })
+
+        sub.meta.references = cited
+        local rendered = pandoc.utils.citeproc(sub)
+        rendered.meta.references = nil
+        rendered.meta.bibliography = bibliography  -- as set by --bibliography on the command line
+
+        -- --citeproc on the command line disables the writer's citations
+        -- extension, so rendered Cite elements are written out as text.
+        local text = pandoc.write(rendered, "markdown-citations", { template = template })
+        if text:sub(-1) ~= "\n" then
+          text = text .. "\n"
+        end
+        write_file(output, text)
+      end)
+      if not ok then
+        io.stderr:write("pandocbatch: " .. input .. ": " .. tostring(err) .. "\n")
+      end
+    end
+  end
+
+  return doc
+end
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batched LaTeX -> Markdown conversion for the blog publishing pipeline.
+
+Instead of one `pandoc --citeproc` process per glossary entry (each paying
+pandoc's start-up and re-parsing Literature.bib), convert_tex_batch() hands
+a whole chunk of .tex files to a single pandoc process running the
+pandocbatch.lua filter. The filter parses the bibliography once and writes
+every file exactly as the per-file command in MakeBlogPost.generate_blog_post
+would.
+
+Chunks run in parallel; files that a chunk fails to produce are simply left
+out of the result, so callers fall back to the per-file conversion for them.
+"""
+
+import os
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union, Dict, List, Sequence
+
+from buildcache import BuildCache, hash_file
+import buildtrace
+
+PathLike = Union[str, Path]
+
+BATCH_FILTER = Path(__file__).with_name("pandocbatch.lua")
+DEFAULT_BATCH_SIZE = 50
+
+
+def pandoc_cache_key(tex_file: PathLike, bib_file: PathLike) -> str:
+    """
+    Build cache key of the Pandoc stage (shared with generate_blog_post).
+    """
+    return BuildCache.key("pandoc-md", Path(tex_file).read_bytes(), hash_file(bib_file))
+
+
+def _convert_chunk(chunk: Sequence[Path], bib_file: str, output_dir: Path, chunk_id: int) -> Dict[Path, Path]:
+    """
+    Convert one chunk in a single pandoc process. Returns tex -> markdown path
+    for every file that was written.
+    """
+    outputs = {tex: output_dir / f"{chunk_id:04d}-{i:04d}-{tex.stem}.md" for i, tex in enumerate(chunk)}
+    manifest = output_dir / f"batch-{chunk_id:04d}.tsv"
+    manifest.write_text("".join(f"{tex}\t{out}\n" for tex, out in outputs.items()), encoding="utf-8")
+
+    command = [
+        "pandoc",
+        "--from=markdown",
+        "--to=markdown",
+        "-o", os.devnull,
+        f"--lua-filter={BATCH_FILTER}",
+        "-M", f"batch_manifest={manifest}",
+        "-M", f"batch_bibliography={bib_file}",
+    ]
+    try:
+        with buildtrace.span("pandoc_batch", tool=True, files=len(chunk)):
+            subprocess.run(command, check=True, stdin=subprocess.DEVNULL)
+    except (subprocess.CalledProcessError, OSError) as e:
+        print(f"⚠️ Batched Pandoc run {chunk_id} failed ({e}); falling back to one run per file.")
+        return {}
+
+    return {tex: out for tex, out in outputs.items() if out.exists()}
+
+
+def convert_tex_batch(
+    tex_files: Sequence[PathLike],
+    bib_file: PathLike,
+    output_dir: PathLike,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_workers: int | None = None,
+    cache: BuildCache | None = None
+) -> Dict[Path, Path]:
+    """
+    Convert tex_files to standalone Markdown (with --citeproc against bib_file),
+    batch_size files per pandoc process. Results are written to output_dir.
+    With a cache, unchanged files are taken from it and new results are stored.
+    Returns tex file -> markdown file; files that failed are missing from the dict.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tex_files = [Path(t) for t in tex_files]
+
+    results: Dict[Path, Path] = {}
+    todo: List[Path] = []
+    keys: Dict[Path, str] = {}
+    for i, tex in enumerate(tex_files):
+        if cache:
+            keys[tex] = pandoc_cache_key(tex, bib_file)
+            cached = output_dir / f"cached-{i:04d}-{tex.stem}.md"
+            if cache.get(keys[tex], cached):
+                results[tex] = cached
+                continue
+        todo.append(tex)
+
+    if todo:
+        chunks = [todo[i : i + batch_size] for i in range(0, len(todo), batch_size)]
+        print(f"📝 Converting {len(todo)} TeX file(s) with Pandoc in {len(chunks)} batch(es).")
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [
+                pool.submit(_convert_chunk, chunk, str(bib_file), output_dir, chunk_id)
+                for chunk_id, chunk in enumerate(chunks)
+            ]
+            for fut in futures:
+                converted = fut.result()
+                if cache:
+                    for tex, out in converted.items():
+                        cache.put(keys[tex], out)
+                results.update(converted)
+
+    if cache:
+        print(f"♻️ Reused cached Pandoc output for {len(tex_files) - len(todo)} file(s).")
+    return results
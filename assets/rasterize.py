@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF -> raster image conversion for the TikZ figures.
+
+Backends, in order of preference:
+  - "pdfium":      pypdfium2, renders in-process (no subprocess at all)
+  - "pdf2image":   one pdftoppm process for all pages of a PDF
+  - "imagemagick": the old 'convert -density ...' call (fallback)
+
+The first two return PIL images, so cropping and the output format
+(PNG or WebP) are handled in-process as well.
+"""
+
+import os
+import shutil
+import tempfile
+import subprocess
+from pathlib import Path
+from functools import lru_cache
+from typing import Union, List, Sequence
+
+PathLike = Union[str, Path]
+
+BACKENDS = ("pdfium", "pdf2image", "imagemagick")
+FORMATS = {"png": "PNG", "webp": "WEBP"}
+
+
+@lru_cache(maxsize=None)
+def default_backend() -> str:
+    """
+    First installed backend from BACKENDS (pdf2image only together with
+    poppler's pdftoppm, which it runs).
+    """
+    try:
+        import pypdfium2  # noqa: F401
+        import PIL  # noqa: F401
+        return "pdfium"
+    except ImportError:
+        pass
+    try:
+        import pdf2image  # noqa: F401
+    except ImportError:
+        return "imagemagick"
+    return "pdf2image" if shutil.which("pdftoppm") else "imagemagick"
+
+
+def _render_pdfium(pdf_path: PathLike, dpi: int) -> list:
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(str(pdf_path))
+    try:
+        return [page.render(scale=dpi / 72).to_pil() for page in pdf]
+    finally:
+        pdf.close()
+
+
+def _render_pdf2image(pdf_path: PathLike, dpi: int) -> list:
+    from pdf2image import convert_from_path
+
+    return convert_from_path(str(pdf_path), dpi=dpi)
+
+
+def _crop_whitespace(img):
+    """
+    Trim uniform border around the figure (colour of the top-left pixel).
+    """
+    from PIL import Image, ImageChops
+
+    rgb = img.convert("RGB")
+    background = Image.new("RGB", rgb.size, rgb.getpixel((0, 0)))
+    bbox = ImageChops.difference(rgb, background).getbbox()
+    return img.crop(bbox) if bbox else img
+
+
+def _save(img, path: Path, fmt: str, quality: int) -> None:
+    if fmt == "png":
+        img.save(path, "PNG", optimize=True)
+    else:
+        img.save(path, FORMATS[fmt], quality=quality, method=6)
+
+
+def _rasterize_imagemagick(
+    pdf_path: PathLike,
+    output_paths: Sequence[Path],
+    dpi: int,
+    crop: bool,
+    quality: int
+) -> None:
+    command = ["convert", "-density", str(dpi), str(pdf_path)]
+    if crop:
+        command.append("-trim")
+    command += ["-quality", str(quality)]
+
+    if len(output_paths) == 1:
+        subprocess.run(command + [str(output_paths[0])], check=True, capture_output=True)
+        return
+
+    # One convert call for all pages; pages are renamed afterwards (same file system -> os.replace).
+    with tempfile.TemporaryDirectory(prefix=".pages-", dir=output_paths[0].parent) as pages_dir:
+        pattern = os.path.join(pages_dir, f"page-%d{output_paths[0].suffix}")
+        subprocess.run(command + [pattern], check=True, capture_output=True)
+        for i, path in enumerate(output_paths):
+            os.replace(pattern % i, path)
+
+
+def rasterize_pdf(
+    pdf_path: PathLike,
+    output_paths: Sequence[PathLike],
+    dpi: int = 300,
+    crop: bool = False,
+    quality: int = 90,
+    backend: str | None = None
+) -> List[Path]:
+    """
+    Rasterize every page of pdf_path in one call; page i is written to output_paths[i].
+    The format (png or webp) follows the suffix of each output path.
+    Raises ValueError if the page count does not match len(output_paths) or
+    the pdfium / pdf2image backend fails (their own exception types vary).
+    """
+    output_paths = [Path(p) for p in output_paths]
+    backend = backend or default_backend()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown rasterization backend: {backend}")
+    for path in output_paths:
+        if path.suffix.lower().lstrip(".") not in FORMATS:
+            raise ValueError(f"Unsupported image format: {path.name} (use .png or .webp)")
+        os.makedirs(path.parent, exist_ok=True)
+
+    if backend == "imagemagick":
+        _rasterize_imagemagick(pdf_path, output_paths, dpi, crop, quality)
+        return output_paths
+
+    render = _render_pdfium if backend == "pdfium" else _render_pdf2image
+    try:
+        pages = render(pdf_path, dpi)
+    except Exception as e:   # e.g. pdf2image's PDFInfoNotInstalledError without poppler
+        raise ValueError(f"{backend} could not render {pdf_path}: {type(e).__name__}: {e}") from e
+    if len(pages) != len(output_paths):
+        raise ValueError(f"{pdf_path}: expected {len(output_paths)} page(s), got {len(pages)}")
+
+    for img, path in zip(pages, output_paths):
+        try:
+            if crop:
+                img = _crop_whitespace(img)
+            _save(img, path, path.suffix.lower().lstrip("."), quality)
+        except Exception as e:
+            raise ValueError(f"{backend} could not write {path.name}: {type(e).__name__}: {e}") from e
+    return output_paths
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pre-compiled pdflatex formats for a fixed preamble (mylatexformat).
+
+Loading tikz, xcolor and the tikz libraries dominates the time of a small
+figure compile. ensure_format() dumps the preamble once into
+<format_dir>/<name>.fmt; compiles then start from that dump via
+pdflatex_command(). mylatexformat skips the document's own preamble up to
+\\begin{document} when the format is loaded, so documents stay unchanged.
+
+The format name contains a hash of the preamble and of the pdflatex
+version, so a changed preamble (or TeX update) builds a new format.
+"""
+
+import os
+import hashlib
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from typing import Union, Dict, List, Tuple
+
+PathLike = Union[str, Path]
+
+_lock = threading.Lock()
+_formats: Dict[Tuple[str, str], str | None] = {}   # (format_dir, name) -> name, or None if the build failed
+_pdflatex_version: str | None = None
+
+
+def _engine_version() -> str:
+    global _pdflatex_version
+    if _pdflatex_version is None:
+        out = subprocess.run(["pdflatex", "--version"], check=True, capture_output=True, text=True)
+        _pdflatex_version = out.stdout.splitlines()[0] if out.stdout else ""
+    return _pdflatex_version
+
+
+def format_name(preamble: str, prefix: str = "preamble") -> str:
+    h = hashlib.sha256((_engine_version() + "\n" + preamble).encode("utf-8")).hexdigest()
+    return f"{prefix}-{h[:16]}"
+
+
+def ensure_format(preamble: str, format_dir: PathLike, prefix: str = "preamble") -> str | None:
+    """
+    Return the name of a format with the given preamble dumped, building it
+    in format_dir if needed. Returns None if the format cannot be built
+    (e.g. mylatexformat is not installed); callers then compile without it.
+    """
+    format_dir = Path(format_dir).expanduser().resolve()
+    try:
+        name = format_name(preamble, prefix)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    with _lock:
+        if (str(format_dir), name) in _formats:
+            return _formats[(str(format_dir), name)]
+
+        if not (format_dir / f"{name}.fmt").exists():
+            format_dir.mkdir(parents=True, exist_ok=True)
+            print(f"🛠️ Building TeX format {name} ...")
+            # Build in a private directory and publish the .fmt atomically, so
+            # concurrent processes never load a half-written format.
+            with tempfile.TemporaryDirectory(prefix="fmt-", dir=format_dir) as work_dir:
+                work = Path(work_dir)
+                (work / f"{name}.tex").write_text(preamble + "\\begin{document}\n\\end{document}\n", encoding="utf-8")
+                try:
+                    subprocess.run(
+                        ["pdflatex", "-ini", "-interaction=nonstopmode", "-halt-on-error",
+                         f"-jobname={name}", "&pdflatex", "mylatexformat.ltx", f"{name}.tex"],
+                        cwd=work, check=True, capture_output=True
+                    )
+                    os.replace(work / f"{name}.fmt", format_dir / f"{name}.fmt")
+                except (OSError, subprocess.CalledProcessError) as e:
+                    print(f"⚠️ Could not build TeX format {name} ({e}); compiling without it.")
+                    _formats[(str(format_dir), name)] = None
+                    return None
+
+        _formats[(str(format_dir), name)] = name
+        return name
+
+
+def pdflatex_command(
+    tex_name: str,
+    preamble: str | None = None,
+    format_dir: PathLike | None = None
+) -> Tuple[List[str], Dict[str, str] | None]:
+    """
+    Command and environment for compiling tex_name, using the dumped format
+    for preamble when format_dir is given and the format is available.
+    """
+    command = ["pdflatex", "-interaction=nonstopmode", "-halt-on-error"]
+    if preamble is None or format_dir is None:
+        return command + [tex_name], None
+
+    name = ensure_format(preamble, format_dir)
+    if name is None:
+        return command + [tex_name], None
+
+    env = dict(os.environ)
+    # Trailing path separator keeps the default search path after our directory.
+    env["TEXFORMATS"] = str(Path(format_dir).expanduser().resolve()) + os.pathsep
+    return command + [f"-fmt={name}", tex_name], env
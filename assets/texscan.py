@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Brace matching for LaTeX sources, shared by countterms.py, MakeBlogPost.py
+and glossarystream.py.
+
+Instead of visiting every character, the scanner jumps with a compiled
+regex from one interesting position to the next: braces, backslash
+escapes and '%' comments. Escaped braces (\\{ \\}) and escaped percent
+signs (\\%) are skipped, and everything from an unescaped '%' to the end
+of the line is ignored.
+
+Works on str as well as on bytes / mmap objects.
+"""
+
+import re
+import mmap
+from typing import Tuple, AnyStr
+
+# Backslash + any character (escapes, incl. "\\\\"), or a brace, or a comment start.
+TOKEN_RE = re.compile(r"\\.|[{}%]", re.DOTALL)
+TOKEN_BYTES_RE = re.compile(rb"\\.|[{}%]", re.DOTALL)
+
+# Unescaped '%' up to the end of the line (a comment right after "\\\\" is not detected).
+COMMENT_RE = re.compile(r"(?<!\\)%[^\n]*")
+
+
+def find_matching_brace(text: AnyStr, start: int) -> int:
+    """
+    Given text[start] == '{', return the index of the matching '}'.
+    Raises ValueError if start is not an opening brace or it is never closed.
+    """
+    is_bytes = isinstance(text, (bytes, bytearray, mmap.mmap))
+    if is_bytes:
+        token_re, open_b, close_b, newline = TOKEN_BYTES_RE, ord("{"), ord("}"), b"\n"
+    else:
+        token_re, open_b, close_b, newline = TOKEN_RE, "{", "}", "\n"
+
+    if start < 0 or start >= len(text) or text[start] != open_b:
+        raise ValueError("find_matching_brace: start index must point to '{'.")
+
+    depth = 0
+    search = token_re.search
+    pos = start
+    while True:
+        m = search(text, pos)
+        if m is None:
+            raise ValueError("Unbalanced braces while parsing.")
+        i = m.start()
+        ch = text[i]
+        if ch == open_b:
+            depth += 1
+            pos = i + 1
+        elif ch == close_b:
+            depth -= 1
+            if depth == 0:
+                return i
+            pos = i + 1
+        elif m.end() - i == 1:  # '%': skip the rest of the line
+            eol = text.find(newline, i)
+            if eol == -1:
+                raise ValueError("Unbalanced braces while parsing.")
+            pos = eol + 1
+        else:  # escape sequence such as \{ \} \% \\
+            pos = m.end()
+
+
+def extract_balanced_braces(text: str, start_brace_idx: int) -> Tuple[str, int]:
+    """
+    Given text[start_brace_idx] == '{', return (content_inside, index_after_closing_brace).
+    Handles nested braces, escaped braces and % comments.
+    """
+    end = find_matching_brace(text, start_brace_idx)
+    return text[start_brace_idx + 1 : end], end + 1
+
+
+def strip_comments(text: str) -> str:
+    """
+    Remove % comments, keeping line structure intact.
+    """
+    return COMMENT_RE.sub("", text)
+
+
+# Cross references between glossary entries: \gls{key}, \Gls{key}, \glspl[...]{key}, ...
+GLS_REF_RE = re.compile(r"\\(?:gls|Gls|GLS|glspl|Glspl|GLSpl)(?:\[[^\]]*\])?\{([^}]+)\}")
+
+# Citations: \cite{a,b}, \citep[p. 3]{a}, \textcite{a}, ...
+CITE_RE = re.compile(r"\\(?:[a-zA-Z]*cite[a-zA-Z]*)\*?(?:\[[^\]]*\]){0,2}\{([^}]+)\}")
+
+
+def cited_keys(text: str) -> list:
+    """
+    Bibliography keys of all citation commands in text, in order of appearance.
+    """
+    return [key.strip() for m in CITE_RE.finditer(text) for key in m.group(1).split(",") if key.strip()]